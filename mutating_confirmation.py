@@ -6,11 +6,17 @@ This module exposes a FastAPI application that keeps a population of simple
 rule-based "genomes". Incoming alerts are scored by each genome, gradually
 mutating the population over time. The best scoring genome drives a set of risk
 managed paper-trading bots that size positions based on per-trade risk.
+Several accounts can run side by side as separate ``Engine`` instances that
+share one candle store and ingest pipeline.
 
 Run locally with:
 
     uvicorn mutating_confirmation:app --reload
 
+The engine core only needs NumPy; the HTTP layer (FastAPI/pydantic) lives in
+``mutating_confirmation_api`` and is imported the first time ``app`` is used,
+so CLI and replay tooling can import the engine cheaply.
+
 The API surface intentionally stays lightweight so it can be wired into the
 existing Node/React stack later (for example via a gateway). All values and
 behaviour are easy to tweak – this is meant to be a sandbox, not production
@@ -19,35 +25,92 @@ infrastructure.
 
 from __future__ import annotations
 
-import asyncio
+import array
+import hashlib
 import itertools
 import json
 import math
-import random
+import os
+import struct
 import time
-import urllib.error
-import urllib.request
+import zlib
 from collections import deque
-from contextlib import asynccontextmanager, suppress
+from contextlib import suppress
 from datetime import datetime
-from typing import Any, Dict, List, Literal, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Literal, Mapping, NamedTuple, Optional, Sequence
+from urllib.parse import quote
 
 import numpy as np
-import pandas as pd
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+
+if TYPE_CHECKING:  # pragma: no cover
+    import asyncio
+    import logging
+    import threading
+
+    import pandas as pd
 
 # ---------- CONFIG ----------
 SYMBOL_DEFAULT = "SYMBOL1"
 CANDLE_SECONDS = 60
+CANDLE_HOT_BARS = 5000  # candles per symbol kept in memory; older ones roll into the archive
 POP_SIZE = 14
 ELITES = 4
 MUT_RATE = 0.25
 EVAL_WINDOW = 200  # candles used for quick in-sample evaluation
 PAPER_CAPITAL = 100_000.0
 MIN_CONFIRM_SCORE = 0.6  # engine-level threshold for execution (0-1)
+CHECK_WEIGHTS = (1.0, 0.8, 0.6, 0.4)  # genome_vote weights: agreement, volume, momentum, time-of-day
 SCALP_MAX_SECONDS = 60 * 5  # treat as scalp if genome.scalp_window <= this
+TICK_QUEUE_MAX = 20_000  # queued ticks before the ingest queue sheds load
+TICK_BATCH = 512  # ticks applied per writer pass before re-checking alerts
+ALERT_QUEUE_MAX = 256  # alerts in flight before /alert applies back-pressure
+COALESCE_MAX_BATCH = 64  # flush a coalescing batch early once it holds this many alerts
+SCORE_CARRY = 0.5  # fraction of inherited parent fitness kept by a new generation
+EVOLVE_MIN_ALERTS = 50  # evolve once this many alerts were scored
+EVOLVE_CONVERGENCE_ALERTS = 10  # ...or once fitness converged after this many alerts
+EVOLVE_CONVERGENCE_TOL = 1e-3  # relative mean-score drift treated as converged
+EVOLVE_MIN_INTERVAL = 1.0  # never evolve more often than this (seconds)
+EVOLVE_MAX_INTERVAL = 120.0  # evolve at least this often while alerts arrive (seconds)
+TOURNAMENT_SIZE = 3  # contenders per parent draw during evolution
+EVOLUTION_SEED: Optional[int] = None  # seed for the evolution RNG (None = entropy)
+BRACKET_INTRABAR_RULE = "stop_first"  # which level fills when one candle touches both
+ANALYTICS_WINDOWS = {"1h": 3600, "1d": 86400}  # rolling trade-analytics windows (seconds)
+PATTERN_RECENT_BARS = 30  # confirmed chart patterns this recent feed genomes and bot filters
+PATTERN_BREAKOUT_BARS = 240  # pattern setups without a breakout this long are dropped
+PATTERN_SIGNALS_KEEP = 50  # confirmed pattern signals kept per symbol
+VOLUME_PROFILE_WINDOW = 3600  # rolling volume-at-price window (seconds)
+VOLUME_PROFILE_SESSION_HOUR = 22  # UTC hour at which a session volume profile starts
+VOLUME_PROFILE_VALUE_AREA = 0.7  # share of volume inside the value area
+VOLUME_PROFILE_BIN_FRACTION = 2e-4  # price bin width, as a fraction of the first price seen
+VALUE_AREA_SNAP = (0.5, 2.0)  # value-area stops/targets replace genome ones within this distance ratio
+# candle history files (CSV/Parquet/binary) seeded at startup, os.pathsep separated
+SEED_CANDLE_PATHS = [path for path in os.environ.get("MUTATING_SEED_CANDLES", "").split(os.pathsep) if path]
+# the only directory /admin/seed may read candle files from (empty = HTTP seeding off)
+SEED_CANDLE_DIR = os.environ.get("MUTATING_SEED_DIR", "")
+# raw tick/alert capture log directory, written by the server's single/writer process (empty = capture off)
+CAPTURE_DIR = os.environ.get("MUTATING_CAPTURE_DIR", "captures")
+CAPTURE_MAGIC = b"MCCAPT01"
+# append-only memory-mapped archive for candles older than the hot ring (empty = archive off)
+CANDLE_ARCHIVE_DIR = os.environ.get("MUTATING_CANDLE_ARCHIVE", "")
+CANDLE_ARCHIVE_RECHECK = 1.0  # seconds a reader trusts "no archived series" for a symbol
+CAPTURE_ROTATE_BYTES = 64 * 1024 * 1024  # start a new capture file past this size
+CAPTURE_KEEP_FILES = 48  # older capture files are deleted
+CAPTURE_FLUSH_SECONDS = 0.25  # writer thread drain interval
+CAPTURE_BUFFER_MAX = 1_000_000  # events buffered before new ones are dropped
+# process role: "single" (everything in one process), "writer" (ingest, engines
+# and snapshot publishing) or "reader" (read endpoints served from the snapshot)
+PROCESS_ROLE = os.environ.get("MUTATING_ROLE", "single")
+SNAPSHOT_PATH = os.environ.get(
+    "MUTATING_SNAPSHOT_PATH", "/dev/shm/mutating_snapshot.bin" if os.path.isdir("/dev/shm") else "mutating_snapshot.bin"
+)
+WRITER_URL = os.environ.get("MUTATING_WRITER_URL", "")  # readers redirect writes here
+SNAPSHOT_MAGIC = b"MCSNAP01"
+SNAPSHOT_CAPACITY = 16 * 1024 * 1024  # initial payload capacity (grows by remapping)
+SNAPSHOT_INTERVAL = 0.05  # seconds between snapshot publishes while state changes
+SNAPSHOT_REFRESH_SECONDS = 1.0  # per-tick snapshot entries (ingest counters, volume profiles) rebuilt at most this often
+SNAPSHOT_LIST_LIMIT = 500  # signals/paper trades included per engine
+SNAPSHOT_READ_RETRIES = 100  # torn reads retried before serving the last good copy
+CANDLE_QUERY_MAX_POINTS = 5000  # most rows one /candles response may carry
 # ----------------------------
 
 # ---------- Data stores ----------
@@ -55,24 +118,27 @@ SCALP_MAX_SECONDS = 60 * 5  # treat as scalp if genome.scalp_window <= this
 candles: Dict[str, deque] = {}
 # raw alert history (recent)
 alerts_log: deque = deque(maxlen=2000)
-# paper trades list
-paper_trades: List[Dict[str, Any]] = []
+# trade ids are unique across engines
 trade_id_counter = itertools.count(1)
 
-# genome population
-population: List[Dict[str, Any]] = []
-pop_scores: List[float] = []
-generation = 0
+# genome population: an immutable snapshot swapped atomically by evolution
+class PopulationSnapshot(NamedTuple):
+    genomes: Sequence[Dict[str, Any]]  # genome dicts (a GenomeRows view decodes them on access)
+    matrix: np.ndarray  # same genomes as a batched-evolution matrix
+    scores: np.ndarray  # running fitness, updated in place by alerts
+    generation: int
+    lineage: Optional[np.ndarray] = None  # parent rows in the previous generation (see next_generation)
 
-# bot registry
-bots: Dict[str, Dict[str, Any]] = {}
-bot_state: Dict[str, Dict[str, Any]] = {}
 
-# engine runtime state / settings
+# per-engine settings, copied into every ``Engine``
+DEFAULT_ENGINE = "default"
+MARKED_READ_MODELS = frozenset({"status", "bots", "settings"})  # read models showing unrealized PnL
 ENGINE_MODES = {"alerts", "paper", "live"}
-engine_settings: Dict[str, Any] = {
+ENGINE_SETTINGS_DEFAULTS: Dict[str, Any] = {
     "execution_mode": "alerts",
     "risk_cap": 400.0,
+    "max_drawdown": 0.0,  # halt when marked equity falls this far below its peak (0 = off)
+    "coalesce_ms": 0.0,  # window for batching same symbol/side alerts (0 = off)
     "min_contracts": 1,
     "max_contracts": 5,
     "show_signals": True,
@@ -82,79 +148,19 @@ engine_settings: Dict[str, Any] = {
     "time_in_force": "Day",
 }
 
-open_trades: List[Dict[str, Any]] = []
-signal_log: deque = deque(maxlen=500)
-generation_stats: Dict[str, Any] = {
-    "generation": 0,
-    "realized": 0.0,
-    "min_equity": 0.0,
-    "wins": 0,
-    "losses": 0,
-}
-
-
-background_task: Optional[asyncio.Task] = None
-
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    global background_task
-    init_population()
-    init_default_bots()
-    background_task = asyncio.create_task(evolve_loop())
-    try:
-        yield
-    finally:
-        if background_task:
-            background_task.cancel()
-            with suppress(asyncio.CancelledError):
-                await background_task
-            background_task = None
-
-
-app = FastAPI(title="Mutating Confirmation Trader (prototype)", lifespan=lifespan)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173", "http://127.0.0.1:5173"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 
-# ---------- Bot models & helpers ----------
-class BotConfigModel(BaseModel):
-    name: str = Field(..., pattern=r"^[a-zA-Z0-9_\-]+$")
-    symbol: str = SYMBOL_DEFAULT
-    capital: float = Field(PAPER_CAPITAL, gt=0)
-    risk_fraction: float = Field(0.01, gt=0, le=1)
-    max_size: float = Field(10.0, gt=0)
-    leverage: float = Field(1.0, gt=0)
-    min_size: float = Field(0.01, gt=0)
-    mode: Literal["auto", "scalp_only", "swing_only"] = "auto"
-    side_bias: Literal["both", "long", "short"] = "both"
-    active: bool = True
-    description: Optional[str] = None
+# bumped on every engine mutation visible through the read endpoints
+state_version = 0
 
 
-class BotToggleModel(BaseModel):
-    active: bool
+def touch_state() -> int:
+    global state_version
+    state_version += 1
+    return state_version
 
 
-class EngineSettingsPatch(BaseModel):
-    execution_mode: Optional[Literal["alerts", "paper", "live"]] = None
-    risk_cap: Optional[float] = Field(default=None, ge=0)
-    min_contracts: Optional[int] = Field(default=None, ge=0)
-    max_contracts: Optional[int] = Field(default=None, ge=0)
-    show_signals: Optional[bool] = None
-    live_account_id: Optional[str] = None
-    live_contract_id: Optional[str] = None
-    live_endpoint: Optional[str] = None
-    time_in_force: Optional[str] = None
-
-
-ENGINE_SETTING_KEYS = set(engine_settings.keys())
+# ---------- Settings & bot helpers ----------
+ENGINE_SETTING_KEYS = set(ENGINE_SETTINGS_DEFAULTS.keys())
 
 
 def safe_json_parse(payload: str) -> Any:
@@ -166,75 +172,10 @@ def safe_json_parse(payload: str) -> Any:
         return payload
 
 
-def update_engine_settings(update: Dict[str, Any]) -> Dict[str, Any]:
-    if not update:
-        return dict(engine_settings)
-    for key, value in update.items():
-        if key not in ENGINE_SETTING_KEYS:
-            continue
-        if key in {"min_contracts", "max_contracts"}:
-            if value is None:
-                continue
-            try:
-                numeric = int(value)
-            except (TypeError, ValueError):
-                continue
-            engine_settings[key] = max(0, numeric)
-            continue
-        if key == "risk_cap":
-            if value is None:
-                engine_settings[key] = 0.0
-            else:
-                try:
-                    engine_settings[key] = max(0.0, float(value))
-                except (TypeError, ValueError):
-                    continue
-            continue
-        if key == "execution_mode":
-            if value in ENGINE_MODES:
-                engine_settings[key] = value
-            continue
-        if key == "show_signals":
-            engine_settings[key] = bool(value)
-            continue
-        if key in {"live_account_id", "live_contract_id", "live_endpoint", "time_in_force"}:
-            if value is None:
-                engine_settings[key] = None
-            else:
-                text = str(value).strip()
-                engine_settings[key] = text or None
-            continue
-        engine_settings[key] = value
-
-    min_contracts = int(engine_settings.get("min_contracts", 0) or 0)
-    max_contracts = int(engine_settings.get("max_contracts", min_contracts) or min_contracts)
-    if max_contracts < min_contracts:
-        max_contracts = min_contracts
-    engine_settings["min_contracts"] = max(0, min_contracts)
-    engine_settings["max_contracts"] = max(engine_settings["min_contracts"], max_contracts)
-
-    tif = engine_settings.get("time_in_force")
-    if isinstance(tif, str):
-        stripped = tif.strip()
-        engine_settings["time_in_force"] = stripped or "Day"
-    else:
-        engine_settings["time_in_force"] = "Day"
-
-    return dict(engine_settings)
-
+def dispatch_live_order(payload: Dict[str, Any], endpoint: str) -> Dict[str, Any]:
+    import urllib.error
+    import urllib.request
 
-def engine_snapshot() -> Dict[str, Any]:
-    open_only = [trade for trade in open_trades if trade.get("status") == "open"]
-    return {
-        "settings": dict(engine_settings),
-        "stats": dict(generation_stats),
-        "halted": should_halt_trading(),
-        "open_trades": open_only,
-    }
-
-
-def dispatch_live_order(payload: Dict[str, Any]) -> Dict[str, Any]:
-    endpoint = engine_settings.get("live_endpoint") or ""
     endpoint = endpoint.strip()
     if not endpoint:
         return {"status": "skipped", "reason": "missing_endpoint"}
@@ -264,172 +205,397 @@ def dispatch_live_order(payload: Dict[str, Any]) -> Dict[str, Any]:
     except Exception as exc:  # noqa: BLE001
         return {"status": "error", "error": str(exc)}
 
-DEFAULT_BOTS = [
-    BotConfigModel(
-        name="momentum_scalper",
-        symbol=SYMBOL_DEFAULT,
-        capital=60_000.0,
-        risk_fraction=0.0075,
-        max_size=6.0,
-        leverage=1.0,
-        min_size=0.01,
-        mode="scalp_only",
-        side_bias="both",
-        description="Takes only scalp-qualified confirmations with 0.75% risk."
-    ),
-    BotConfigModel(
-        name="swing_confirmer",
-        symbol=SYMBOL_DEFAULT,
-        capital=120_000.0,
-        risk_fraction=0.0125,
-        max_size=3.5,
-        leverage=1.0,
-        min_size=0.01,
-        mode="swing_only",
-        side_bias="both",
-        description="Waits for higher-confidence (non-scalp) confirmations."
-    ),
+BOT_DEFAULTS: Dict[str, Any] = {
+    "symbol": SYMBOL_DEFAULT,
+    "capital": PAPER_CAPITAL,
+    "risk_fraction": 0.01,
+    "max_size": 10.0,
+    "leverage": 1.0,
+    "min_size": 0.01,
+    "mode": "auto",
+    "side_bias": "both",
+    "active": True,
+    "description": None,
+}
+
+DEFAULT_BOTS: List[Dict[str, Any]] = [
+    {
+        "name": "momentum_scalper",
+        "symbol": SYMBOL_DEFAULT,
+        "capital": 60_000.0,
+        "risk_fraction": 0.0075,
+        "max_size": 6.0,
+        "leverage": 1.0,
+        "min_size": 0.01,
+        "mode": "scalp_only",
+        "side_bias": "both",
+        "description": "Takes only scalp-qualified confirmations with 0.75% risk.",
+    },
+    {
+        "name": "swing_confirmer",
+        "symbol": SYMBOL_DEFAULT,
+        "capital": 120_000.0,
+        "risk_fraction": 0.0125,
+        "max_size": 3.5,
+        "leverage": 1.0,
+        "min_size": 0.01,
+        "mode": "swing_only",
+        "side_bias": "both",
+        "description": "Waits for higher-confidence (non-scalp) confirmations.",
+    },
 ]
 
 
-def register_bot(config: BotConfigModel) -> Dict[str, Any]:
-    """Insert or replace a bot configuration and ensure state tracking."""
-    record = config.dict()
-    bots[record["name"]] = record
-    state = bot_state.setdefault(record["name"], {})
-    state.setdefault("trades", [])
-    state.setdefault("realized_pnl", 0.0)
-    state.setdefault("last_trade_ts", None)
-    state.setdefault("wins", 0)
-    state.setdefault("losses", 0)
-    return record
+# ---------- Bot routing index ----------
+class BotRoute(NamedTuple):
+    """Active bots eligible for one (symbol, scalp/swing, side) combination."""
+
+    names: List[str]
+    risk_capital: np.ndarray  # capital * risk_fraction * leverage
+    max_size: np.ndarray
+    min_size: np.ndarray
+    filtered: np.ndarray  # bot has an algo filter checked by bot_allows_trade
+
+
+BOT_MODE_STYLES = {"auto": ("scalp", "swing"), "scalp_only": ("scalp",), "swing_only": ("swing",)}
+BOT_BIAS_SIDES = {"both": ("buy", "sell"), "long": ("buy",), "short": ("sell",)}
+
+# ---------- Mark-to-market portfolio ----------
+class PositionAggregate:
+    """Net open exposure for one symbol (or one bot on one symbol).
+
+    ``exposure`` is the signed sum of ``size * tickValue`` and ``cost`` the
+    same weighted by entry price, so unrealized PnL at any mark is
+    ``price * exposure - cost`` and every fill/close is an O(1) update.
+    """
+
+    __slots__ = ("net_size", "exposure", "cost", "tick_value", "open_count")
+
+    def __init__(self) -> None:
+        self.net_size = 0.0
+        self.exposure = 0.0
+        self.cost = 0.0
+        self.tick_value = 1.0
+        self.open_count = 0
+
+    def apply(self, signed_size: float, tick_value: float, entry: float, direction: int) -> None:
+        """Add (``direction=1``) or remove (``direction=-1``) one trade."""
+        self.open_count += direction
+        if self.open_count <= 0:
+            self.open_count = 0
+            self.net_size = self.exposure = self.cost = 0.0
+            return
+        self.net_size += direction * signed_size
+        self.exposure += direction * signed_size * tick_value
+        self.cost += direction * signed_size * tick_value * entry
+        self.tick_value = tick_value
+
+    @property
+    def vwap_entry(self) -> Optional[float]:
+        if self.net_size == 0:
+            return None
+        return self.cost / self.exposure if self.exposure else None
+
+    def unrealized(self, price: Optional[float]) -> float:
+        if price is None or not self.open_count:
+            return 0.0
+        return price * self.exposure - self.cost
+
+    def describe(self, price: Optional[float]) -> Dict[str, Any]:
+        return {
+            "net_size": self.net_size,
+            "vwap_entry": self.vwap_entry,
+            "tick_value": self.tick_value,
+            "open_trades": self.open_count,
+            "mark": price,
+            "unrealized": self.unrealized(price),
+        }
 
 
-def init_default_bots() -> None:
-    for bot in DEFAULT_BOTS:
-        register_bot(bot)
+class Portfolio:
+    """Incrementally maintained positions, marks, equity and drawdown.
+
+    Trades enter through :meth:`open`, leave through :meth:`close` and each
+    tick calls :meth:`mark`; none of these scan the trade list.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.symbols: Dict[str, PositionAggregate] = {}
+        self.bots: Dict[str, Dict[str, PositionAggregate]] = {}
+        self.marks: Dict[str, float] = {}
+        self._symbol_unrealized: Dict[str, float] = {}
+        self.unrealized = 0.0
+        self.realized = 0.0
+        self.high_water = 0.0
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+
+    @property
+    def equity(self) -> float:
+        return self.realized + self.unrealized
+
+    def _apply(self, trade: Dict[str, Any], direction: int) -> None:
+        symbol = trade.get("symbol")
+        meta = trade.get("meta") or {}
+        signed = float(trade["size"]) * (1 if trade.get("side") == "buy" else -1)
+        tick_value = float(meta.get("tickValue", 1.0))
+        entry = float(trade["entry"])
+        self.symbols.setdefault(symbol, PositionAggregate()).apply(signed, tick_value, entry, direction)
+        bot_id = meta.get("bot")
+        if bot_id:
+            self.bots.setdefault(bot_id, {}).setdefault(symbol, PositionAggregate()).apply(
+                signed, tick_value, entry, direction
+            )
+        self.marks.setdefault(symbol, entry)
+        self._remark(symbol)
+
+    def open(self, trade: Dict[str, Any]) -> None:
+        self._apply(trade, 1)
+
+    def close(self, trade: Dict[str, Any], pnl: float) -> None:
+        self.realized += pnl
+        self._apply(trade, -1)
+
+    def mark(self, symbol: str, price: float) -> None:
+        self.marks[symbol] = price
+        if symbol in self.symbols:
+            self._remark(symbol)
+
+    def _remark(self, symbol: str) -> None:
+        position = self.symbols.get(symbol)
+        value = position.unrealized(self.marks.get(symbol)) if position else 0.0
+        self.unrealized += value - self._symbol_unrealized.get(symbol, 0.0)
+        self._symbol_unrealized[symbol] = value
+        equity = self.equity
+        if equity > self.high_water:
+            self.high_water = equity
+        self.drawdown = self.high_water - equity
+        if self.drawdown > self.max_drawdown:
+            self.max_drawdown = self.drawdown
+
+    def bot_unrealized(self, bot_id: str) -> float:
+        return sum(pos.unrealized(self.marks.get(sym)) for sym, pos in self.bots.get(bot_id, {}).items())
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "realized": self.realized,
+            "unrealized": self.unrealized,
+            "equity": self.equity,
+            "high_water": self.high_water,
+            "drawdown": self.drawdown,
+            "max_drawdown": self.max_drawdown,
+            "positions": {
+                sym: pos.describe(self.marks.get(sym)) for sym, pos in self.symbols.items() if pos.open_count
+            },
+        }
 
 
-# ---------- Engine helpers ----------
-def clamp_contracts(size: float) -> float:
-    if size is None:
-        return 0.0
-    numeric = abs(float(size))
-    floor = max(1, int(engine_settings.get("min_contracts") or 1))
-    cap = max(floor, int(engine_settings.get("max_contracts") or floor))
-    if numeric <= 0:
-        return 0.0
-    return float(min(max(numeric, floor), cap))
+# ---------- Streaming trade analytics ----------
+def performance_summary(
+    trades: int, wins: int, pnl: float, gross_win: float, gross_loss: float, variance: float, hold: float
+) -> Dict[str, Any]:
+    if not trades:
+        return {"trades": 0}
+    expectancy = pnl / trades
+    std = math.sqrt(variance) if variance > 0 else 0.0
+    return {
+        "trades": trades,
+        "wins": wins,
+        "losses": trades - wins,
+        "win_rate": wins / trades,
+        "pnl": pnl,
+        "expectancy": expectancy,
+        "profit_factor": gross_win / gross_loss if gross_loss > 0 else None,
+        "sharpe": expectancy / std if std > 0 else None,  # per trade, not annualized
+        "avg_hold_s": hold / trades,
+    }
 
 
-def is_finite(value: Any) -> bool:
-    return isinstance(value, (int, float)) and math.isfinite(value)
+class TradeStats:
+    """All-time performance of one slice of closed trades.
 
+    Each close is an O(1) update: Welford mean/variance of per-trade PnL for
+    the Sharpe ratio, gross wins/losses for the profit factor and a running
+    realized-PnL peak for the max drawdown.
+    """
 
-def reset_generation_state() -> None:
-    generation_stats["generation"] = generation
-    generation_stats["realized"] = 0.0
-    generation_stats["min_equity"] = 0.0
-    generation_stats["wins"] = 0
-    generation_stats["losses"] = 0
+    __slots__ = ("trades", "wins", "pnl", "gross_win", "gross_loss", "mean", "m2", "hold", "peak", "max_drawdown", "last_ts")
 
+    def __init__(self) -> None:
+        self.trades = self.wins = 0
+        self.pnl = self.gross_win = self.gross_loss = self.mean = self.m2 = self.hold = 0.0
+        self.peak = self.max_drawdown = 0.0
+        self.last_ts: Optional[int] = None
 
-def should_halt_trading() -> bool:
-    try:
-        cap = float(engine_settings.get("risk_cap", 0))
-    except (TypeError, ValueError):
-        cap = 0.0
-    if cap <= 0:
-        return False
-    return generation_stats.get("realized", 0.0) <= -abs(cap)
-
-
-def record_signal(event: Dict[str, Any]) -> None:
-    if not engine_settings.get("show_signals", True):
-        return
-    event = dict(event)
-    event.setdefault("ts", now_s())
-    signal_log.append(event)
-
-
-def register_open_trade(trade: Dict[str, Any]) -> None:
-    open_trades.append(trade)
-
-
-def record_trade_close(trade: Dict[str, Any], exit_price: float, exit_reason: str) -> None:
-    if trade.get("status") == "closed":
-        return
-    trade["status"] = "closed"
-    trade["exit"] = exit_price
-    trade["exit_reason"] = exit_reason
-    trade["exit_ts"] = now_s()
-    side_multiplier = 1 if trade.get("side") == "buy" else -1
-    tick_value = float(trade.get("meta", {}).get("tickValue", 1.0))
-    pnl = (exit_price - trade["entry"]) * side_multiplier * trade["size"] * tick_value
-    trade["pnl"] = pnl
-
-    generation_stats["realized"] += pnl
-    generation_stats["min_equity"] = min(generation_stats["min_equity"], generation_stats["realized"])
-
-    bot_id = trade.get("meta", {}).get("bot")
-    if bot_id:
-        state = bot_state.setdefault(bot_id, {})
-        state.setdefault("realized_pnl", 0.0)
-        state.setdefault("wins", 0)
-        state.setdefault("losses", 0)
-        state.setdefault("last_trade_ts", trade.get("exit_ts"))
-        state["realized_pnl"] += pnl
+    def add(self, pnl: float, hold: float, ts: int) -> None:
+        self.trades += 1
+        if pnl >= 0:
+            self.wins += 1
+            self.gross_win += pnl
+        else:
+            self.gross_loss -= pnl
+        self.pnl += pnl
+        delta = pnl - self.mean
+        self.mean += delta / self.trades
+        self.m2 += delta * (pnl - self.mean)
+        self.hold += hold
+        self.peak = max(self.peak, self.pnl)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.pnl)
+        self.last_ts = ts
+
+    def describe(self) -> Dict[str, Any]:
+        variance = self.m2 / (self.trades - 1) if self.trades > 1 else 0.0
+        summary = performance_summary(
+            self.trades, self.wins, self.pnl, self.gross_win, self.gross_loss, variance, self.hold
+        )
+        if self.trades:
+            summary["max_drawdown"] = self.max_drawdown
+            summary["last_trade_ts"] = self.last_ts
+        return summary
+
+
+class RollingTradeStats:
+    """Performance of the trades closed in the last ``window`` seconds.
+
+    Closes are appended and expired from the front with their contribution
+    subtracted, so upkeep is amortized O(1) per trade. Max drawdown is not
+    decomposable that way and is only kept by :class:`TradeStats`.
+    """
+
+    __slots__ = ("window", "entries", "trades", "wins", "pnl", "gross_win", "gross_loss", "sum_sq", "hold")
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self.entries: deque = deque()
+        self._clear()
+
+    def _clear(self) -> None:
+        self.trades = self.wins = 0
+        self.pnl = self.gross_win = self.gross_loss = self.sum_sq = self.hold = 0.0
+
+    def _apply(self, pnl: float, hold: float, sign: int) -> None:
+        self.trades += sign
+        self.pnl += sign * pnl
+        self.sum_sq += sign * pnl * pnl
+        self.hold += sign * hold
         if pnl >= 0:
-            state["wins"] = state.get("wins", 0) + 1
-            generation_stats["wins"] += 1
+            self.wins += sign
+            self.gross_win += sign * pnl
         else:
-            state["losses"] = state.get("losses", 0) + 1
-            generation_stats["losses"] += 1
-        state["last_trade_ts"] = trade.get("exit_ts")
+            self.gross_loss -= sign * pnl
+
+    def add(self, pnl: float, hold: float, ts: int) -> None:
+        self.entries.append((ts, pnl, hold))
+        self._apply(pnl, hold, 1)
+        self.expire(ts)
+
+    def expire(self, now: float) -> None:
+        cutoff = now - self.window
+        entries = self.entries
+        while entries and entries[0][0] <= cutoff:
+            _, pnl, hold = entries.popleft()
+            self._apply(pnl, hold, -1)
+        if not entries:
+            self._clear()  # drop accumulated float drift
+
+    def describe(self, now: float) -> Dict[str, Any]:
+        self.expire(now)
+        trades = self.trades
+        variance = max(0.0, (self.sum_sq - self.pnl * self.pnl / trades) / (trades - 1)) if trades > 1 else 0.0
+        return performance_summary(trades, self.wins, self.pnl, self.gross_win, self.gross_loss, variance, self.hold)
+
+
+class TradeAnalytics:
+    """Closed-trade performance for one engine, sliced by bot, genome
+    (:func:`genome_id`), symbol and scalp/swing style, all time and over the
+    rolling ``ANALYTICS_WINDOWS``. Fed by ``Engine.record_trade_close``."""
+
+    GROUPS = {"bot": "bots", "genome": "genomes", "symbol": "symbols", "style": "styles"}
+
+    def __init__(self, windows: Optional[Mapping[str, float]] = None) -> None:
+        self.windows = dict(ANALYTICS_WINDOWS if windows is None else windows)
+        self.totals: Dict[tuple[str, str], TradeStats] = {}
+        self.rolling: Dict[tuple[str, str], List[RollingTradeStats]] = {}
+        self.genomes: Dict[str, Dict[str, Any]] = {}  # genome id -> latest index/generation
+
+    def record(self, trade: Mapping[str, Any], pnl: float) -> None:
+        meta = trade.get("meta") or {}
+        ts = int(trade.get("exit_ts") or now_s())
+        hold = float(max(0, ts - int(trade.get("ts") or ts)))
+        keys = [("engine", "all"), ("symbol", str(trade.get("symbol")))]
+        if "is_scalp" in meta:
+            keys.append(("style", "scalp" if meta["is_scalp"] else "swing"))
+        if meta.get("bot"):
+            keys.append(("bot", meta["bot"]))
+        gid = meta.get("genome_id")
+        if gid:
+            keys.append(("genome", gid))
+            self.genomes[gid] = {"index": meta.get("genome"), "generation": meta.get("generation")}
+        for key in keys:
+            total = self.totals.get(key)
+            if total is None:
+                total = self.totals[key] = TradeStats()
+                self.rolling[key] = [RollingTradeStats(seconds) for seconds in self.windows.values()]
+            total.add(pnl, hold, ts)
+            for stats in self.rolling[key]:
+                stats.add(pnl, hold, ts)
+
+    def window_counts(self, now: float) -> tuple[int, ...]:
+        """Trades still inside each rolling window. Every close lands in the
+        engine slice, so this changes whenever any window's report ages."""
+        rolling = self.rolling.get(("engine", "all"), ())
+        for stats in rolling:
+            stats.expire(now)
+        return tuple(stats.trades for stats in rolling)
+
+    def describe_slice(self, key: tuple[str, str], now: Optional[float] = None) -> Dict[str, Any]:
+        total = self.totals.get(key)
+        if total is None:
+            return {"all": TradeStats().describe()}
+        now = now_s() if now is None else now
+        report = {"all": total.describe()}
+        for label, stats in zip(self.windows, self.rolling[key]):
+            report[label] = stats.describe(now)
+        return report
+
+    def describe(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = now_s() if now is None else now
+        report: Dict[str, Any] = {"windows": dict(self.windows), "engine": self.describe_slice(("engine", "all"), now)}
+        for group in self.GROUPS.values():
+            report[group] = {}
+        for key in self.totals:
+            kind, name = key
+            if kind in self.GROUPS:
+                report[self.GROUPS[kind]][name] = self.describe_slice(key, now)
+        for gid, labels in self.genomes.items():
+            report["genomes"][gid].update(labels)
+        return report
 
-    try:
-        open_trades.remove(trade)
-    except ValueError:
-        pass
-
-
-def evaluate_open_trades(symbol: str, price: float) -> None:
-    if not open_trades:
-        return
-    snapshot = list(open_trades)
-    for trade in snapshot:
-        if trade.get("symbol") != symbol or trade.get("status") != "open":
-            continue
-        side = trade.get("side")
-        sl = trade.get("sl")
-        tp = trade.get("tp")
-        if side == "buy":
-            if is_finite(sl) and price <= float(sl):
-                record_trade_close(trade, float(sl), "stop")
-                continue
-            if is_finite(tp) and price >= float(tp):
-                record_trade_close(trade, float(tp), "target")
-        elif side == "sell":
-            if is_finite(sl) and price >= float(sl):
-                record_trade_close(trade, float(sl), "stop")
-                continue
-            if is_finite(tp) and price <= float(tp):
-                record_trade_close(trade, float(tp), "target")
+
+# ---------- Engine helpers ----------
+def is_finite(value: Any) -> bool:
+    return isinstance(value, (int, float)) and math.isfinite(value)
 
 
 def bot_allows_trade(bot_cfg: Dict[str, Any], side: str, symbol: str) -> bool:
     algo = bot_cfg.get("algo")
     if algo == "sma_confluence":
-        df = get_candle_df(symbol, n=120)
-        if df.empty or len(df) < 40:
+        close = candle_arrays(symbol, n=120)["close"]
+        if len(close) < 40:
             return False
-        sma_fast = df["close"].rolling(10).mean().iloc[-1]
-        sma_slow = df["close"].rolling(40).mean().iloc[-1]
+        sma_fast = float(close[-10:].mean())
+        sma_slow = float(close[-40:].mean())
         if not (is_finite(sma_fast) and is_finite(sma_slow)):
             return False
         if side == "buy":
             return sma_fast > sma_slow
         return sma_fast < sma_slow
+    if algo == "pattern_confluence":
+        bias = pattern_features(symbol)["pattern_bias"]
+        return bias > 0 if side == "buy" else bias < 0
     return True
 
 
@@ -438,27 +604,73 @@ def now_s() -> int:
     return int(time.time())
 
 
+def engine_log(topic: str) -> "logging.Logger":
+    """Logger named ``mutating_confirmation.<topic>`` (``logging`` is imported
+    on first use, keeping it off the engine's import path)."""
+    import logging
+
+    return logging.getLogger(f"mutating_confirmation.{topic}")
+
+
 def ensure_symbol(symbol: str) -> None:
     if symbol not in candles:
-        candles[symbol] = deque(maxlen=5000)
+        candles[symbol] = deque(maxlen=CANDLE_HOT_BARS)
 
 
 def add_tick(symbol: str, price: float, size: float = 1, ts: Optional[int] = None) -> None:
-    ts = ts or now_s()
+    merge_candle_update(symbol, ts or now_s(), price, price, price, price, size)
+
+
+def merge_candle_update(symbol: str, ts: int, o: float, h: float, l: float, c: float, v: float) -> None:
+    """Fold a tick (or a run of collapsed ticks) into the candle for ``ts``."""
     ensure_symbol(symbol)
     bucket = ts - (ts % CANDLE_SECONDS)
     dq = candles[symbol]
     if not dq or dq[-1]["t"] != bucket:
-        dq.append({"t": bucket, "o": price, "h": price, "l": price, "c": price, "v": size})
+        if len(dq) == dq.maxlen and candle_archive.active:
+            candle_archive.retire(symbol, dq[0])
+        dq.append({"t": bucket, "o": o, "h": h, "l": l, "c": c, "v": v})
     else:
         candle = dq[-1]
-        candle["h"] = max(candle["h"], price)
-        candle["l"] = min(candle["l"], price)
-        candle["c"] = price
-        candle["v"] += size
+        candle["h"] = max(candle["h"], h)
+        candle["l"] = min(candle["l"], l)
+        candle["c"] = c
+        candle["v"] += v
+    profile_tick(symbol, ts, c, v)
+
+
+def apply_tick(symbol: str, ts: int, o: float, h: float, l: float, c: float, v: float) -> None:
+    """Apply one (possibly collapsed) tick to the shared candles, then to the
+    marks and open brackets of every engine."""
+    merge_candle_update(symbol, ts, o, h, l, c, v)
+    for target in list(engines.values()):
+        target.mark(symbol, h, l, c)
+
+
+CANDLE_COLUMNS = {"t": "t", "o": "open", "h": "high", "l": "low", "c": "close", "v": "vol"}
 
 
-def get_candle_df(symbol: str, n: Optional[int] = None) -> pd.DataFrame:
+def candle_arrays(symbol: str, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Last ``n`` candles of ``symbol`` as float arrays keyed by column name
+    (reaching into the archive when the hot ring holds fewer; ``None`` = the
+    whole ring)."""
+    ensure_symbol(symbol)
+    dq = candles[symbol]
+    if n and n > len(dq) and candle_archive.active:
+        history = candle_history(symbol, n=n)
+        return {name: np.asarray(history[key], dtype=float) for key, name in CANDLE_COLUMNS.items()}
+    start = max(0, len(dq) - n) if n else 0
+    recent = list(itertools.islice(dq, start, None))
+    return {
+        name: np.fromiter((row[key] for row in recent), dtype=float, count=len(recent))
+        for key, name in CANDLE_COLUMNS.items()
+    }
+
+
+def get_candle_df(symbol: str, n: Optional[int] = None) -> "pd.DataFrame":
+    # pandas is only needed by callers that explicitly want a DataFrame
+    import pandas as pd
+
     ensure_symbol(symbol)
     dq = candles[symbol]
     if not dq:
@@ -469,94 +681,1872 @@ def get_candle_df(symbol: str, n: Optional[int] = None) -> pd.DataFrame:
     return df
 
 
-def atr(series_high: pd.Series, series_low: pd.Series, series_close: pd.Series, n: int = 14) -> float:
-    high = series_high
-    low = series_low
-    close = series_close
-    tr1 = high - low
-    tr2 = (high - close.shift(1)).abs()
-    tr3 = (low - close.shift(1)).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+def atr(series_high: Any, series_low: Any, series_close: Any, n: int = 14) -> float:
+    high = np.asarray(series_high, dtype=float)
+    low = np.asarray(series_low, dtype=float)
+    close = np.asarray(series_close, dtype=float)
+    if not len(high):
+        return 0.0
+    tr = high - low
+    prev_close = close[:-1]
+    tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)))
     if len(tr) >= n:
-        return float(tr.rolling(n).mean().iloc[-1])
-    return float(tr.mean()) if len(tr) else 0.0
+        return float(tr[-n:].mean())
+    return float(tr.mean())
+
+
+# ---------- Bracket resolution on candles ----------
+BRACKET_RULES = {"stop_first", "target_first", "nearest_open", "ohlc_path"}
+
+
+def _range_table(values: np.ndarray, reduce: Any) -> List[np.ndarray]:
+    """Sparse table: level ``k`` holds ``reduce`` over ``values[i : i + 2**k]``."""
+    table = [values]
+    span = 1
+    while span * 2 <= len(values):
+        prev = table[-1]
+        table.append(reduce(prev[:-span], prev[span:]))
+        span *= 2
+    return table
+
+
+def _first_crossing(table: List[np.ndarray], start: np.ndarray, end: np.ndarray, level: np.ndarray, above: bool) -> np.ndarray:
+    """Per row, the first bar in ``[start, end)`` at or beyond ``level``
+    (``high >= level`` when ``above``, else ``low <= level``), or ``end``.
+
+    Binary lifting over the sparse table: skip every power-of-two block that
+    stays short of the level, largest first, so each row costs O(log bars).
+    """
+    pos = start.copy()
+    for k in range(len(table) - 1, -1, -1):
+        span = 1 << k
+        fits = pos + span <= end
+        block = table[k][np.minimum(pos, len(table[k]) - 1)]
+        short = block < level if above else block > level
+        pos = np.where(fits & short, pos + span, pos)
+    return pos
+
+
+def resolve_brackets(
+    entry: Any,
+    side: Any,
+    sl: Any,
+    tp: Any,
+    opened_at: Any,
+    cols: Mapping[str, np.ndarray],
+    rule: Optional[str] = None,
+    max_bars: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """Resolve many stop/target brackets against candle columns at once.
+
+    ``side`` is ``"buy"``/``"sell"`` or +1/-1 per bracket; ``cols`` is shaped
+    like :func:`candle_arrays`. Bars that open at or after ``opened_at`` are
+    searched (at most ``max_bars`` of them). A bar that opens through a level
+    fills at its open; otherwise the level itself fills. ``rule`` settles bars
+    that touch both levels: ``stop_first`` (conservative), ``target_first``,
+    ``nearest_open`` (the level closer to the bar's open) or ``ohlc_path``
+    (open→low→high→close on up bars, open→high→low→close on down bars).
+
+    Returns ``bar`` (candle index, -1 while open), ``exit_ts``, ``exit``,
+    ``reason`` (``"stop"``, ``"target"`` or ``"open"``) and per-unit ``pnl``.
+    """
+    rule = rule or BRACKET_INTRABAR_RULE
+    if rule not in BRACKET_RULES:
+        raise ValueError(f"unknown intra-bar rule {rule!r}")
+    entry = np.asarray(entry, dtype=float)
+    side = np.asarray(side)
+    direction = np.where(side == "sell", -1, 1) if side.dtype.kind in "US" else np.sign(side).astype(int)
+    sl = np.broadcast_to(np.asarray(sl, dtype=float), entry.shape)
+    tp = np.broadcast_to(np.asarray(tp, dtype=float), entry.shape)
+    opened_at = np.broadcast_to(np.asarray(opened_at, dtype=float), entry.shape)
+    t = np.asarray(cols["t"], dtype=float)
+    o, h, l, c = (np.asarray(cols[key], dtype=float) for key in ("open", "high", "low", "close"))
+
+    n_bars = len(t)
+    empty = {"bar": np.full(entry.shape, -1), "exit_ts": np.full(entry.shape, np.nan), "exit": np.full(entry.shape, np.nan)}
+    if n_bars == 0 or entry.size == 0:
+        return {**empty, "reason": np.full(entry.shape, "open"), "pnl": np.full(entry.shape, np.nan)}
+
+    start = np.searchsorted(t, opened_at, side="left")
+    end = np.full(entry.shape, n_bars) if max_bars is None else np.minimum(start + max_bars, n_bars)
+    highs = _range_table(h, np.maximum)
+    lows = _range_table(l, np.minimum)
+    long = direction > 0
+    # a missing (NaN) level never triggers
+    stop_level = np.where(np.isfinite(sl), sl, np.where(long, -np.inf, np.inf))
+    target_level = np.where(np.isfinite(tp), tp, np.where(long, np.inf, -np.inf))
+    stop_bar = np.where(
+        long, _first_crossing(lows, start, end, stop_level, False), _first_crossing(highs, start, end, stop_level, True)
+    )
+    target_bar = np.where(
+        long, _first_crossing(highs, start, end, target_level, True), _first_crossing(lows, start, end, target_level, False)
+    )
 
-def random_genome() -> Dict[str, Any]:
+    bar = np.minimum(stop_bar, target_bar)
+    resolved = bar < end
+    safe = np.minimum(bar, n_bars - 1)
+    bar_open, bar_close = o[safe], c[safe]
+    both = resolved & (stop_bar == target_bar)
+    if rule == "stop_first":
+        target_wins = np.zeros(entry.shape, dtype=bool)
+    elif rule == "target_first":
+        target_wins = np.ones(entry.shape, dtype=bool)
+    elif rule == "nearest_open":
+        target_wins = np.abs(target_level - bar_open) < np.abs(stop_level - bar_open)
+    else:
+        # up bars visit the low first, down bars the high first
+        low_first = bar_close >= bar_open
+        target_wins = np.where(long, ~low_first, low_first)
+    # a bar that opens through a level settles the order whatever the rule
+    gap_stop = np.where(long, bar_open <= stop_level, bar_open >= stop_level)
+    gap_target = np.where(long, bar_open >= target_level, bar_open <= target_level)
+    target_wins = both & (gap_target | (~gap_stop & target_wins))
+    is_target = resolved & ((target_bar < stop_bar) | target_wins)
+    is_stop = resolved & ~is_target
+
+    level = np.where(is_target, target_level, stop_level)
+    gapped = np.where(is_target, gap_target, gap_stop)
+    exit_price = np.where(resolved, np.where(gapped, bar_open, level), np.nan)
     return {
-        "confirm_count": random.randint(1, 3),
-        "require_agreement_fraction": round(random.uniform(0.5, 0.9), 2),
-        "min_volume_mult": round(random.uniform(0.1, 3.0), 2),
-        "momentum_z": round(random.uniform(0.1, 2.0), 2),
-        "use_atr_sl": random.choice([True, False]),
-        "sl_mult": round(random.uniform(0.5, 3.0), 2),
-        "tp_mult": round(random.uniform(0.5, 6.0), 2),
-        "scalp_window": random.randint(30, 300),
-        "time_bias_start": random.randint(0, 23),
-        "time_bias_end": random.randint(0, 23),
-        "scalp_aggressiveness": round(random.uniform(0.1, 1.0), 2),
+        "bar": np.where(resolved, bar, -1),
+        "exit_ts": np.where(resolved, t[safe], np.nan),
+        "exit": exit_price,
+        "reason": np.where(is_target, "target", np.where(is_stop, "stop", "open")),
+        "pnl": (exit_price - entry) * direction,
     }
 
 
+# ---------- Bulk candle seeding ----------
+CANDLE_BINARY_MAGIC = b"MCCANDL1"
+SEED_COLUMN_ALIASES = {
+    "t": ("t", "ts", "time", "timestamp", "date", "datetime"),
+    "o": ("o", "open"),
+    "h": ("h", "high"),
+    "l": ("l", "low"),
+    "c": ("c", "close"),
+    "v": ("v", "vol", "volume"),
+}
+
+
+def encode_candle_binary(cols: Mapping[str, np.ndarray]) -> bytes:
+    """Candles in the raw columnar layout read by :func:`decode_candle_binary`.
+
+    Layout: 8-byte magic, little-endian uint64 row count, then the ``t``
+    (int64) and ``o h l c v`` (float64) columns back to back.
+    """
+    t = np.ascontiguousarray(cols["t"], dtype="<i8")
+    parts = [CANDLE_BINARY_MAGIC, np.uint64(len(t)).astype("<u8").tobytes(), t.tobytes()]
+    parts.extend(np.ascontiguousarray(cols[key], dtype="<f8").tobytes() for key in "ohlcv")
+    return b"".join(parts)
+
+
+def write_candle_binary(path: str, cols: Mapping[str, np.ndarray]) -> None:
+    with open(path, "wb") as fh:
+        fh.write(encode_candle_binary(cols))
+
+
+def read_candle_binary(path: str) -> Dict[str, np.ndarray]:
+    return decode_candle_binary(np.memmap(path, dtype=np.uint8, mode="r"), path)
+
+
+def decode_candle_binary(buffer: Any, source: str = "buffer") -> Dict[str, np.ndarray]:
+    raw = np.frombuffer(buffer, dtype=np.uint8) if not isinstance(buffer, np.ndarray) else buffer
+    if bytes(raw[:8]) != CANDLE_BINARY_MAGIC:
+        raise ValueError(f"{source}: not a candle binary file")
+    count = int(raw[8:16].view("<u8")[0])
+    if len(raw) < 16 + count * 8 * 6:
+        raise ValueError(f"{source}: truncated candle binary file")
+    body = raw[16 : 16 + count * 8 * 6]
+    cols = {"t": np.array(body[: count * 8].view("<i8"))}
+    for idx, key in enumerate("ohlcv", start=1):
+        cols[key] = np.array(body[idx * count * 8 : (idx + 1) * count * 8].view("<f8"))
+    return cols
+
+
+def _columns_from_table(table: Mapping[str, Any]) -> Dict[str, Any]:
+    lowered = {str(name).strip().lower(): name for name in table.keys()}
+    cols: Dict[str, Any] = {}
+    for key, aliases in SEED_COLUMN_ALIASES.items():
+        source = next((lowered[alias] for alias in aliases if alias in lowered), None)
+        if source is None:
+            if key == "v":
+                continue
+            raise ValueError(f"missing '{key}' column (accepted names: {', '.join(aliases)})")
+        cols[key] = table[source]
+    if "symbol" in lowered:
+        cols["symbol"] = table[lowered["symbol"]]
+    return cols
+
+
+def _timestamps_to_seconds(values: Any) -> np.ndarray:
+    arr = np.asarray(values)
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.astype("datetime64[s]").astype(np.int64)
+    if arr.dtype.kind in "OUS":
+        return np.asarray(arr, dtype="datetime64[s]").astype(np.int64)
+    seconds = arr.astype(float)
+    if len(seconds) and np.nanmax(np.abs(seconds)) > 1e11:  # epoch milliseconds
+        seconds = seconds / 1000.0
+    return np.floor(np.nan_to_num(seconds, nan=-1.0)).astype(np.int64)
+
+
+def read_candle_file(path: str, fmt: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """Read OHLCV history from CSV, Parquet or the raw binary layout.
+
+    Returns column arrays ``t o h l c v`` (plus ``symbol`` when the file has
+    one). CSV and Parquet go through pandas/pyarrow, imported on demand.
+    """
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt in {"bin", "mcc", "binary"}:
+        return read_candle_binary(path)
+    if fmt in {"parquet", "pq"}:
+        try:
+            import pyarrow.parquet as pq
+
+            arrow_table = pq.read_table(path)
+            table = {name: arrow_table.column(name).to_numpy() for name in arrow_table.column_names}
+        except ImportError:
+            import pandas as pd
+
+            frame = pd.read_parquet(path)
+            table = {name: frame[name].to_numpy() for name in frame.columns}
+    elif fmt in {"csv", "txt"}:
+        try:
+            import pandas as pd
+        except ImportError:
+            data = np.genfromtxt(path, delimiter=",", names=True, dtype=None, encoding="utf-8")
+            table = {name: np.atleast_1d(data[name]) for name in data.dtype.names}
+        else:
+            frame = pd.read_csv(path)
+            table = {name: frame[name].to_numpy() for name in frame.columns}
+    else:
+        raise ValueError(f"unsupported candle file format: {fmt!r}")
+    cols = _columns_from_table(table)
+    out = {"t": _timestamps_to_seconds(cols["t"])}
+    for key in "ohlc":
+        out[key] = np.asarray(cols[key], dtype=float)
+    out["v"] = np.asarray(cols["v"], dtype=float) if "v" in cols else np.zeros(len(out["t"]))
+    if "symbol" in cols:
+        out["symbol"] = np.asarray(cols["symbol"]).astype(str)
+    return out
+
+
+def clean_candle_columns(cols: Mapping[str, np.ndarray]) -> tuple[Dict[str, np.ndarray], int, int]:
+    """Validate, bucket, sort and de-duplicate candle columns.
+
+    Rows with non-finite prices, ``high``/``low`` that do not bracket open and
+    close, negative volume or non-positive timestamps are rejected. Timestamps
+    are floored to ``CANDLE_SECONDS``; for duplicate buckets the last row wins.
+    Returns ``(columns, rejected, duplicates)``.
+    """
+    t = np.asarray(cols["t"], dtype=np.int64)
+    o, h, l, c, v = (np.asarray(cols[key], dtype=float) for key in "ohlcv")
+    valid = (
+        (t > 0)
+        & np.isfinite(o) & np.isfinite(h) & np.isfinite(l) & np.isfinite(c) & np.isfinite(v)
+        & (h >= np.maximum(o, c)) & (l <= np.minimum(o, c)) & (v >= 0)
+    )
+    rejected = int(len(t) - valid.sum())
+    t = t[valid] - t[valid] % CANDLE_SECONDS
+    rows = np.flatnonzero(valid)
+    # last occurrence per bucket: unique over the reversed order, then sort by time
+    _, last_rev = np.unique(t[::-1], return_index=True)
+    keep = len(t) - 1 - last_rev
+    duplicates = int(len(t) - len(keep))
+    keep = keep[np.argsort(t[keep], kind="stable")]
+    cleaned = {"t": t[keep]}
+    for key, arr in zip("ohlcv", (o, h, l, c, v)):
+        cleaned[key] = arr[rows[keep]]
+    return cleaned, rejected, duplicates
+
+
+def seed_candles(symbol: str, cols: Mapping[str, np.ndarray], replace: bool = False) -> Dict[str, Any]:
+    """Load cleaned history into ``candles[symbol]``, rolling everything older
+    than the hot ring into the archive when it is on.
+
+    Unless ``replace`` is set, candles already in the store (built from live
+    ticks or archived) win over seeded rows for the same bucket.
+    """
+    cleaned, rejected, duplicates = clean_candle_columns(cols)
+    ensure_symbol(symbol)
+    dq = candles[symbol]
+    if dq and not replace:
+        live = candle_arrays(symbol)
+        live_t = live["t"].astype(np.int64)
+        fresh = ~np.isin(cleaned["t"], live_t)
+        merged = {key: np.concatenate([cleaned[key][fresh], live[CANDLE_COLUMNS[key]]]) for key in "ohlcv"}
+        merged["t"] = np.concatenate([cleaned["t"][fresh], live_t])
+        order = np.argsort(merged["t"], kind="stable")
+        cleaned = {key: arr[order] for key, arr in merged.items()}
+    archive = candle_archive.get(symbol, create=True)
+    if archive is not None:
+        cut = max(0, len(cleaned["t"]) - dq.maxlen)
+        if archive.refresh() and len(cleaned["t"]) and cleaned["t"][0] <= archive.last_t:
+            # reaches behind the archive tail: merge and rewrite (last row per bucket wins)
+            stored = archive.columns()
+            parts = (stored, cleaned) if replace else (cleaned, stored)
+            cleaned, _, _ = clean_candle_columns({key: np.concatenate([part[key] for part in parts]) for key in "tohlcv"})
+            cut = max(0, len(cleaned["t"]) - dq.maxlen)
+            archive.rewrite({key: arr[:cut] for key, arr in cleaned.items()})
+            candle_archive.stats["rewrites"] += 1
+        else:
+            candle_archive.stats["archived"] += archive.append({key: arr[:cut] for key, arr in cleaned.items()})
+        cleaned = {key: arr[cut:] for key, arr in cleaned.items()}
+    keep = slice(-dq.maxlen, None) if dq.maxlen else slice(None)
+    columns = [cleaned["t"][keep].tolist()] + [cleaned[key][keep].tolist() for key in "ohlcv"]
+    dq.clear()
+    dq.extend({"t": t, "o": o, "h": h, "l": l, "c": c, "v": v} for t, o, h, l, c, v in zip(*columns))
+    pattern_trackers.pop(symbol, None)  # rebuilt from the recent bars on the next pattern query
+    rebuild_volume_profile(symbol)
+    _snapshot_candles.pop(symbol, None)
+    snapshot_builder.forget(symbol)
+    touch_state()
+    # seeded bars may already show stops/targets of trades opened before them
+    resolved = sum(target.resolve_open_trades(symbol) for target in list(engines.values()))
+    return {
+        "symbol": symbol,
+        "loaded": len(columns[0]),
+        "rejected": rejected,
+        "duplicates": duplicates,
+        "total": len(dq),
+        "archived": archive.count if archive is not None else 0,
+        "resolved_trades": resolved,
+    }
+
+
+def read_seed_file(path: str, symbol: Optional[str] = None, fmt: Optional[str] = None) -> Dict[str, Dict[str, np.ndarray]]:
+    """Parse one seed file into columns per symbol, touching no engine state.
+
+    Files with a ``symbol`` column seed every symbol in them; otherwise
+    ``symbol`` (or the file name stem) names the series.
+    """
+    cols = read_candle_file(path, fmt)
+    symbols = cols.pop("symbol", None)
+    if symbols is None or symbol is not None:
+        return {symbol or os.path.splitext(os.path.basename(path))[0]: cols}
+    return {name: {key: arr[symbols == name] for key, arr in cols.items()} for name in np.unique(symbols).tolist()}
+
+
+def seed_symbols(parsed: Mapping[str, Mapping[str, np.ndarray]], replace: bool = False) -> List[Dict[str, Any]]:
+    return [seed_candles(name, cols, replace=replace) for name, cols in parsed.items()]
+
+
+def seed_candles_from_file(
+    path: str,
+    symbol: Optional[str] = None,
+    fmt: Optional[str] = None,
+    replace: bool = False,
+) -> List[Dict[str, Any]]:
+    """Seed one file (see :func:`read_seed_file` for how symbols are named)."""
+    return seed_symbols(read_seed_file(path, symbol, fmt), replace=replace)
+
+
+def seed_file_path(path: str, directory: Optional[str] = None) -> str:
+    """Resolve a client-supplied seed file name inside ``SEED_CANDLE_DIR``.
+
+    Raises ``PermissionError`` for anything resolving outside it (``..``,
+    absolute paths, symlinks out) or when HTTP seeding is off.
+    """
+    directory = SEED_CANDLE_DIR if directory is None else directory
+    if not directory:
+        raise PermissionError("seeding from files is disabled")
+    root = os.path.realpath(directory)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root or resolved == root:
+        raise PermissionError("seed files must be inside the seed directory")
+    return resolved
+
+
+def seed_candles_on_startup(paths: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    for path in SEED_CANDLE_PATHS if paths is None else paths:
+        try:
+            results.extend(seed_candles_from_file(path))
+        except (OSError, ValueError) as exc:
+            engine_log("seed").warning("skipped %s: %s", path, exc)
+    return results
+
+
+# ---------- Candle queries ----------
+TIMEFRAME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+def parse_timeframe(timeframe: Any) -> int:
+    """``"5m"``, ``"1h"``, ``"1d"`` or plain seconds, as a multiple of ``CANDLE_SECONDS``."""
+    text = str(timeframe).strip().lower()
+    try:
+        seconds = int(text) if text.isdigit() else int(text[:-1]) * TIMEFRAME_UNITS[text[-1:]]
+    except (KeyError, ValueError):
+        raise ValueError(f"unknown timeframe {timeframe!r}") from None
+    if seconds <= 0 or seconds % CANDLE_SECONDS:
+        raise ValueError(f"timeframe must be a positive multiple of {CANDLE_SECONDS}s")
+    return seconds
+
+
+def store_candle_columns(symbol: str) -> Dict[str, np.ndarray]:
+    """The candle store for ``symbol`` as ``t o h l c v`` columns (``t`` int64)."""
+    cols = candle_arrays(symbol)
+    out = {key: cols[name] for key, name in CANDLE_COLUMNS.items()}
+    out["t"] = out["t"].astype(np.int64)
+    return out
+
+
+def resample_candles(cols: Mapping[str, np.ndarray], seconds: int) -> Dict[str, np.ndarray]:
+    """Aggregate time-ordered candles into ``seconds`` buckets."""
+    t = np.asarray(cols["t"], dtype=np.int64)
+    if not len(t) or seconds == CANDLE_SECONDS:
+        return dict(cols)
+    bucket = t - t % seconds
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(t)] - 1
+    return {
+        "t": bucket[starts],
+        "o": cols["o"][starts],
+        "h": np.maximum.reduceat(cols["h"], starts),
+        "l": np.minimum.reduceat(cols["l"], starts),
+        "c": cols["c"][ends],
+        "v": np.add.reduceat(cols["v"], starts),
+    }
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: ``n_out`` indexes keeping the shape of ``y``."""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:n_out])
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # n_out - 2 buckets between the end points
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[: n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[: n - 1], edges[:-1]) / counts
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        cx, cy = (avg_x[i + 1], avg_y[i + 1]) if i + 1 < n_out - 2 else (x[n - 1], y[n - 1])
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(low: np.ndarray, high: np.ndarray, n_out: int) -> np.ndarray:
+    """Per equal-width bucket, the candles holding its lowest low and highest
+    high, in time order: at most ``n_out`` indexes, price envelope preserved."""
+    n = len(low)
+    if n_out >= n:
+        return np.arange(n)
+    width = -(-n // max(1, n_out // 2))
+    buckets = -(-n // width)
+    padded_low = np.full(buckets * width, np.inf)
+    padded_low[:n] = low
+    padded_high = np.full(buckets * width, -np.inf)
+    padded_high[:n] = high
+    offsets = np.arange(buckets) * width
+    lows = offsets + padded_low.reshape(buckets, width).argmin(axis=1)
+    highs = offsets + padded_high.reshape(buckets, width).argmax(axis=1)
+    return np.unique(np.concatenate([lows, highs]))
+
+
+def query_candles(
+    cols: Mapping[str, np.ndarray],
+    seconds: int = CANDLE_SECONDS,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    max_points: Optional[int] = None,
+    method: str = "lttb",
+) -> tuple[Dict[str, np.ndarray], int]:
+    """Slice ``[start, end]`` out of time-ordered candle columns, resample to
+    ``seconds`` and downsample to ``max_points`` rows (LTTB on closes, or
+    min/max envelope). Returns the columns and the row count before
+    downsampling."""
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"unknown downsampling method {method!r}")
+    t = np.asarray(cols["t"], dtype=np.int64)
+    lo = 0 if start is None else int(np.searchsorted(t, int(start) - int(start) % seconds, "left"))
+    hi = len(t) if end is None else int(np.searchsorted(t, int(end), "right"))
+    sliced = resample_candles({key: np.asarray(cols[key])[lo:hi] for key in "tohlcv"}, seconds)
+    total = len(sliced["t"])
+    if max_points and total > max_points:
+        if method == "lttb":
+            idx = lttb_indices(sliced["t"].astype(float), sliced["c"], max_points)
+        else:
+            idx = minmax_indices(sliced["l"], sliced["h"], max_points)
+        sliced = {key: arr[idx] for key, arr in sliced.items()}
+    return sliced, total
+
+
+# ---------- Tiered candle history ----------
+CANDLE_ARCHIVE_DTYPES = {"t": "<i8", "o": "<f8", "h": "<f8", "l": "<f8", "c": "<f8", "v": "<f8"}
+
+
+def empty_candle_columns() -> Dict[str, np.ndarray]:
+    return {key: np.empty(0, dtype=dtype) for key, dtype in CANDLE_ARCHIVE_DTYPES.items()}
+
+
+def time_slice(t: np.ndarray, start: Optional[int] = None, end: Optional[int] = None) -> tuple[int, int]:
+    """Row range of time-ordered ``t`` inside ``[start, end]``."""
+    lo = 0 if start is None else int(np.searchsorted(t, start, "left"))
+    hi = len(t) if end is None else int(np.searchsorted(t, end, "right"))
+    return lo, max(lo, hi)
+
+
+class CandleSeries:
+    """Cold candles of one symbol: append-only raw little-endian column files
+    (``t.i8``, ``o.f8`` ... ``v.f8``) in one directory, read through memory maps.
+
+    ``t`` is written after the price columns, so its length is the committed
+    row count: readers never see a timestamp without its prices, and columns
+    left longer by a writer that died mid-append are trimmed on open.
+    """
+
+    def __init__(self, directory: str, writable: bool = True) -> None:
+        self.directory = directory
+        self.writable = writable
+        self.count = 0
+        self.last_t: Optional[int] = None
+        self._files: Dict[str, Any] = {}
+        self._maps: Dict[str, np.ndarray] = {}
+        if writable:
+            os.makedirs(directory, exist_ok=True)
+            self._open()
+            self.count = min(self._size(key) for key in CANDLE_ARCHIVE_DTYPES)
+            for fh in self._files.values():
+                fh.truncate(self.count * 8)
+        self.refresh()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.{CANDLE_ARCHIVE_DTYPES[key][1:]}")
+
+    def _size(self, key: str) -> int:
+        try:
+            return os.path.getsize(self._path(key)) // 8
+        except OSError:
+            return 0
+
+    def _open(self) -> None:
+        self._files = {key: open(self._path(key), "ab", buffering=0) for key in CANDLE_ARCHIVE_DTYPES}
+
+    def refresh(self) -> int:
+        """Pick up rows appended since the last read (by this or another process)."""
+        if not self.writable:
+            self.count = self._size("t")
+        if self.count and len(self._maps.get("t", ())) != self.count:
+            self._maps = {
+                key: np.memmap(self._path(key), dtype=dtype, mode="r", shape=(self.count,))
+                for key, dtype in CANDLE_ARCHIVE_DTYPES.items()
+            }
+            self.last_t = int(self._maps["t"][-1])
+        return self.count
+
+    def columns(self, lo: int = 0, hi: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Rows ``lo:hi`` as read-only views of the mapped files."""
+        if not self.refresh():
+            return empty_candle_columns()
+        return {key: arr[lo:hi] for key, arr in self._maps.items()}
+
+    def locate(self, start: Optional[int] = None, end: Optional[int] = None) -> tuple[int, int]:
+        if not self.refresh():
+            return 0, 0
+        return time_slice(self._maps["t"], start, end)
+
+    def append(self, cols: Mapping[str, Any]) -> int:
+        """Append time-ordered rows newer than the last archived one."""
+        t = np.asarray(cols["t"], dtype="<i8")
+        keep = t > self.last_t if self.last_t is not None else np.ones(len(t), dtype=bool)
+        rows = int(keep.sum())
+        if not rows:
+            return 0
+        for key in "ohlcv":
+            self._files[key].write(np.asarray(cols[key], dtype="<f8")[keep].tobytes())
+        self._files["t"].write(t[keep].tobytes())
+        self.count += rows
+        self.last_t = int(t[keep][-1])
+        return rows
+
+    def rewrite(self, cols: Mapping[str, Any]) -> int:
+        """Replace the whole series (bulk loads reaching behind the archive tail)."""
+        self.close()
+        for key in CANDLE_ARCHIVE_DTYPES:  # ``t`` last, as in append
+            tmp = self._path(key) + ".tmp"
+            with open(tmp, "wb") as fh:
+                fh.write(np.asarray(cols[key], dtype=CANDLE_ARCHIVE_DTYPES[key]).tobytes())
+            os.replace(tmp, self._path(key))
+        self._open()
+        self.count = len(cols["t"])
+        self.last_t = None
+        self.refresh()
+        return self.count
+
+    def close(self) -> None:
+        for fh in self._files.values():
+            fh.close()
+        self._files = {}
+        self._maps = {}
+
+    def describe(self) -> Dict[str, Any]:
+        self.refresh()
+        return {
+            "rows": self.count,
+            "first": int(self._maps["t"][0]) if self.count else None,
+            "last": self.last_t if self.count else None,
+        }
+
+
+class CandleArchive:
+    """Cold tier of the candle store: candles rolled out of the in-memory ring
+    (``CANDLE_HOT_BARS`` per symbol), one :class:`CandleSeries` per symbol
+    under ``directory``. The writer process appends; reader workers open the
+    same files read-only."""
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = directory
+        self.active = False
+        self.writable = False
+        self.series: Dict[str, CandleSeries] = {}
+        self.missing: Dict[str, float] = {}  # symbol -> when no series was found
+        self.stats: Dict[str, int] = {"archived": 0, "rewrites": 0}
+
+    def start(self, directory: Optional[str] = None, writable: bool = True) -> bool:
+        """Open the archive; returns False when it is disabled."""
+        directory = directory or self.directory or CANDLE_ARCHIVE_DIR
+        if self.active or not directory:
+            return self.active
+        if writable:
+            os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.writable = writable
+        self.active = True
+        return True
+
+    def stop(self) -> None:
+        for series in self.series.values():
+            series.close()
+        self.series.clear()
+        self.missing.clear()
+        self.active = False
+
+    def get(self, symbol: str, create: bool = False) -> Optional[CandleSeries]:
+        """``symbol``'s series, or None when the archive is off or holds none
+        (``create`` starts one when the archive is writable)."""
+        if not self.active:
+            return None
+        series = self.series.get(symbol)
+        if series is None:
+            path = os.path.join(self.directory, quote(symbol, safe=""))
+            if not (create and self.writable):
+                # misses are cached: the writer creates every series itself, and
+                # readers look again only after CANDLE_ARCHIVE_RECHECK
+                now = time.monotonic()
+                checked = self.missing.get(symbol)
+                if checked is not None and (self.writable or now - checked < CANDLE_ARCHIVE_RECHECK):
+                    return None
+                if not os.path.isdir(path):
+                    self.missing[symbol] = now
+                    return None
+            self.missing.pop(symbol, None)
+            series = self.series[symbol] = CandleSeries(path, self.writable)
+        return series
+
+    def retire(self, symbol: str, candle: Mapping[str, Any]) -> None:
+        """Archive a candle leaving the hot ring."""
+        series = self.get(symbol, create=True)
+        if series is not None:
+            self.stats["archived"] += series.append({key: [candle[key]] for key in CANDLE_ARCHIVE_DTYPES})
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "directory": self.directory,
+            "symbols": {symbol: series.describe() for symbol, series in self.series.items()},
+            **self.stats,
+        }
+
+
+candle_archive = CandleArchive()
+
+
+def candle_history(
+    symbol: str,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    n: Optional[int] = None,
+    hot: Optional[Mapping[str, np.ndarray]] = None,
+) -> Dict[str, np.ndarray]:
+    """``symbol``'s candles across both tiers as time-ordered ``t o h l c v``
+    columns: those inside ``[start, end]``, then only the last ``n``.
+
+    ``hot`` stands in for the in-memory ring (reader workers pass the
+    snapshot's columns). A range lying wholly in the archive comes back as
+    zero-copy views of the mapped files; one reaching into the ring is a
+    single copy of just the selected rows.
+    """
+    if hot is None:
+        hot = store_candle_columns(symbol) if symbol in candles else empty_candle_columns()
+    hot_t = np.asarray(hot["t"], dtype=np.int64)
+    hot_lo, hot_hi = time_slice(hot_t, start, end)
+    series = candle_archive.get(symbol)
+    cold_lo = cold_hi = 0
+    if series is not None:
+        cold_end = end
+        if len(hot_t):  # rows the ring also holds are served from the ring
+            cold_end = int(hot_t[0]) - 1 if end is None else min(end, int(hot_t[0]) - 1)
+        cold_lo, cold_hi = series.locate(start, cold_end)
+    cold_rows, hot_rows = cold_hi - cold_lo, hot_hi - hot_lo
+    if n is not None and cold_rows + hot_rows > n:
+        skip = cold_rows + hot_rows - n
+        cold_lo += min(skip, cold_rows)
+        hot_lo += max(0, skip - cold_rows)
+        cold_rows, hot_rows = cold_hi - cold_lo, hot_hi - hot_lo
+    if not cold_rows:
+        out = {key: np.asarray(hot[key])[hot_lo:hot_hi] for key in CANDLE_ARCHIVE_DTYPES}
+        out["t"] = out["t"].astype(np.int64, copy=False)
+        return out
+    cold = series.columns(cold_lo, cold_hi)
+    if not hot_rows:
+        return cold
+    return {key: np.concatenate([cold[key], np.asarray(hot[key])[hot_lo:hot_hi]]) for key in CANDLE_ARCHIVE_DTYPES}
+
+
+# ---------- Chart patterns ----------
+# Incremental port of shared/patterns (profile.js, swingDetection.js and
+# patternDetectors.js): the same profiles, pivots and detector rules, but fed
+# one closed candle at a time instead of rescanning the whole history.
+PATTERN_PROFILES: Dict[str, Dict[str, float]] = {
+    "DEFAULT": {
+        "head_shoulder_diff_min": 0.003,
+        "head_shoulder_diff_max": 0.007,
+        "head_shoulder_volume_multiplier": 1.1,
+        "double_top_tolerance": 0.003,
+        "double_bottom_tolerance": 0.003,
+        "triangle_flat_tolerance": 0.002,
+        "triangle_rising_threshold": 0.0005,
+        "triangle_falling_threshold": 0.0005,
+        "flag_impulse_atr_multiple": 2,
+        "flag_impulse_window": 5,
+        "flag_pullback_depth_min": 0.3,
+        "flag_pullback_depth_max": 0.55,
+        "cup_min_bars": 20,
+        "cup_handle_retrace_max": 0.3,
+        "volume_spike_multiplier": 1.5,
+    },
+}
+PATTERN_PROFILES["NQ"] = {
+    **PATTERN_PROFILES["DEFAULT"],
+    "head_shoulder_diff_min": 0.003,
+    "head_shoulder_diff_max": 0.005,
+    "double_top_tolerance": 0.0025,
+    "double_bottom_tolerance": 0.0025,
+    "triangle_flat_tolerance": 0.0015,
+    "triangle_rising_threshold": 0.0007,
+    "triangle_falling_threshold": 0.0007,
+    "flag_impulse_atr_multiple": 2.1,
+    "volume_spike_multiplier": 1.6,
+}
+PATTERN_PROFILES["GC"] = {
+    **PATTERN_PROFILES["DEFAULT"],
+    "head_shoulder_diff_min": 0.002,
+    "head_shoulder_diff_max": 0.004,
+    "double_top_tolerance": 0.0015,
+    "double_bottom_tolerance": 0.0015,
+    "triangle_flat_tolerance": 0.001,
+    "triangle_rising_threshold": 0.0005,
+    "triangle_falling_threshold": 0.0005,
+    "flag_impulse_atr_multiple": 1.9,
+    "volume_spike_multiplier": 1.5,
+}
+PATTERN_SWING_BARS = 3  # candles on each side of a swing pivot
+PATTERN_ATR_LENGTH = 14
+PATTERN_VOLUME_LENGTH = 20
+
+
+def pattern_profile_name(symbol: str) -> str:
+    """``resolveSymbolProfile``: micro and full contracts share a profile."""
+    code = (symbol or "").upper()
+    if code.startswith(("MNQ", "NQ")):
+        return "NQ"
+    if code.startswith(("MGC", "GC")):
+        return "GC"
+    return "DEFAULT"
+
+
+def percent_difference(a: float, b: float) -> float:
+    return (a - b) / b if b else 0.0
+
+
+class PatternBar(NamedTuple):
+    index: int
+    t: int
+    h: float
+    l: float
+    c: float
+    v: float
+    atr: float  # EMA of true range up to and including this bar
+    volume_ma: Optional[float]  # SMA of volume, None until enough bars
+
+
+class PatternSetup(NamedTuple):
+    """A completed pattern shape waiting for its breakout candle."""
+
+    pattern: str
+    direction: str  # "bullish" breaks above ``level``, "bearish" below
+    level: float
+    atr_multiple: float
+    volume_multiple: float
+    start: int  # first bar index that may confirm
+    confidence: float
+    key_levels: Dict[str, float]
+    context: Dict[str, Any]
+
+
+class PatternTracker:
+    """Chart-pattern state for one symbol, advanced one closed candle at a time.
+
+    Swing pivots are confirmed ``PATTERN_SWING_BARS`` candles after they
+    form; each new pivot re-checks only the swing patterns ending on it, and
+    each close checks only the flag and cup windows that just completed.
+    Shapes that pass become :class:`PatternSetup` entries and are confirmed
+    by the first later candle that breaks their level, as in
+    ``findBreakAbove``/``findBreakBelow``.
+
+    Unlike the full rescan, setups left unconfirmed for
+    ``PATTERN_BREAKOUT_BARS`` candles are dropped, and a candle before the
+    volume average exists passes the volume check instead of borrowing the
+    latest average.
+    """
+
+    def __init__(self, symbol: str) -> None:
+        self.symbol = symbol
+        self.profile_name = pattern_profile_name(symbol)
+        self.profile = profile = PATTERN_PROFILES[self.profile_name]
+        span = max(2 * PATTERN_SWING_BARS + 1, int(profile["flag_impulse_window"]) + 7, int(profile["cup_min_bars"]) + 8)
+        self.bars: deque = deque(maxlen=span)
+        self.count = 0  # closed candles processed
+        self.last_t: Optional[int] = None
+        self._atr: Optional[float] = None
+        self._volumes: deque = deque(maxlen=PATTERN_VOLUME_LENGTH)
+        self._volume_sum = 0.0
+        self.swings: deque = deque(maxlen=5)
+        self.pending: List[PatternSetup] = []
+        self.signals: deque = deque(maxlen=PATTERN_SIGNALS_KEEP)  # (bar index, signal)
+        self._features: tuple[int, Dict[str, Any]] = (-1, {})
+
+    @property
+    def warmup(self) -> int:
+        """Closed candles a fresh tracker replays: enough to fill its windows
+        and to see every setup that could still confirm among the recent bars."""
+        return self.bars.maxlen + PATTERN_BREAKOUT_BARS + PATTERN_RECENT_BARS
+
+    def sync(self, dq: deque) -> int:
+        """Process candles of ``dq`` that closed since the last call; the last
+        candle is still forming and is left for later. A fresh tracker starts
+        :attr:`warmup` candles back instead of replaying the whole history."""
+        fresh = []
+        for idx in range(len(dq) - 2, -1, -1):
+            candle = dq[idx]
+            if self.last_t is None:
+                if len(fresh) == self.warmup:
+                    break
+            elif candle["t"] <= self.last_t:
+                break
+            fresh.append(candle)
+        for candle in reversed(fresh):
+            self.add_candle(candle["t"], candle["h"], candle["l"], candle["c"], candle["v"])
+        return len(fresh)
+
+    def add_candle(self, t: int, h: float, l: float, c: float, v: float) -> None:
+        prev = self.bars[-1] if self.bars else None
+        true_range = h - l if prev is None else max(h - l, abs(h - prev.c), abs(l - prev.c))
+        if self._atr is None:
+            self._atr = true_range
+        else:
+            self._atr += (true_range - self._atr) * 2.0 / (PATTERN_ATR_LENGTH + 1)
+        if len(self._volumes) == self._volumes.maxlen:
+            self._volume_sum -= self._volumes[0]
+        self._volumes.append(v)
+        self._volume_sum += v
+        volume_ma = self._volume_sum / PATTERN_VOLUME_LENGTH if len(self._volumes) == PATTERN_VOLUME_LENGTH else None
+        bar = PatternBar(self.count, int(t), float(h), float(l), float(c), float(v), self._atr, volume_ma)
+        self.bars.append(bar)
+        self.count += 1
+        self.last_t = bar.t
+
+        if self.pending:
+            still_pending = []
+            for setup in self.pending:
+                if self._breaks(setup, bar):
+                    self._confirm(setup, bar)
+                elif bar.index < setup.start + PATTERN_BREAKOUT_BARS:
+                    still_pending.append(setup)
+            self.pending = still_pending
+        self._detect_swing()
+        self._detect_flags()
+        self._detect_cup()
+
+    def _bar(self, index: int) -> PatternBar:
+        return self.bars[index - self.count]
+
+    @staticmethod
+    def _breaks(setup: PatternSetup, bar: PatternBar) -> bool:
+        if bar.index < setup.start or not bar.atr:
+            return False
+        if setup.direction == "bullish":
+            crossed = bar.c >= setup.level + bar.atr * setup.atr_multiple
+        else:
+            crossed = bar.c <= setup.level - bar.atr * setup.atr_multiple
+        return crossed and (not bar.volume_ma or bar.v >= bar.volume_ma * setup.volume_multiple)
+
+    def _confirm(self, setup: PatternSetup, bar: PatternBar) -> None:
+        signal_id = f"{setup.pattern}-{bar.t}"
+        if any(signal["id"] == signal_id for _, signal in self.signals):
+            return  # one signal per pattern and candle, as dedupeSignals
+        signal = {
+            "id": signal_id,
+            "pattern": setup.pattern,
+            "direction": setup.direction,
+            "status": "confirmed",
+            "timeframe": f"{CANDLE_SECONDS // 60}m",
+            "contractCode": self.symbol,
+            "confirmedAt": bar.t,
+            "triggerPrice": bar.c,
+            "triggerVolume": bar.v,
+            "keyLevels": setup.key_levels,
+            "context": setup.context,
+            "confidence": setup.confidence,
+        }
+        self.signals.append((bar.index, signal))
+
+    def _arm(self, setup: PatternSetup) -> None:
+        """Check the bars that already closed after ``setup.start``, then keep
+        the setup pending if none of them broke out."""
+        for index in range(max(setup.start, self.count - len(self.bars)), self.count):
+            bar = self._bar(index)
+            if self._breaks(setup, bar):
+                self._confirm(setup, bar)
+                return
+        self.pending.append(setup)
+
+    # ----- swing patterns -----
+    def _detect_swing(self) -> None:
+        k = PATTERN_SWING_BARS
+        index = self.count - 1 - k
+        if index < k:
+            return
+        pivot = self._bar(index)
+        before = [self._bar(index - j) for j in range(1, k + 1)]
+        after = [self._bar(index + j) for j in range(1, k + 1)]
+        if all(b.h <= pivot.h and b.c <= pivot.h for b in before) and all(
+            b.h < pivot.h and b.c < pivot.h for b in after
+        ):
+            swing = {"type": "high", "index": index, "time": pivot.t, "price": pivot.h}
+        elif all(b.l >= pivot.l and b.c >= pivot.l for b in before) and all(
+            b.l > pivot.l and b.c > pivot.l for b in after
+        ):
+            swing = {"type": "low", "index": index, "time": pivot.t, "price": pivot.l}
+        else:
+            return
+        self.swings.append(swing)
+        self._detect_head_and_shoulders()
+        self._detect_double()
+        self._detect_triangle()
+
+    def _last_swings(self, kinds: str) -> Optional[List[Dict[str, Any]]]:
+        """The trailing swings if their types spell ``kinds`` ("h"/"l")."""
+        if len(self.swings) < len(kinds):
+            return None
+        tail = list(self.swings)[-len(kinds):]
+        if all(s["type"][0] == kind for s, kind in zip(tail, kinds)):
+            return tail
+        return None
+
+    def _detect_head_and_shoulders(self) -> None:
+        profile = self.profile
+        for kinds, pattern, direction in (
+            ("hlhlh", "Head and Shoulders", "bearish"),
+            ("lhlhl", "Inverse Head and Shoulders", "bullish"),
+        ):
+            swings = self._last_swings(kinds)
+            if swings is None:
+                continue
+            left, left_neck, head, right_neck, right = swings
+            diff_left = abs(percent_difference(head["price"], left["price"]))
+            diff_right = abs(percent_difference(head["price"], right["price"]))
+            if min(diff_left, diff_right) < profile["head_shoulder_diff_min"]:
+                continue
+            if max(diff_left, diff_right) > profile["head_shoulder_diff_max"] * 2:
+                continue
+            left_distance = head["index"] - left["index"]
+            right_distance = right["index"] - head["index"]
+            symmetry = 1 - min(left_distance, right_distance) / max(left_distance, right_distance, 1)
+            strength = (diff_left + diff_right) / (profile["head_shoulder_diff_min"] * 3) * 0.6
+            self._arm(
+                PatternSetup(
+                    pattern,
+                    direction,
+                    (left_neck["price"] + right_neck["price"]) / 2,
+                    1.0,
+                    profile["head_shoulder_volume_multiplier"],
+                    right["index"] + 1,
+                    max(0.5, min(0.95, strength + symmetry * 0.3)),
+                    {
+                        "neckline": (left_neck["price"] + right_neck["price"]) / 2,
+                        "head": head["price"],
+                        "leftShoulder": left["price"],
+                        "rightShoulder": right["price"],
+                    },
+                    {"leftShoulderTime": left["time"], "headTime": head["time"], "rightShoulderTime": right["time"]},
+                ),
+            )
+
+    def _detect_double(self) -> None:
+        profile = self.profile
+        for kinds, pattern, direction, tolerance, level_name, times in (
+            ("hlh", "Double Top", "bearish", "double_top_tolerance", "resistance", ("firstHighTime", "secondHighTime")),
+            ("lhl", "Double Bottom", "bullish", "double_bottom_tolerance", "support", ("firstLowTime", "secondLowTime")),
+        ):
+            swings = self._last_swings(kinds)
+            if swings is None:
+                continue
+            first, middle, second = swings
+            tolerance = profile[tolerance]
+            diff = abs(percent_difference(second["price"], first["price"]))
+            if diff > tolerance:
+                continue
+            self._arm(
+                PatternSetup(
+                    pattern,
+                    direction,
+                    middle["price"],
+                    0.6,
+                    1.2,
+                    second["index"] + 1,
+                    max(0.5, min(0.9, 1 - diff / (tolerance + 1e-6))),
+                    {level_name: (first["price"] + second["price"]) / 2, "trigger": middle["price"]},
+                    {times[0]: first["time"], times[1]: second["time"]},
+                ),
+            )
+
+    def _detect_triangle(self) -> None:
+        profile = self.profile
+        swings = self._last_swings("hlhl")
+        if swings is not None:
+            first_high, first_low, second_high, second_low = swings
+            rising = profile["triangle_rising_threshold"]
+            if abs(percent_difference(second_high["price"], first_high["price"])) <= profile[
+                "triangle_flat_tolerance"
+            ] and second_low["price"] > first_low["price"] * (1 + rising):
+                resistance = (first_high["price"] + second_high["price"]) / 2
+                slope_score = min(1.0, abs((second_low["price"] - first_low["price"]) / first_low["price"]) / rising)
+                self._arm(
+                    PatternSetup(
+                        "Ascending Triangle",
+                        "bullish",
+                        resistance,
+                        0.8,
+                        profile["volume_spike_multiplier"],
+                        second_low["index"] + 1,
+                        max(0.5, min(0.9, 0.5 + slope_score * 0.4)),
+                        {"resistance": resistance, "risingBase": second_low["price"]},
+                        {"firstHighTime": first_high["time"], "secondHighTime": second_high["time"]},
+                    ),
+                )
+        swings = self._last_swings("lhlh")
+        if swings is not None:
+            first_low, first_high, second_low, second_high = swings
+            falling = profile["triangle_falling_threshold"]
+            if abs(percent_difference(second_low["price"], first_low["price"])) <= profile[
+                "triangle_flat_tolerance"
+            ] and second_high["price"] < first_high["price"] * (1 - falling):
+                support = (first_low["price"] + second_low["price"]) / 2
+                slope_score = min(1.0, abs((first_high["price"] - second_high["price"]) / first_high["price"]) / falling)
+                self._arm(
+                    PatternSetup(
+                        "Descending Triangle",
+                        "bearish",
+                        support,
+                        0.8,
+                        profile["volume_spike_multiplier"],
+                        second_high["index"] + 1,
+                        max(0.5, min(0.9, 0.5 + slope_score * 0.4)),
+                        {"support": support, "fallingCeiling": second_high["price"]},
+                        {"firstLowTime": first_low["time"], "secondLowTime": second_low["time"]},
+                    ),
+                )
+
+    # ----- candle-window patterns -----
+    def _detect_flags(self) -> None:
+        profile = self.profile
+        window = int(profile["flag_impulse_window"])
+        start = self.count - 1 - (window + 6)
+        if start < 0:
+            return
+        impulse = [self._bar(i) for i in range(start, start + window)]
+        pullback = [self._bar(i) for i in range(start + window, start + window + 7)]
+        move = impulse[-1].c - impulse[0].c
+        avg_atr = sum(bar.atr for bar in impulse) / window
+        if not move or avg_atr <= 0 or abs(move) < avg_atr * profile["flag_impulse_atr_multiple"]:
+            return
+        if move > 0:
+            extreme = max(bar.h for bar in impulse)
+            turn = min(pullback, key=lambda bar: bar.c)  # first lowest close
+            if turn.c >= extreme:
+                return
+            pattern, direction, levels = "Bull Flag", "bullish", {"flagHigh": extreme, "flagLow": turn.c}
+        else:
+            extreme = min(bar.l for bar in impulse)
+            turn = max(pullback, key=lambda bar: bar.c)
+            if turn.c <= extreme:
+                return
+            pattern, direction, levels = "Bear Flag", "bearish", {"flagLow": extreme, "flagHigh": turn.c}
+        retrace = abs((extreme - turn.c) / move)
+        if not profile["flag_pullback_depth_min"] <= retrace <= profile["flag_pullback_depth_max"]:
+            return
+        self._arm(
+            PatternSetup(
+                pattern,
+                direction,
+                extreme,
+                0.5,
+                profile["volume_spike_multiplier"],
+                turn.index + 1,
+                max(0.55, min(0.92, retrace * 1.2)),
+                levels,
+                {"impulseStartTime": impulse[0].t, "impulseEndTime": impulse[-1].t},
+            ),
+        )
+
+    def _detect_cup(self) -> None:
+        profile = self.profile
+        min_bars = int(profile["cup_min_bars"])
+        start = self.count - 1 - (min_bars + 7)
+        if start < 0:
+            return
+        cup = [self._bar(i) for i in range(start, start + min_bars + 1)]
+        handle = [self._bar(i) for i in range(start + min_bars + 1, self.count)]
+        left_rim, right_rim = cup[0].c, cup[-1].c
+        base = min(cup, key=lambda bar: bar.c)
+        if not left_rim:
+            return
+        depth = abs((base.c - left_rim) / left_rim)
+        if not 0.02 <= depth <= 0.15 or abs(percent_difference(right_rim, left_rim)) > 0.01:
+            return
+        handle_low = min(bar.c for bar in handle)
+        if abs((right_rim - handle_low) / (right_rim - base.c)) > profile["cup_handle_retrace_max"]:
+            return
+        half = len(cup) / 2
+        symmetry = 1 - abs((base.index - start - half) / half)
+        self._arm(
+            PatternSetup(
+                "Cup and Handle",
+                "bullish",
+                right_rim,
+                0.7,
+                profile["volume_spike_multiplier"],
+                handle[-1].index,
+                max(0.55, min(0.9, 0.6 + symmetry * 0.3)),
+                {"breakout": right_rim, "baseLow": base.c},
+                {"cupStartTime": cup[0].t, "cupEndTime": cup[-1].t},
+            ),
+        )
+
+    # ----- read side -----
+    def recent(self, bars: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Signals confirmed within the last ``bars`` closed candles, oldest first."""
+        bars = PATTERN_RECENT_BARS if bars is None else bars
+        cutoff = self.count - bars
+        return [signal for index, signal in sorted(self.signals, key=lambda item: item[0]) if index >= cutoff]
+
+    def features(self) -> Dict[str, Any]:
+        """Net direction of the recent signals, weighted by confidence and
+        clipped to [-1, 1], plus the latest pattern name."""
+        if self._features[0] == self.count:
+            return self._features[1]
+        recent = self.recent()
+        bias = sum((1 if s["direction"] == "bullish" else -1) * s["confidence"] for s in recent)
+        features = {
+            "pattern_bias": max(-1.0, min(1.0, float(bias))),
+            "pattern": recent[-1]["pattern"] if recent else None,
+        }
+        self._features = (self.count, features)
+        return features
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "profile": self.profile_name,
+            "bars": self.count,
+            "swings": list(self.swings),
+            "pending": len(self.pending),
+            "signals": [signal for _, signal in sorted(self.signals, key=lambda item: item[0])],
+            **self.features(),
+        }
+
+
+# one tracker per symbol, built lazily and caught up from ``candles`` on use
+pattern_trackers: Dict[str, PatternTracker] = {}
+
+
+def pattern_tracker(symbol: str) -> PatternTracker:
+    tracker = pattern_trackers.get(symbol)
+    if tracker is None:
+        tracker = pattern_trackers[symbol] = PatternTracker(symbol)
+    ensure_symbol(symbol)
+    tracker.sync(candles[symbol])
+    return tracker
+
+
+def pattern_features(symbol: str) -> Dict[str, Any]:
+    return pattern_tracker(symbol).features()
+
+
+# ---------- Volume at price ----------
+def volume_profile_step(price: float) -> float:
+    """Largest 1/2/5 x 10^k bin width not above ``VOLUME_PROFILE_BIN_FRACTION`` of ``price``."""
+    raw = abs(price) * VOLUME_PROFILE_BIN_FRACTION
+    if not raw or not math.isfinite(raw):
+        return 1.0
+    magnitude = 10.0 ** math.floor(math.log10(raw))
+    for multiple in (5.0, 2.0, 1.0):
+        if multiple * magnitude <= raw * (1 + 1e-9):
+            return multiple * magnitude
+    return magnitude
+
+
+class PriceHistogram:
+    """Volume per price bin in one contiguous float64 array.
+
+    Bin ``b`` covers prices rounding to ``b * step`` and lives at
+    ``volume[b - base]``; the array is centred on the first bin traded and
+    grows geometrically when price leaves it, so :meth:`add` is amortized
+    O(1). ``first``/``last`` bound the bins touched since the last clear, and
+    scans only look at that slice. The point of control is tracked on every
+    add and only rescanned after a removal took volume from it. The buffer is
+    an ``array.array`` (cheap scalar updates on the tick path) viewed through
+    NumPy for scans.
+    """
+
+    __slots__ = ("step", "base", "volume", "first", "last", "total", "poc", "poc_stale", "version", "_summary")
+
+    def __init__(self, step: float) -> None:
+        self.step = step
+        self.base = 0
+        self.volume = array.array("d")
+        self.first = self.last = -1  # array indexes of the outermost touched bins
+        self.total = 0.0
+        self.poc = -1  # array index of the point of control
+        self.poc_stale = False
+        self.version = 0
+        self._summary: tuple[int, Dict[str, Any]] = (-1, {})
+
+    def _grow(self, b: int) -> None:
+        """Reallocate around the touched bins and ``b``, with headroom on both sides."""
+        touched = self.first >= 0
+        lo_bin = min(b, self.base + self.first) if touched else b
+        hi_bin = max(b, self.base + self.last) if touched else b
+        pad = max(64, (hi_bin - lo_bin) // 2)
+        low = lo_bin - pad
+        grown = array.array("d", bytes(8 * (hi_bin - lo_bin + 2 * pad + 1)))
+        if touched:
+            shift = self.base - low
+            grown[self.first + shift : self.last + shift + 1] = self.volume[self.first : self.last + 1]
+            self.first += shift
+            self.last += shift
+            if self.poc >= 0:
+                self.poc += shift
+        self.base, self.volume = low, grown
+
+    def _trim(self) -> None:
+        """Pull ``first``/``last`` in past bins emptied by removals."""
+        bins = self.volume
+        first, last = self.first, self.last
+        while first <= last and not bins[first]:
+            first += 1
+        while last >= first and not bins[last]:
+            last -= 1
+        if first > last:
+            first = last = self.poc = -1
+        self.first, self.last = first, last
+
+    def add(self, b: int, volume: float) -> None:
+        idx = b - self.base
+        if idx < 0 or idx >= len(self.volume):
+            self._grow(b)
+            idx = b - self.base
+        bins = self.volume
+        bins[idx] += volume
+        self.total += volume
+        self.version += 1
+        if self.first < 0:
+            self.first = self.last = idx
+        elif idx < self.first:
+            self.first = idx
+        elif idx > self.last:
+            self.last = idx
+        if volume < 0:
+            if bins[idx] < 1e-9:  # emptied bin: drop float residue
+                self.total -= bins[idx]
+                bins[idx] = 0.0
+                if idx == self.first or idx == self.last:
+                    self._trim()
+            if idx == self.poc:
+                self.poc_stale = True
+        elif self.poc < 0 or bins[idx] > bins[self.poc]:
+            self.poc = idx
+
+    def clear(self) -> None:
+        self.base = 0
+        self.volume = array.array("d")  # re-centred on the next add
+        self.first = self.last = -1
+        self.total = 0.0
+        self.poc = -1
+        self.poc_stale = False
+        self.version += 1
+
+    def occupied(self) -> np.ndarray:
+        """View of the touched bins, ``volume[first : last + 1]``."""
+        if self.first < 0:
+            return np.zeros(0)
+        return np.frombuffer(self.volume)[self.first : self.last + 1]
+
+    def point_of_control(self) -> int:
+        if self.poc_stale:
+            bins = self.occupied()
+            self.poc = self.first + int(np.argmax(bins)) if len(bins) else -1
+            self.poc_stale = False
+        return self.poc
+
+    def value_area(self, fraction: float) -> tuple[int, int]:
+        """Array indexes bounding the value area: the narrowest run of bins
+        around the point of control holding ``fraction`` of the volume (the
+        heavier run on ties), found with one cumulative sum over the touched
+        bins."""
+        bins = self.occupied()
+        poc = self.point_of_control() - self.first
+        cum = np.concatenate(([0.0], np.cumsum(bins)))
+        target = cum[-1] * fraction * (1 - 1e-12)
+        lows = np.arange(poc + 1)
+        # for each start at or below the POC, the first end holding the target
+        ends = np.searchsorted(cum, cum[lows] + target, "left")
+        ends = np.clip(ends, poc + 1, len(bins))
+        held = cum[ends] - cum[lows]
+        width = np.where(held >= target, ends - lows, len(bins) + 1)
+        best = np.lexsort((-held, width))[0]
+        return self.first + int(lows[best]), self.first + int(ends[best]) - 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Point of control and value area as prices; cached per update."""
+        if self._summary[0] == self.version:
+            return self._summary[1]
+        if self.total <= 0 or self.point_of_control() < 0:
+            summary: Dict[str, Any] = {"volume": 0.0, "poc": None, "vah": None, "val": None}
+        else:
+            lo, hi = self.value_area(VOLUME_PROFILE_VALUE_AREA)
+            summary = {
+                "volume": self.total,
+                "poc": (self.base + self.poc) * self.step,
+                "vah": (self.base + hi) * self.step,
+                "val": (self.base + lo) * self.step,
+            }
+        self._summary = (self.version, summary)
+        return summary
+
+    def levels(self) -> Dict[str, List[float]]:
+        volume = self.occupied()
+        nonzero = np.flatnonzero(volume > 1e-12)
+        bins = self.base + max(self.first, 0) + nonzero
+        return {"price": (bins * self.step).tolist(), "volume": volume[nonzero].tolist()}
+
+
+class VolumeProfile:
+    """Volume-at-price for one symbol: the current session (starting at
+    ``VOLUME_PROFILE_SESSION_HOUR`` UTC) and a rolling
+    ``VOLUME_PROFILE_WINDOW``.
+
+    The rolling histogram keeps one ``{bin: volume}`` delta per candle bucket
+    and subtracts buckets as they age out, so every unit of volume is added
+    and removed once. Collapsed ticks from a shedding ingest queue are
+    counted at their close.
+    """
+
+    def __init__(self, symbol: str, step: float) -> None:
+        self.symbol = symbol
+        self.step = step
+        self.session = PriceHistogram(step)
+        self.rolling = PriceHistogram(step)
+        self.session_id: Optional[int] = None
+        self.session_end = -1  # first ts of the next session
+        self.previous_session: Optional[Dict[str, Any]] = None
+        self._buckets: deque = deque()  # (bucket ts, {bin: volume})
+        self.last_ts = 0
+
+    @staticmethod
+    def session_of(ts: int) -> int:
+        return (int(ts) - VOLUME_PROFILE_SESSION_HOUR * 3600) // 86400
+
+    def add(self, ts: int, price: float, volume: float) -> None:
+        if volume <= 0 or not math.isfinite(price):
+            return
+        ts = max(int(ts), self.last_ts)  # late ticks count toward the newest bucket
+        self.last_ts = ts
+        if ts >= self.session_end:
+            if self.session_id is not None and self.session.total > 0:
+                self.previous_session = dict(self.session.summary())
+            self.session.clear()
+            self.session_id = self.session_of(ts)
+            self.session_end = (self.session_id + 1) * 86400 + VOLUME_PROFILE_SESSION_HOUR * 3600
+        b = int(math.floor(price / self.step + 0.5))
+        self.session.add(b, volume)
+        self.rolling.add(b, volume)
+
+        buckets = self._buckets
+        bucket = ts - ts % CANDLE_SECONDS
+        if not buckets or buckets[-1][0] != bucket:
+            buckets.append((bucket, {}))
+            cutoff = ts - VOLUME_PROFILE_WINDOW
+            while buckets[0][0] + CANDLE_SECONDS <= cutoff:
+                for old_bin, old_volume in buckets.popleft()[1].items():
+                    self.rolling.add(old_bin, -old_volume)
+        delta = buckets[-1][1]
+        delta[b] = delta.get(b, 0.0) + volume
+
+    def features(self, price: float) -> Dict[str, Any]:
+        session = self.session.summary()
+        val, vah = session["val"], session["vah"]
+        if val is None:
+            position = 0
+        else:
+            position = -1 if price < val else 1 if price > vah else 0
+        return {
+            "vp_step": self.step,
+            "vp_poc": session["poc"],
+            "vp_val": val,
+            "vp_vah": vah,
+            "vp_position": position,  # -1 below the value area, 1 above, 0 inside
+            "vp_rolling_poc": self.rolling.summary()["poc"],
+        }
+
+    def describe(self, levels: bool = True) -> Dict[str, Any]:
+        report = {
+            "symbol": self.symbol,
+            "step": self.step,
+            "session": {
+                "start": self.session_id * 86400 + VOLUME_PROFILE_SESSION_HOUR * 3600 if self.session_id is not None else None,
+                **self.session.summary(),
+            },
+            "rolling": {"window": VOLUME_PROFILE_WINDOW, **self.rolling.summary()},
+            "previous_session": self.previous_session,
+        }
+        if levels:
+            report["session"]["levels"] = self.session.levels()
+            report["rolling"]["levels"] = self.rolling.levels()
+        return report
+
+
+volume_profiles: Dict[str, VolumeProfile] = {}
+
+
+def profile_tick(symbol: str, ts: int, price: float, volume: float) -> None:
+    profile = volume_profiles.get(symbol)
+    if profile is None:
+        profile = volume_profiles[symbol] = VolumeProfile(symbol, volume_profile_step(price))
+    profile.add(ts, price, volume)
+
+
+def rebuild_volume_profile(symbol: str) -> Optional[VolumeProfile]:
+    """Rebuild from the candle store (each candle's volume at its close);
+    used when history is seeded in bulk."""
+    volume_profiles.pop(symbol, None)
+    ensure_symbol(symbol)
+    for candle in list(candles[symbol]):
+        profile_tick(symbol, candle["t"], candle["c"], candle["v"])
+    return volume_profiles.get(symbol)
+
+
+def volume_profile_features(symbol: str, price: float) -> Dict[str, Any]:
+    profile = volume_profiles.get(symbol)
+    if profile is None:
+        return {"vp_step": None, "vp_poc": None, "vp_val": None, "vp_vah": None, "vp_position": 0, "vp_rolling_poc": None}
+    return profile.features(price)
+
+
+def value_area_brackets(side: str, price: float, sl: float, tp: float, feat: Mapping[str, Any]) -> tuple[float, float]:
+    """Move the stop just beyond the far value-area edge and the target to
+    the near one, each only when it lies within ``VALUE_AREA_SNAP`` times the
+    distance the genome picked."""
+    val, vah, step = feat.get("vp_val"), feat.get("vp_vah"), feat.get("vp_step")
+    if val is None or vah is None:
+        return sl, tp
+    low, high = VALUE_AREA_SNAP
+    direction = 1 if side == "buy" else -1
+    stop = val - step if direction > 0 else vah + step
+    target = vah if direction > 0 else val
+    if low * abs(price - sl) <= (price - stop) * direction <= high * abs(price - sl):
+        sl = stop
+    if low * abs(tp - price) <= (target - price) * direction <= high * abs(tp - price):
+        tp = target
+    return sl, tp
+
+
+# ---------- Genome encoding & batched evolution operators ----------
+class GeneSpec(NamedTuple):
+    name: str
+    kind: Literal["int", "float", "bool"]
+    init_low: float
+    init_high: float
+    lower: float
+    upper: float
+    prob: float  # per-gene mutation probability
+    op: Literal["add", "scale", "step", "wrap", "flip"]
+    scale: float  # gaussian sigma for add/scale, max integer step for step/wrap
+    group: str  # genes in the same group mutate together
+
+
+GENE_SPECS: tuple[GeneSpec, ...] = (
+    GeneSpec("confirm_count", "int", 1, 3, 1, math.inf, 0.4, "step", 1, "confirm_count"),
+    GeneSpec("require_agreement_fraction", "float", 0.5, 0.9, 0.1, 1.0, 0.5, "add", 0.07, "require_agreement_fraction"),
+    GeneSpec("min_volume_mult", "float", 0.1, 3.0, 0.01, math.inf, 0.5, "scale", 0.2, "min_volume_mult"),
+    GeneSpec("momentum_z", "float", 0.1, 2.0, 0.01, math.inf, 0.5, "add", 0.3, "momentum_z"),
+    GeneSpec("use_atr_sl", "bool", 0, 1, 0, 1, 0.3, "flip", 0, "use_atr_sl"),
+    GeneSpec("sl_mult", "float", 0.5, 3.0, 0.01, math.inf, 0.5, "scale", 0.15, "sl_mult"),
+    GeneSpec("tp_mult", "float", 0.5, 6.0, 0.01, math.inf, 0.5, "scale", 0.2, "tp_mult"),
+    GeneSpec("scalp_window", "int", 30, 300, 10, math.inf, 0.3, "step", 30, "scalp_window"),
+    GeneSpec("time_bias_start", "int", 0, 23, 0, 23, 0.2, "wrap", 2, "time_bias"),
+    GeneSpec("time_bias_end", "int", 0, 23, 0, 23, 0.2, "wrap", 2, "time_bias"),
+    GeneSpec("scalp_aggressiveness", "float", 0.1, 1.0, 0.01, 1.0, 0.4, "add", 0.1, "scalp_aggressiveness"),
+    GeneSpec("pattern_weight", "float", 0.0, 1.0, 0.0, 2.0, 0.3, "add", 0.15, "pattern_weight"),
+    GeneSpec("value_area_brackets", "bool", 0, 1, 0, 1, 0.3, "flip", 0, "value_area_brackets"),
+)
+GENE_NAMES = tuple(spec.name for spec in GENE_SPECS)
+GENE_INDEX = {name: idx for idx, name in enumerate(GENE_NAMES)}
+
+_GENE_GROUPS = list(dict.fromkeys(spec.group for spec in GENE_SPECS))
+_GENE_GROUP_IDX = np.array([_GENE_GROUPS.index(spec.group) for spec in GENE_SPECS])
+_GENE_PROB = np.array([spec.prob for spec in GENE_SPECS])
+_GENE_LOWER = np.array([spec.lower for spec in GENE_SPECS], dtype=float)
+_GENE_UPPER = np.array([spec.upper for spec in GENE_SPECS], dtype=float)
+_GENE_INIT_LOW = np.array([spec.init_low for spec in GENE_SPECS], dtype=float)
+_GENE_INIT_HIGH = np.array([spec.init_high for spec in GENE_SPECS], dtype=float)
+_GENE_ADD_COLS = np.array([i for i, spec in enumerate(GENE_SPECS) if spec.op == "add"])
+_GENE_SCALE_COLS = np.array([i for i, spec in enumerate(GENE_SPECS) if spec.op == "scale"])
+_GENE_STEP_COLS = np.array([i for i, spec in enumerate(GENE_SPECS) if spec.op in {"step", "wrap"}])
+_GENE_WRAP_COLS = np.array([i for i, spec in enumerate(GENE_SPECS) if spec.op == "wrap"])
+_GENE_FLIP_COLS = np.array([i for i, spec in enumerate(GENE_SPECS) if spec.op == "flip"])
+_GENE_SIGMA = np.array([spec.scale for spec in GENE_SPECS])
+_GENE_STEP = np.array([int(spec.scale) for spec in GENE_SPECS])
+_GENE_IS_INT = np.array([spec.kind in {"int", "bool"} for spec in GENE_SPECS])
+
+evolution_rng: Optional[np.random.Generator] = None  # created on first use
+
+
+def seed_evolution(seed: Optional[int] = None) -> np.random.Generator:
+    """Reset the shared evolution generator so runs can be reproduced.
+
+    Engines without a seed of their own re-spawn their generator from it.
+    """
+    global evolution_rng
+    evolution_rng = np.random.default_rng(seed)
+    for target in engines.values():
+        if target.seed is None:
+            target.reset_rng()
+    return evolution_rng
+
+
+def evolution_generator() -> np.random.Generator:
+    return evolution_rng if evolution_rng is not None else seed_evolution(EVOLUTION_SEED)
+
+
+def genome_matrix(genomes: List[Dict[str, Any]]) -> np.ndarray:
+    """Encode genome dicts as a ``(n, len(GENE_SPECS))`` float matrix."""
+    if not genomes:
+        return np.empty((0, len(GENE_SPECS)), dtype=float)
+    return np.array([[float(g[name]) for name in GENE_NAMES] for g in genomes], dtype=float)
+
+
+def genome_id(genome: Mapping[str, Any]) -> str:
+    """Stable short hash of a genome's genes; survives elites being carried
+    into later generations under a different index."""
+    blob = json.dumps([genome[name] for name in GENE_NAMES], separators=(",", ":"))
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def genomes_from_matrix(matrix: np.ndarray) -> List[Dict[str, Any]]:
+    """Decode a population matrix back into genome dicts."""
+    columns: List[List[Any]] = []
+    for idx, spec in enumerate(GENE_SPECS):
+        column = matrix[:, idx]
+        if spec.kind == "int":
+            columns.append(np.rint(column).astype(np.int64).tolist())
+        elif spec.kind == "bool":
+            columns.append((column >= 0.5).tolist())
+        else:
+            columns.append(column.tolist())
+    return [dict(zip(GENE_NAMES, row)) for row in zip(*columns)]
+
+
+class GenomeRows(Sequence):
+    """Genome dicts of a population matrix, decoded one row at a time on
+    access; voting runs on the matrix, so most rows are never decoded."""
+
+    __slots__ = ("matrix",)
+
+    def __init__(self, matrix: np.ndarray) -> None:
+        self.matrix = matrix
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def __getitem__(self, idx: Any) -> Any:
+        if isinstance(idx, slice):
+            return genomes_from_matrix(self.matrix[idx])
+        return genomes_from_matrix(self.matrix[idx][None, :])[0]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(genomes_from_matrix(self.matrix))
+
+
+def random_population(n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    rng = rng or evolution_generator()
+    draws = rng.uniform(_GENE_INIT_LOW, _GENE_INIT_HIGH, size=(n, len(GENE_SPECS)))
+    ints = rng.integers(_GENE_INIT_LOW.astype(np.int64), _GENE_INIT_HIGH.astype(np.int64) + 1, size=(n, len(GENE_SPECS)))
+    return np.where(_GENE_IS_INT, ints, np.round(draws, 2)).astype(float)
+
+
+def mutate_population(
+    matrix: np.ndarray,
+    rng: Optional[np.random.Generator] = None,
+    rows: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Apply per-gene mutation to every row (or the rows selected by ``rows``)."""
+    rng = rng or evolution_generator()
+    n = len(matrix)
+    if n == 0:
+        return matrix.copy()
+    group_draws = rng.random((n, len(_GENE_GROUPS)))
+    mask = group_draws[:, _GENE_GROUP_IDX] < _GENE_PROB
+    if rows is not None:
+        mask &= np.asarray(rows, dtype=bool)[:, None]
+    mutated = matrix.copy()
+    gaussian = np.concatenate([_GENE_ADD_COLS, _GENE_SCALE_COLS])
+    noise = rng.standard_normal((n, len(gaussian))) * _GENE_SIGMA[gaussian]
+    n_add = len(_GENE_ADD_COLS)
+    mutated[:, _GENE_ADD_COLS] += noise[:, :n_add]
+    mutated[:, _GENE_SCALE_COLS] *= 1.0 + noise[:, n_add:]
+    step = _GENE_STEP[_GENE_STEP_COLS]
+    mutated[:, _GENE_STEP_COLS] += rng.integers(-step, step + 1, size=(n, len(step)))
+    mutated[:, _GENE_WRAP_COLS] = np.mod(mutated[:, _GENE_WRAP_COLS], _GENE_UPPER[_GENE_WRAP_COLS] + 1)
+    mutated[:, _GENE_FLIP_COLS] = 1.0 - mutated[:, _GENE_FLIP_COLS]
+    np.clip(mutated, _GENE_LOWER, _GENE_UPPER, out=mutated)
+    return np.where(mask, mutated, matrix)
+
+
+def crossover_population(a: np.ndarray, b: np.ndarray, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """Uniform crossover of two equally shaped parent matrices."""
+    rng = rng or evolution_generator()
+    return np.where(rng.random(a.shape) < 0.5, a, b)
+
+
+def select_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` best scores, best first, without a full sort."""
+    scores = np.asarray(scores, dtype=float)
+    k = max(0, min(int(k), len(scores)))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def tournament_select(
+    scores: np.ndarray,
+    count: int,
+    rng: Optional[np.random.Generator] = None,
+    size: Optional[int] = None,
+) -> np.ndarray:
+    """Pick ``count`` parent indices, each the best of ``size`` random contenders."""
+    rng = rng or evolution_generator()
+    size = TOURNAMENT_SIZE if size is None else size
+    scores = np.asarray(scores, dtype=float)
+    contenders = rng.integers(0, len(scores), size=(count, max(1, size)))
+    winners = np.argmax(scores[contenders], axis=1)
+    return contenders[np.arange(count), winners]
+
+
+def next_generation(
+    matrix: np.ndarray,
+    scores: np.ndarray,
+    rng: Optional[np.random.Generator] = None,
+    pop_size: Optional[int] = None,
+    elites: Optional[int] = None,
+    mut_rate: Optional[float] = None,
+    tournament_size: Optional[int] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Build the next population matrix.
+
+    Returns the new matrix and a ``(pop_size, 2)`` lineage array holding the
+    parent row indices in ``matrix`` for every new row (elites point at
+    themselves, fresh random genomes at ``-1``). Unset options fall back to
+    the module config at call time.
+    """
+    rng = rng or evolution_generator()
+    pop_size = POP_SIZE if pop_size is None else pop_size
+    elites = ELITES if elites is None else elites
+    mut_rate = MUT_RATE if mut_rate is None else mut_rate
+    scores = np.asarray(scores, dtype=float)
+    if len(matrix) == 0:
+        return random_population(pop_size, rng), np.full((pop_size, 2), -1, dtype=np.int64)
+
+    elite_idx = select_top_k(scores, min(elites, pop_size))
+    n_children = pop_size - len(elite_idx)
+    parents_a = tournament_select(scores, n_children, rng, tournament_size)
+    parents_b = tournament_select(scores, n_children, rng, tournament_size)
+
+    # 30% of children are mutated clones of one parent, the rest are uniform
+    # crossovers that get mutated with probability ``mut_rate``.
+    clones = rng.random(n_children) < 0.3
+    parents_b = np.where(clones, parents_a, parents_b)
+    children = crossover_population(matrix[parents_a], matrix[parents_b], rng)
+    mutate_rows = clones | (rng.random(n_children) < mut_rate)
+    children = mutate_population(children, rng, rows=mutate_rows)
+
+    new_matrix = np.concatenate([matrix[elite_idx], children])
+    lineage = np.concatenate(
+        [np.stack([elite_idx, elite_idx], axis=1), np.stack([parents_a, parents_b], axis=1)]
+    ).astype(np.int64)
+    return new_matrix, lineage
+
+
+def random_genome() -> Dict[str, Any]:
+    return genomes_from_matrix(random_population(1))[0]
+
+
 def mutate_genome(g: Dict[str, Any]) -> Dict[str, Any]:
-    ng = dict(g)
-    if random.random() < 0.4:
-        ng["confirm_count"] = max(1, ng["confirm_count"] + random.choice([-1, 0, 1]))
-    if random.random() < 0.5:
-        ng["require_agreement_fraction"] = min(1.0, max(0.1, ng["require_agreement_fraction"] + random.gauss(0, 0.07)))
-    if random.random() < 0.5:
-        ng["min_volume_mult"] = max(0.01, ng["min_volume_mult"] * (1 + random.gauss(0, 0.2)))
-    if random.random() < 0.5:
-        ng["momentum_z"] = max(0.01, ng["momentum_z"] + random.gauss(0, 0.3))
-    if random.random() < 0.3:
-        ng["use_atr_sl"] = not ng["use_atr_sl"]
-    if random.random() < 0.5:
-        ng["sl_mult"] = max(0.01, ng["sl_mult"] * (1 + random.gauss(0, 0.15)))
-    if random.random() < 0.5:
-        ng["tp_mult"] = max(0.01, ng["tp_mult"] * (1 + random.gauss(0, 0.2)))
-    if random.random() < 0.3:
-        ng["scalp_window"] = max(10, ng["scalp_window"] + random.randint(-30, 30))
-    if random.random() < 0.4:
-        ng["scalp_aggressiveness"] = min(1.0, max(0.01, ng["scalp_aggressiveness"] + random.gauss(0, 0.1)))
-    if random.random() < 0.2:
-        start = (ng["time_bias_start"] + random.randint(-2, 2)) % 24
-        end = (ng["time_bias_end"] + random.randint(-2, 2)) % 24
-        ng["time_bias_start"], ng["time_bias_end"] = start, end
-    return ng
+    return genomes_from_matrix(mutate_population(genome_matrix([g])))[0]
 
 
 def crossover(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
-    return {k: (a[k] if random.random() < 0.5 else b[k]) for k in a.keys()}
+    return genomes_from_matrix(crossover_population(genome_matrix([a]), genome_matrix([b])))[0]
+
+
+def inherited_scores(parent_scores: np.ndarray, lineage: np.ndarray) -> np.ndarray:
+    """Starting fitness of a new generation: its parents' mean, scaled by ``SCORE_CARRY``."""
+    parents = np.where(lineage >= 0, parent_scores[np.clip(lineage, 0, None)], 0.0)
+    return parents.mean(axis=1) * SCORE_CARRY
+
+
+def build_next_population(snapshot: PopulationSnapshot, rng: Optional[np.random.Generator] = None) -> PopulationSnapshot:
+    """Build the next generation in a shadow buffer from ``snapshot``."""
+    scores = snapshot.scores.copy()
+    matrix, lineage = next_generation(snapshot.matrix, scores, rng)
+    return PopulationSnapshot(GenomeRows(matrix), matrix, inherited_scores(scores, lineage), snapshot.generation + 1, lineage)
+
+
+class EvolutionScheduler:
+    """Decides when the population has seen enough data to evolve.
+
+    A generation is due when enough alerts were scored, when the mean fitness
+    stopped moving, or when the time budget ran out while alerts were arriving.
+    """
+
+    def __init__(self) -> None:
+        self.alerts_since = 0
+        self.last_evolved = time.monotonic()
+        self.last_evolved_at: Optional[int] = None
+        self.last_mean: Optional[float] = None
+        self.drift = math.inf
+        self.last_reason: Optional[str] = None
+        self._wake: Optional[asyncio.Event] = None  # created by the waiting loop
+
+    def note_alert(self, mean_score: float) -> None:
+        self.alerts_since += 1
+        if self.last_mean is not None:
+            self.drift = abs(mean_score - self.last_mean) / max(abs(self.last_mean), 1e-9)
+        self.last_mean = mean_score
+        if self._wake is not None and self.due():
+            self._wake.set()
+
+    def due(self, now: Optional[float] = None) -> Optional[str]:
+        if self.alerts_since == 0:
+            return None
+        elapsed = (now if now is not None else time.monotonic()) - self.last_evolved
+        if elapsed < EVOLVE_MIN_INTERVAL:
+            return None
+        if self.alerts_since >= EVOLVE_MIN_ALERTS:
+            return "alerts"
+        if self.alerts_since >= EVOLVE_CONVERGENCE_ALERTS and self.drift < EVOLVE_CONVERGENCE_TOL:
+            return "converged"
+        if elapsed >= EVOLVE_MAX_INTERVAL:
+            return "time_budget"
+        return None
 
+    async def wait(self) -> None:
+        import asyncio
 
-# ---------- Population bootstrap ----------
-def init_population() -> None:
-    global population, pop_scores
-    population = [random_genome() for _ in range(POP_SIZE)]
-    pop_scores = [0.0] * POP_SIZE
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        elapsed = time.monotonic() - self.last_evolved
+        if self.alerts_since == 0:
+            timeout = None
+        elif elapsed < EVOLVE_MIN_INTERVAL:
+            timeout = EVOLVE_MIN_INTERVAL - elapsed
+        else:
+            timeout = max(0.0, EVOLVE_MAX_INTERVAL - elapsed)
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        self._wake.clear()
+
+    def mark_evolved(self, reason: str, now: Optional[float] = None, consumed: Optional[int] = None) -> None:
+        """Start a new schedule; alerts beyond the ``consumed`` ones the new
+        generation was built from (default: all) still count toward the next."""
+        self.alerts_since = 0 if consumed is None else max(0, self.alerts_since - consumed)
+        self.last_evolved = now if now is not None else time.monotonic()
+        self.last_evolved_at = int(now) if now is not None else now_s()
+        self.last_mean = None
+        self.drift = math.inf
+        self.last_reason = reason
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "alerts_since": self.alerts_since,
+            "last_evolved_at": self.last_evolved_at,
+            "last_reason": self.last_reason,
+        }
 
 
 # ---------- Decision logic ----------
 def features_from_context(symbol: str, alert: Dict[str, Any]) -> Dict[str, Any]:
-    df = get_candle_df(symbol, n=120)
+    cols = candle_arrays(symbol, n=120)
+    close = cols["close"]
     feat: Dict[str, Any] = {}
-    if df.empty:
+    if not len(close):
         feat["recent_close"] = alert["price"]
         feat["vol_mult"] = 1.0
         feat["mom_z"] = 0.0
         feat["atr"] = 0.0
     else:
-        close = df["close"]
-        vol = float(df["vol"].iloc[-1]) if "vol" in df.columns else 1.0
-        returns = close.pct_change().fillna(0)
-        last_return = float(returns.iloc[-1]) if len(returns) else 0.0
-        std = float(returns.std()) if returns.std() not in (None, 0) else 0.0
+        vol_series = cols["vol"]
+        vol = float(vol_series[-1])
+        returns = np.zeros(len(close))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns[1:] = close[1:] / close[:-1] - 1.0
+        returns[~np.isfinite(returns)] = 0.0
+        last_return = float(returns[-1])
+        std = float(returns.std(ddof=1)) if len(returns) > 1 else 0.0
         z = (last_return - float(returns.mean())) / std if std else 0.0
-        feat["recent_close"] = float(close.iloc[-1])
-        rolling_vol = df["vol"].rolling(20).mean()
-        baseline_vol = float(rolling_vol.iloc[-1]) if len(df) >= 20 and rolling_vol.iloc[-1] > 0 else vol
+        feat["recent_close"] = float(close[-1])
+        baseline_vol = float(vol_series[-20:].mean()) if len(close) >= 20 else vol
+        if baseline_vol <= 0:
+            baseline_vol = vol
         feat["vol_mult"] = float(vol / baseline_vol) if baseline_vol else 1.0
         feat["mom_z"] = float(z)
-        feat["atr"] = float(atr(df["high"], df["low"], df["close"])) if len(df) >= 5 else 0.0
+        feat["atr"] = atr(cols["high"], cols["low"], close) if len(close) >= 5 else 0.0
+    feat.update(pattern_features(symbol))
+    feat.update(volume_profile_features(symbol, float(alert["price"])))
     feat["alert_side"] = 1 if alert["side"].lower() == "buy" else -1
     feat["alert_ts"] = alert.get("ts", now_s())
     feat["symbol"] = symbol
@@ -585,12 +2575,17 @@ def genome_vote(genome: Dict[str, Any], feat: Dict[str, Any], recent_alerts: Lis
     else:
         in_time = hour >= a or hour <= b
 
+    w_agree, w_volume, w_momentum, w_time = CHECK_WEIGHTS
     checks = [
-        (1.0, agree_fraction >= genome["require_agreement_fraction"]),
-        (0.8, volume_ok),
-        (0.6, momentum_ok),
-        (0.4, in_time),
+        (w_agree, agree_fraction >= genome["require_agreement_fraction"]),
+        (w_volume, volume_ok),
+        (w_momentum, momentum_ok),
+        (w_time, in_time),
     ]
+    pattern_bias = feat.get("pattern_bias", 0.0)
+    if pattern_bias:
+        # only counts while a recent chart pattern leans one way or the other
+        checks.append((genome["pattern_weight"], pattern_bias * feat["alert_side"] > 0))
     weight_sum = sum(weight for weight, _ in checks)
     score = sum(weight for weight, ok in checks if ok) / weight_sum if weight_sum else 0.0
 
@@ -602,30 +2597,58 @@ def genome_vote(genome: Dict[str, Any], feat: Dict[str, Any], recent_alerts: Lis
     return ("buy" if feat["alert_side"] > 0 else "sell", score)
 
 
-# ---------- Paper execution ----------
-def paper_execute(symbol: str, side: str, price: float, sl: float, tp: float, size: float, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    adjusted_size = clamp_contracts(size)
-    if adjusted_size <= 0:
-        return {}
-    trade = {
-        "id": next(trade_id_counter),
-        "ts": now_s(),
-        "symbol": symbol,
-        "side": side,
-        "entry": price,
-        "sl": sl,
-        "tp": tp,
-        "size": adjusted_size,
-        "status": "open",
-        "meta": meta or {},
-        "mode": engine_settings.get("execution_mode", "paper"),
-    }
-    paper_trades.append(trade)
-    register_open_trade(trade)
-    print("PAPER EXECUTE:", trade)
-    return trade
+VOTE_IGNORE, VOTE_SCALP, VOTE_SIDE = 0, 1, 2  # genome_votes action codes ("ignore", "scalp", the alert's side)
 
 
+def genome_votes(matrix: np.ndarray, feat: Dict[str, Any], recent_alerts: List[Dict[str, Any]]) -> tuple[np.ndarray, np.ndarray]:
+    """:func:`genome_vote` for every row of a population matrix at once.
+
+    Returns the action codes (``VOTE_*``) and the check scores.
+    """
+    gene = lambda name: matrix[:, GENE_INDEX[name]]  # noqa: E731
+    as_int = lambda name: np.rint(gene(name)).astype(np.int64)  # noqa: E731
+    side = "buy" if feat["alert_side"] == 1 else "sell"
+    alert_ts = np.sort(
+        np.array(
+            [
+                a.get("ts", 0)
+                for a in recent_alerts
+                if a.get("symbol") == feat.get("symbol") and a["side"].lower() == side
+            ],
+            dtype=float,
+        )
+    )
+    window_s = as_int("scalp_window")
+    same_side = len(alert_ts) - np.searchsorted(alert_ts, feat["alert_ts"] - window_s, side="left")
+    agree_fraction = same_side / np.maximum(1, as_int("confirm_count"))
+
+    hour = datetime.utcfromtimestamp(feat["alert_ts"]).hour
+    a, b = as_int("time_bias_start"), as_int("time_bias_end")
+    in_time = np.where(a <= b, (a <= hour) & (hour <= b), (hour >= a) | (hour <= b))
+
+    w_agree, w_volume, w_momentum, w_time = CHECK_WEIGHTS
+    passed = (
+        w_agree * (agree_fraction >= gene("require_agreement_fraction"))
+        + w_volume * (feat["vol_mult"] >= gene("min_volume_mult"))
+        + w_momentum * (abs(feat["mom_z"]) >= gene("momentum_z"))
+        + w_time * in_time
+    )
+    weight_sum = np.full(len(matrix), float(sum(CHECK_WEIGHTS)))
+    pattern_bias = feat.get("pattern_bias", 0.0)
+    if pattern_bias:
+        pattern_weight = gene("pattern_weight")
+        weight_sum = weight_sum + pattern_weight
+        if pattern_bias * feat["alert_side"] > 0:
+            passed = passed + pattern_weight
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = np.where(weight_sum != 0, passed / weight_sum, 0.0)
+
+    is_scalp = (window_s <= SCALP_MAX_SECONDS) | (gene("scalp_aggressiveness") > 0.7)
+    actions = np.where(score < 0.2, VOTE_IGNORE, np.where((score < 0.6) & is_scalp, VOTE_SCALP, VOTE_SIDE))
+    return actions, score
+
+
+# ---------- Position sizing ----------
 def resolve_position_size(bot_cfg: Dict[str, Any], entry_price: float, stop_price: float) -> float:
     per_unit_risk = abs(entry_price - stop_price)
     if per_unit_risk <= 0:
@@ -638,51 +2661,6 @@ def resolve_position_size(bot_cfg: Dict[str, Any], entry_price: float, stop_pric
     return float(size) if size >= bot_cfg.get("min_size", 0.0) else 0.0
 
 
-def execute_for_bots(
-    symbol: str,
-    side: str,
-    price: float,
-    sl: float,
-    tp: float,
-    feat: Dict[str, Any],
-    meta: Dict[str, Any],
-) -> List[Dict[str, Any]]:
-    executed: List[Dict[str, Any]] = []
-    is_scalp = meta.get("is_scalp", False)
-    for name, bot_cfg in bots.items():
-        if not bot_cfg.get("active", True):
-            continue
-        if bot_cfg["symbol"] != symbol:
-            continue
-        mode = bot_cfg.get("mode", "auto")
-        if mode == "scalp_only" and not is_scalp:
-            continue
-        if mode == "swing_only" and is_scalp:
-            continue
-        side_bias = bot_cfg.get("side_bias", "both")
-        if side_bias == "long" and side != "buy":
-            continue
-        if side_bias == "short" and side != "sell":
-            continue
-        if should_halt_trading():
-            break
-        if not bot_allows_trade(bot_cfg, side, symbol):
-            continue
-        size = resolve_position_size(bot_cfg, price, sl)
-        size = clamp_contracts(size)
-        if size <= 0:
-            continue
-        trade_meta = {**meta, "source": "bot", "bot": name}
-        trade = paper_execute(symbol, side, price, sl, tp, size=size, meta=trade_meta)
-        if not trade:
-            continue
-        state = bot_state.setdefault(name, {})
-        state.setdefault("trades", []).append(trade["id"])
-        state["last_trade_ts"] = trade.get("ts")
-        executed.append(trade)
-    return executed
-
-
 # ---------- Evaluation function ----------
 def evaluate_on_short_forward(symbol: str, decision: tuple[str, float], feat: Dict[str, Any]) -> float:
     action, confidence = decision
@@ -693,276 +2671,1862 @@ def evaluate_on_short_forward(symbol: str, decision: tuple[str, float], feat: Di
     score = expected_hit_prob * atr_val - (1 - expected_hit_prob) * atr_val * 0.5
     return score
 
-# ---------- Alert model & endpoints ----------
-class AlertModel(BaseModel):
-    strategy: str
-    symbol: str
-    side: Literal["buy", "sell"]
-    price: float
-    ts: Optional[int] = None
-    meta: Dict[str, Any] = Field(default_factory=dict)
 
+def forward_fitness(actions: np.ndarray, confidence: np.ndarray, feat: Dict[str, Any]) -> np.ndarray:
+    """:func:`evaluate_on_short_forward` for a whole vote (see :func:`genome_votes`)."""
+    atr_val = max(1e-6, feat.get("atr", 0.0001))
+    expected_hit_prob = np.minimum(0.95, 0.1 + confidence * 0.9)
+    score = expected_hit_prob * atr_val - (1 - expected_hit_prob) * atr_val * 0.5
+    return np.where(actions == VOTE_IGNORE, -0.1, score)
+
+# ---------- Engine (per-account state) ----------
+class Engine:
+    """Decision, evolution, bot and risk state for one account.
+
+    Engines share the module-level market data (``candles``, ``alerts_log``
+    and the features computed from them) and the single ingest writer: a tick
+    is merged into the candle store once and then marked against every
+    registered engine, and an alert is featurized once and then voted on by
+    each engine's own population. Each engine keeps its own settings, bots,
+    trades, portfolio, population and evolution schedule.
+
+    Each engine evolves with its own generator (populations are built in
+    worker threads, and a ``Generator`` is not thread-safe): seeded from
+    ``seed``, or else spawned from the shared one on first use so that
+    :func:`seed_evolution` still makes runs reproducible. ``clock``
+    (wall time by default) stamps its signals and trades; replays drive it
+    from the recorded event times.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        settings: Optional[Mapping[str, Any]] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.name = name
+        self.settings: Dict[str, Any] = dict(ENGINE_SETTINGS_DEFAULTS)
+        self.bots: Dict[str, Dict[str, Any]] = {}
+        self.bot_state: Dict[str, Dict[str, Any]] = {}
+        self.bot_routes: Dict[tuple[str, str, str], BotRoute] = {}
+        self._bot_routes_dirty = True
+        self.open_trades: List[Dict[str, Any]] = []
+        self.paper_trades: List[Dict[str, Any]] = []
+        self.signal_log: deque = deque(maxlen=500)
+        self.generation_stats: Dict[str, Any] = {
+            "generation": 0,
+            "realized": 0.0,
+            "min_equity": 0.0,
+            "wins": 0,
+            "losses": 0,
+        }
+        self.portfolio = Portfolio()
+        self.analytics = TradeAnalytics()
+        self.population = PopulationSnapshot([], np.empty((0, 0)), np.zeros(0), 0)
+        self.scheduler = EvolutionScheduler()
+        self.seed = seed
+        self._rng: Optional[np.random.Generator] = None
+        self.evolve_task: Optional[asyncio.Task] = None
+        self.version = touch_state()  # global state version of this engine's last change (never reused)
+        self.marks_version = 0  # bumped when marks move the unrealized PnL of open positions
+        self.clock: Callable[[], float] = time.time
+        if settings:
+            self.update_settings(dict(settings))
+
+    def now(self) -> int:
+        return int(self.clock())
+
+    @property
+    def rng(self) -> np.random.Generator:
+        if self._rng is None:
+            self._rng = np.random.default_rng(self.seed) if self.seed is not None else evolution_generator().spawn(1)[0]
+        return self._rng
+
+    def reset_rng(self) -> None:
+        self._rng = None
+
+    def touch(self) -> int:
+        """Mark this engine's read models changed (and the shared state version)."""
+        self.version = touch_state()
+        return self.version
+
+    def read_version(self, kind: str) -> tuple[int, ...]:
+        """Cache version of one read model; marks only move the ones that
+        show unrealized PnL (``MARKED_READ_MODELS``), and analytics also
+        moves when a trade ages out of a rolling window."""
+        if kind in MARKED_READ_MODELS:
+            return (self.version, self.marks_version)
+        if kind == "analytics":
+            return (self.version, *self.analytics.window_counts(self.now()))
+        return (self.version,)
+
+    # ----- settings -----
+    def update_settings(self, update: Dict[str, Any]) -> Dict[str, Any]:
+        engine_settings = self.settings
+        if not update:
+            return dict(engine_settings)
+        self.touch()
+        for key, value in update.items():
+            if key not in ENGINE_SETTING_KEYS:
+                continue
+            if key in {"min_contracts", "max_contracts"}:
+                if value is None:
+                    continue
+                try:
+                    numeric = int(value)
+                except (TypeError, ValueError):
+                    continue
+                engine_settings[key] = max(0, numeric)
+                continue
+            if key in {"risk_cap", "max_drawdown", "coalesce_ms"}:
+                if value is None:
+                    engine_settings[key] = 0.0
+                else:
+                    try:
+                        engine_settings[key] = max(0.0, float(value))
+                    except (TypeError, ValueError):
+                        continue
+                continue
+            if key == "execution_mode":
+                if value in ENGINE_MODES:
+                    engine_settings[key] = value
+                continue
+            if key == "show_signals":
+                engine_settings[key] = bool(value)
+                continue
+            if key in {"live_account_id", "live_contract_id", "live_endpoint", "time_in_force"}:
+                if value is None:
+                    engine_settings[key] = None
+                else:
+                    text = str(value).strip()
+                    engine_settings[key] = text or None
+                continue
+            engine_settings[key] = value
+
+        min_contracts = int(engine_settings.get("min_contracts", 0) or 0)
+        max_contracts = int(engine_settings.get("max_contracts", min_contracts) or min_contracts)
+        if max_contracts < min_contracts:
+            max_contracts = min_contracts
+        engine_settings["min_contracts"] = max(0, min_contracts)
+        engine_settings["max_contracts"] = max(engine_settings["min_contracts"], max_contracts)
+
+        tif = engine_settings.get("time_in_force")
+        if isinstance(tif, str):
+            stripped = tif.strip()
+            engine_settings["time_in_force"] = stripped or "Day"
+        else:
+            engine_settings["time_in_force"] = "Day"
 
-@app.post("/alert")
-async def receive_alert(alert_model: AlertModel, request: Request):
-    alert = alert_model.dict()
-    alert["ts"] = alert["ts"] or now_s()
-    alerts_log.appendleft(alert)
+        return dict(engine_settings)
 
-    feat = features_from_context(alert["symbol"], alert)
-    recent_alerts = list(alerts_log)[:200]
+    def snapshot(self) -> Dict[str, Any]:
+        # record_trade_close removes closed trades, so open_trades only holds open ones
+        return {
+            "settings": dict(self.settings),
+            "stats": dict(self.generation_stats),
+            "halted": self.should_halt_trading(),
+            "open_trades": list(self.open_trades),
+            "portfolio": self.portfolio.snapshot(),
+        }
 
-    votes: List[tuple[int, tuple[str, float]]] = []
-    for idx, genome in enumerate(population):
-        decision = genome_vote(genome, feat, recent_alerts)
-        votes.append((idx, decision))
-        fitness = evaluate_on_short_forward(alert["symbol"], decision, feat)
-        pop_scores[idx] = pop_scores[idx] * 0.9 + fitness * 0.1
-
-    if not votes:
-        return {"status": "no_population"}
-
-    best_idx = int(np.argmax(pop_scores))
-    best_genome = population[best_idx]
-    best_decision = genome_vote(best_genome, feat, recent_alerts)
-    execute_votes = sum(1 for _, decision in votes if decision[0] != "ignore")
-    consensus = execute_votes / len(population)
-
-    execution_mode = engine_settings.get("execution_mode", "alerts")
-    signal_payload = {
-        "symbol": alert["symbol"],
-        "side": "buy" if feat["alert_side"] > 0 else "sell",
-        "price": float(alert["price"]),
-        "consensus": consensus,
-        "confidence": best_decision[1],
-        "genome": best_idx,
-        "mode": execution_mode,
-    }
+    def dispatch_live_order(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return dispatch_live_order(payload, self.settings.get("live_endpoint") or "")
+
+    # ----- bots -----
+    def register_bot(self, config: Any) -> Dict[str, Any]:
+        """Insert or replace a bot configuration and ensure state tracking.
+
+        ``config`` is a validated ``BotConfigModel`` (HTTP layer) or a trusted
+        mapping such as ``DEFAULT_BOTS``, which is completed from ``BOT_DEFAULTS``.
+        """
+        record = {**BOT_DEFAULTS, **config} if isinstance(config, Mapping) else config.model_dump()
+        self.bots[record["name"]] = record
+        self.invalidate_bot_routes()
+        self.touch()
+        state = self.bot_state.setdefault(record["name"], {})
+        state.setdefault("trades", [])
+        state.setdefault("realized_pnl", 0.0)
+        state.setdefault("last_trade_ts", None)
+        state.setdefault("wins", 0)
+        state.setdefault("losses", 0)
+        return record
 
-    if should_halt_trading():
-        signal_payload["status"] = "halted"
-        record_signal(signal_payload)
-        return {
-            "status": "halted",
-            "halted": True,
+    def init_default_bots(self) -> None:
+        for bot in DEFAULT_BOTS:
+            self.register_bot(bot)
+
+    def set_bot_active(self, name: str, active: bool) -> None:
+        self.bots[name]["active"] = active
+        self.invalidate_bot_routes()
+        self.touch()
+
+    def invalidate_bot_routes(self) -> None:
+        """Mark the routing index stale; call after any change to ``bots``."""
+        self._bot_routes_dirty = True
+
+    def rebuild_bot_routes(self) -> Dict[tuple[str, str, str], BotRoute]:
+        grouped: Dict[tuple[str, str, str], List[Dict[str, Any]]] = {}
+        for cfg in self.bots.values():
+            if not cfg.get("active", True):
+                continue
+            for style in BOT_MODE_STYLES.get(cfg.get("mode", "auto"), ()):
+                for side in BOT_BIAS_SIDES.get(cfg.get("side_bias", "both"), ()):
+                    grouped.setdefault((cfg["symbol"], style, side), []).append(cfg)
+
+        routes: Dict[tuple[str, str, str], BotRoute] = {}
+        for key, cfgs in grouped.items():
+            routes[key] = BotRoute(
+                names=[cfg["name"] for cfg in cfgs],
+                risk_capital=np.array(
+                    [cfg["capital"] * cfg["risk_fraction"] * cfg.get("leverage", 1.0) for cfg in cfgs], dtype=float
+                ),
+                max_size=np.array([cfg.get("max_size", math.inf) for cfg in cfgs], dtype=float),
+                min_size=np.array([cfg.get("min_size", 0.0) for cfg in cfgs], dtype=float),
+                filtered=np.array([bool(cfg.get("algo")) for cfg in cfgs], dtype=bool),
+            )
+        self.bot_routes = routes
+        self._bot_routes_dirty = False
+        return routes
+
+    def bot_route(self, symbol: str, is_scalp: bool, side: str) -> Optional[BotRoute]:
+        if self._bot_routes_dirty:
+            self.rebuild_bot_routes()
+        return self.bot_routes.get((symbol, "scalp" if is_scalp else "swing", side))
+
+    # ----- risk -----
+    def clamp_contracts(self, size: float) -> float:
+        if size is None:
+            return 0.0
+        numeric = abs(float(size))
+        floor = max(1, int(self.settings.get("min_contracts") or 1))
+        cap = max(floor, int(self.settings.get("max_contracts") or floor))
+        if numeric <= 0:
+            return 0.0
+        return float(min(max(numeric, floor), cap))
+
+    def clamp_contracts_array(self, sizes: np.ndarray) -> np.ndarray:
+        """Vectorized :meth:`clamp_contracts` for a batch of sizes."""
+        numeric = np.abs(np.asarray(sizes, dtype=float))
+        floor = max(1, int(self.settings.get("min_contracts") or 1))
+        cap = max(floor, int(self.settings.get("max_contracts") or floor))
+        return np.where(numeric > 0, np.clip(numeric, floor, cap), 0.0)
+
+    def reset_generation_state(self) -> None:
+        stats = self.generation_stats
+        stats["generation"] = self.population.generation
+        stats["realized"] = 0.0
+        stats["min_equity"] = 0.0
+        stats["wins"] = 0
+        stats["losses"] = 0
+
+    def should_halt_trading(self) -> bool:
+        """Halt on realized plus open (marked) losses beyond ``risk_cap`` or on a
+        marked drawdown beyond ``max_drawdown``."""
+        try:
+            cap = float(self.settings.get("risk_cap", 0))
+        except (TypeError, ValueError):
+            cap = 0.0
+        if cap > 0 and self.generation_stats.get("realized", 0.0) + self.portfolio.unrealized <= -abs(cap):
+            return True
+        try:
+            max_drawdown = float(self.settings.get("max_drawdown", 0) or 0)
+        except (TypeError, ValueError):
+            max_drawdown = 0.0
+        return max_drawdown > 0 and self.portfolio.drawdown >= max_drawdown
+
+    # ----- trades -----
+    def record_signal(self, event: Dict[str, Any]) -> None:
+        if not self.settings.get("show_signals", True):
+            return
+        event = dict(event)
+        event.setdefault("ts", self.now())
+        self.signal_log.append(event)
+        self.touch()
+
+    def register_open_trade(self, trade: Dict[str, Any]) -> None:
+        self.open_trades.append(trade)
+        self.portfolio.open(trade)
+        self.touch()
+
+    def record_trade_close(
+        self,
+        trade: Dict[str, Any],
+        exit_price: float,
+        exit_reason: str,
+        exit_ts: Optional[int] = None,
+    ) -> None:
+        """Close ``trade``; ``exit_ts`` is the fill time when it is known (a
+        candle-resolved fill), otherwise now."""
+        if trade.get("status") == "closed":
+            return
+        trade["status"] = "closed"
+        trade["exit"] = exit_price
+        trade["exit_reason"] = exit_reason
+        trade["exit_ts"] = self.now() if exit_ts is None else int(exit_ts)
+        side_multiplier = 1 if trade.get("side") == "buy" else -1
+        tick_value = float(trade.get("meta", {}).get("tickValue", 1.0))
+        pnl = (exit_price - trade["entry"]) * side_multiplier * trade["size"] * tick_value
+        trade["pnl"] = pnl
+        self.touch()
+
+        generation_stats = self.generation_stats
+        generation_stats["realized"] += pnl
+        self.portfolio.close(trade, pnl)
+        generation_stats["min_equity"] = min(generation_stats["min_equity"], generation_stats["realized"])
+        self.analytics.record(trade, pnl)
+
+        bot_id = trade.get("meta", {}).get("bot")
+        if bot_id:
+            state = self.bot_state.setdefault(bot_id, {})
+            state.setdefault("realized_pnl", 0.0)
+            state.setdefault("wins", 0)
+            state.setdefault("losses", 0)
+            state.setdefault("last_trade_ts", trade.get("exit_ts"))
+            state["realized_pnl"] += pnl
+            if pnl >= 0:
+                state["wins"] = state.get("wins", 0) + 1
+                generation_stats["wins"] += 1
+            else:
+                state["losses"] = state.get("losses", 0) + 1
+                generation_stats["losses"] += 1
+            state["last_trade_ts"] = trade.get("exit_ts")
+
+        try:
+            self.open_trades.remove(trade)
+        except ValueError:
+            pass
+
+    def evaluate_open_trades(self, symbol: str, price: float) -> None:
+        if not self.open_trades:
+            return
+        snapshot = list(self.open_trades)
+        for trade in snapshot:
+            if trade.get("symbol") != symbol or trade.get("status") != "open":
+                continue
+            side = trade.get("side")
+            sl = trade.get("sl")
+            tp = trade.get("tp")
+            if side == "buy":
+                if is_finite(sl) and price <= float(sl):
+                    self.record_trade_close(trade, float(sl), "stop")
+                    continue
+                if is_finite(tp) and price >= float(tp):
+                    self.record_trade_close(trade, float(tp), "target")
+            elif side == "sell":
+                if is_finite(sl) and price >= float(sl):
+                    self.record_trade_close(trade, float(sl), "stop")
+                    continue
+                if is_finite(tp) and price <= float(tp):
+                    self.record_trade_close(trade, float(tp), "target")
+
+    def resolve_open_trades(self, symbol: str, rule: Optional[str] = None) -> int:
+        """Close open ``symbol`` trades whose brackets the candle store already
+        shows as hit (see :func:`resolve_brackets`); returns how many closed."""
+        trades = [t for t in self.open_trades if t.get("symbol") == symbol and t.get("status") == "open"]
+        if not trades:
+            return 0
+        opened = min(int(t["ts"]) for t in trades)
+        history = candle_history(symbol, start=opened - opened % CANDLE_SECONDS)
+        fills = resolve_brackets(
+            [t["entry"] for t in trades],
+            [t["side"] for t in trades],
+            [t["sl"] if is_finite(t.get("sl")) else math.nan for t in trades],
+            [t["tp"] if is_finite(t.get("tp")) else math.nan for t in trades],
+            [t["ts"] for t in trades],
+            {name: history[key] for key, name in CANDLE_COLUMNS.items()},
+            rule,
+        )
+        closed = np.flatnonzero(fills["bar"] >= 0).tolist()
+        for idx in closed:
+            self.record_trade_close(
+                trades[idx], float(fills["exit"][idx]), str(fills["reason"][idx]), int(fills["exit_ts"][idx])
+            )
+        return len(closed)
+
+    def mark(self, symbol: str, h: float, l: float, c: float) -> None:
+        """Mark positions and check open brackets after a (collapsed) tick."""
+        self.portfolio.mark(symbol, c)
+        position = self.portfolio.symbols.get(symbol)
+        if position is not None and position.open_count:
+            self.marks_version += 1  # unrealized PnL moved; other read models stay cached
+        if h != l:
+            # collapsed ticks: the path between extremes is unknown, so check both
+            self.evaluate_open_trades(symbol, l)
+            self.evaluate_open_trades(symbol, h)
+        self.evaluate_open_trades(symbol, c)
+
+    def paper_execute(
+        self,
+        symbol: str,
+        side: str,
+        price: float,
+        sl: float,
+        tp: float,
+        size: float,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        adjusted_size = self.clamp_contracts(size)
+        if adjusted_size <= 0:
+            return {}
+        trade = {
+            "id": next(trade_id_counter),
+            "ts": self.now(),
+            "symbol": symbol,
+            "side": side,
+            "entry": price,
+            "sl": sl,
+            "tp": tp,
+            "size": adjusted_size,
+            "status": "open",
+            "meta": meta or {},
+            "mode": self.settings.get("execution_mode", "paper"),
+        }
+        self.paper_trades.append(trade)
+        self.register_open_trade(trade)
+        engine_log("fills").info("paper execute: %s", trade)
+        return trade
+
+    def size_route_positions(self, route: BotRoute, entry_price: float, stop_price: float) -> np.ndarray:
+        """Size every bot in ``route`` at once, matching :func:`resolve_position_size`
+        followed by :meth:`clamp_contracts`."""
+        per_unit_risk = abs(entry_price - stop_price)
+        if per_unit_risk <= 0:
+            return np.zeros(len(route.names))
+        sizes = np.minimum(route.risk_capital / per_unit_risk, route.max_size)
+        sizes = np.where(sizes >= route.min_size, sizes, 0.0)
+        return self.clamp_contracts_array(sizes)
+
+    def execute_for_bots(
+        self,
+        symbol: str,
+        side: str,
+        price: float,
+        sl: float,
+        tp: float,
+        feat: Dict[str, Any],
+        meta: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        executed: List[Dict[str, Any]] = []
+        route = self.bot_route(symbol, meta.get("is_scalp", False), side)
+        if route is None or self.should_halt_trading():
+            return executed
+        sizes = self.size_route_positions(route, price, sl)
+        for idx in np.flatnonzero(sizes > 0).tolist():
+            name = route.names[idx]
+            if route.filtered[idx] and not bot_allows_trade(self.bots[name], side, symbol):
+                continue
+            trade_meta = {**meta, "source": "bot", "bot": name}
+            trade = self.paper_execute(symbol, side, price, sl, tp, size=float(sizes[idx]), meta=trade_meta)
+            if not trade:
+                continue
+            state = self.bot_state.setdefault(name, {})
+            state.setdefault("trades", []).append(trade["id"])
+            state["last_trade_ts"] = trade.get("ts")
+            executed.append(trade)
+        return executed
+
+    # ----- population -----
+    def init_population(self) -> None:
+        matrix = random_population(POP_SIZE, self.rng)
+        self.publish_population(PopulationSnapshot(GenomeRows(matrix), matrix, np.zeros(POP_SIZE), 0))
+
+    def publish_population(self, snapshot: PopulationSnapshot) -> PopulationSnapshot:
+        """Atomically swap in a fully built population snapshot.
+
+        Readers grab ``population`` once and keep using that snapshot, so a
+        swap never changes the genomes or scores underneath an in-flight alert.
+        """
+        self.population = snapshot
+        self.touch()
+        self.generation_stats["generation"] = snapshot.generation
+        return snapshot
+
+    async def evolve_loop(self) -> None:
+        import asyncio
+
+        scheduler = self.scheduler
+        while True:
+            reason = scheduler.due()
+            if reason is None:
+                await scheduler.wait()
+                continue
+            snapshot = self.population
+            if not snapshot.genomes:
+                scheduler.mark_evolved(reason)
+                continue
+            # Build off the event loop so alert scoring never stalls on a large
+            # population; alerts keep scoring the current snapshot meanwhile.
+            consumed = scheduler.alerts_since
+            next_snapshot = await asyncio.to_thread(build_next_population, snapshot, self.rng)
+            # back on the loop: inherit the parents' latest scores, including
+            # alerts scored during the build, and keep those alerts counted
+            next_snapshot = next_snapshot._replace(scores=inherited_scores(snapshot.scores, next_snapshot.lineage))
+            self.publish_population(next_snapshot)
+            scheduler.mark_evolved(reason, consumed=consumed)
+            engine_log("evolve").info("%s: generation %d ready (%s)", self.name, next_snapshot.generation, reason)
+
+    def start_evolution(self) -> asyncio.Task:
+        import asyncio
+
+        if self.evolve_task is None or self.evolve_task.done():
+            self.evolve_task = asyncio.create_task(self.evolve_loop())
+        return self.evolve_task
+
+    async def stop_evolution(self) -> None:
+        import asyncio
+
+        if self.evolve_task:
+            self.evolve_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.evolve_task
+            self.evolve_task = None
+
+    # ----- decisions -----
+    def handle_alert(
+        self,
+        alerts: List[Dict[str, Any]],
+        alert: Dict[str, Any],
+        feat: Dict[str, Any],
+        recent_alerts: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Vote on an already featurized alert batch and act on the result."""
+        snapshot = self.population
+        scores = snapshot.scores
+        if not len(snapshot.genomes):
+            return {"status": "no_population"}
+        actions, confidence = genome_votes(snapshot.matrix, feat, recent_alerts)
+        scores *= 0.9  # in place: an evolution build in flight inherits these scores
+        scores += forward_fitness(actions, confidence, feat) * 0.1
+        self.scheduler.note_alert(float(scores.mean()))
+
+        best_idx = int(np.argmax(scores))
+        best_genome = snapshot.genomes[best_idx]
+        side_name = "buy" if feat["alert_side"] > 0 else "sell"
+        best_decision = (("ignore", "scalp", side_name)[actions[best_idx]], float(confidence[best_idx]))
+        consensus = int(np.count_nonzero(actions != VOTE_IGNORE)) / len(snapshot.genomes)
+
+        engine_settings = self.settings
+        execution_mode = engine_settings.get("execution_mode", "alerts")
+        signal_payload = {
+            "symbol": alert["symbol"],
+            "side": "buy" if feat["alert_side"] > 0 else "sell",
+            "price": float(alert["price"]),
             "consensus": consensus,
-            "best": best_decision,
+            "confidence": best_decision[1],
+            "genome": best_idx,
+            "generation": snapshot.generation,
+            "mode": execution_mode,
         }
+        if len(alerts) > 1:
+            signal_payload["batch_size"] = len(alerts)
 
-    if consensus < MIN_CONFIRM_SCORE and best_decision[1] < 0.85:
-        signal_payload["status"] = "filtered"
-        record_signal(signal_payload)
-        return {"status": "no_action", "consensus": consensus, "best": best_decision}
+        if self.should_halt_trading():
+            signal_payload["status"] = "halted"
+            self.record_signal(signal_payload)
+            return {
+                "status": "halted",
+                "halted": True,
+                "consensus": consensus,
+                "best": best_decision,
+            }
 
-    action = best_decision[0]
-    if action == "ignore":
-        signal_payload["status"] = "ignored"
-        record_signal(signal_payload)
-        return {"status": "no_action", "consensus": consensus, "best": best_decision}
+        if consensus < MIN_CONFIRM_SCORE and best_decision[1] < 0.85:
+            signal_payload["status"] = "filtered"
+            self.record_signal(signal_payload)
+            return {"status": "no_action", "consensus": consensus, "best": best_decision}
 
-    side = signal_payload["side"]
-    is_scalp = action == "scalp" or best_genome["scalp_window"] <= SCALP_MAX_SECONDS or best_genome["scalp_aggressiveness"] > 0.7
+        action = best_decision[0]
+        if action == "ignore":
+            signal_payload["status"] = "ignored"
+            self.record_signal(signal_payload)
+            return {"status": "no_action", "consensus": consensus, "best": best_decision}
 
-    price = float(alert["price"])
-    atr_value = feat.get("atr", 0.0001) or 0.0001
+        side = signal_payload["side"]
+        is_scalp = action == "scalp" or best_genome["scalp_window"] <= SCALP_MAX_SECONDS or best_genome["scalp_aggressiveness"] > 0.7
 
-    if best_genome["use_atr_sl"]:
-        base_sl_distance = max(1e-6, best_genome["sl_mult"] * atr_value)
-        base_tp_distance = max(1e-6, best_genome["tp_mult"] * atr_value)
-    else:
-        base_sl_distance = max(1e-6, price * (best_genome["sl_mult"] / 100.0))
-        base_tp_distance = max(1e-6, price * (best_genome["tp_mult"] / 100.0))
+        price = float(alert["price"])
+        atr_value = feat.get("atr", 0.0001) or 0.0001
 
-    if is_scalp:
-        base_sl_distance *= 0.5
-        base_tp_distance *= 0.6
+        if best_genome["use_atr_sl"]:
+            base_sl_distance = max(1e-6, best_genome["sl_mult"] * atr_value)
+            base_tp_distance = max(1e-6, best_genome["tp_mult"] * atr_value)
+        else:
+            base_sl_distance = max(1e-6, price * (best_genome["sl_mult"] / 100.0))
+            base_tp_distance = max(1e-6, price * (best_genome["tp_mult"] / 100.0))
 
-    if side == "buy":
-        sl = price - base_sl_distance
-        tp = price + base_tp_distance
-    else:
-        sl = price + base_sl_distance
-        tp = price - base_tp_distance
-
-    trade_meta = {
-        "source": "engine",
-        "genome": best_idx,
-        "consensus": consensus,
-        "confidence": best_decision[1],
-        "is_scalp": is_scalp,
-        "strategy": alert.get("strategy"),
-        "execution_mode": execution_mode,
-    }
+        if is_scalp:
+            base_sl_distance *= 0.5
+            base_tp_distance *= 0.6
+
+        if side == "buy":
+            sl = price - base_sl_distance
+            tp = price + base_tp_distance
+        else:
+            sl = price + base_sl_distance
+            tp = price - base_tp_distance
+        if best_genome["value_area_brackets"]:
+            sl, tp = value_area_brackets(side, price, sl, tp, feat)
+
+        trade_meta = {
+            "source": "engine",
+            "genome": best_idx,
+            "genome_id": genome_id(best_genome),
+            "generation": snapshot.generation,
+            "consensus": consensus,
+            "confidence": best_decision[1],
+            "is_scalp": is_scalp,
+            "strategy": alert.get("strategy"),
+            "execution_mode": execution_mode,
+        }
+
+        if execution_mode == "alerts":
+            signal_payload.update({"status": "signal_only", "sl": sl, "tp": tp})
+            self.record_signal(signal_payload)
+            return {
+                "status": "signal_only",
+                "consensus": consensus,
+                "best_decision": best_decision,
+                "execution_mode": execution_mode,
+            }
+
+        engine_size = self.clamp_contracts(engine_settings.get("min_contracts", 1))
+        engine_trade = self.paper_execute(alert["symbol"], side, price, sl, tp, size=engine_size, meta=trade_meta)
+        bot_trades = self.execute_for_bots(alert["symbol"], side, price, sl, tp, feat, trade_meta)
+
+        live_result: Optional[Dict[str, Any]] = None
+        if execution_mode == "live":
+            account_id = engine_settings.get("live_account_id")
+            contract_id = engine_settings.get("live_contract_id")
+            if account_id and contract_id and engine_trade:
+                order_payload = {
+                    "accountId": account_id,
+                    "contractId": contract_id,
+                    "side": side,
+                    "size": engine_trade.get("size"),
+                    "type": "market",
+                    "timeInForce": engine_settings.get("time_in_force", "Day"),
+                    "meta": trade_meta,
+                }
+                if is_finite(sl):
+                    order_payload["stopLoss"] = sl
+                if is_finite(tp):
+                    order_payload["takeProfit"] = tp
+                order_payload["price"] = price
+                live_result = self.dispatch_live_order(order_payload)
+            else:
+                live_result = {"status": "skipped", "reason": "missing_account_or_contract"}
+
+        signal_payload.update(
+            {
+                "status": "executed",
+                "trade_id": engine_trade.get("id") if engine_trade else None,
+                "bot_trades": len(bot_trades),
+            }
+        )
+        if live_result:
+            signal_payload["live_status"] = live_result.get("status")
+        self.record_signal(signal_payload)
 
-    if execution_mode == "alerts":
-        signal_payload.update({"status": "signal_only", "sl": sl, "tp": tp})
-        record_signal(signal_payload)
         return {
-            "status": "signal_only",
+            "status": "executed_live" if execution_mode == "live" else "executed_paper",
+            "engine_trade": engine_trade,
+            "bot_trades": bot_trades,
+            "best_genome_idx": best_idx,
             "consensus": consensus,
             "best_decision": best_decision,
             "execution_mode": execution_mode,
+            "live_order": live_result,
+            "halted": False,
         }
 
-    engine_size = clamp_contracts(engine_settings.get("min_contracts", 1))
-    engine_trade = paper_execute(alert["symbol"], side, price, sl, tp, size=engine_size, meta=trade_meta)
-    bot_trades = execute_for_bots(alert["symbol"], side, price, sl, tp, feat, trade_meta)
-
-    live_result: Optional[Dict[str, Any]] = None
-    if execution_mode == "live":
-        account_id = engine_settings.get("live_account_id")
-        contract_id = engine_settings.get("live_contract_id")
-        if account_id and contract_id and engine_trade:
-            order_payload = {
-                "accountId": account_id,
-                "contractId": contract_id,
-                "side": side,
-                "size": engine_trade.get("size"),
-                "type": "market",
-                "timeInForce": engine_settings.get("time_in_force", "Day"),
-                "meta": trade_meta,
+    # ----- read models -----
+    def build_status(self) -> Dict[str, Any]:
+        snapshot = self.snapshot()
+        population = self.population
+        snapshot.update(
+            {
+                "engine": self.name,
+                "population_size": len(population.genomes),
+                "generation": population.generation,
+                "best_score": float(population.scores.max()) if len(population.scores) else None,
+                "evolution": self.scheduler.describe(),
+                "paper_trades": len(self.paper_trades),
+                "bots": {name: {k: v for k, v in cfg.items() if k != "description"} for name, cfg in self.bots.items()},
             }
-            if is_finite(sl):
-                order_payload["stopLoss"] = sl
-            if is_finite(tp):
-                order_payload["takeProfit"] = tp
-            order_payload["price"] = price
-            live_result = dispatch_live_order(order_payload)
-        else:
-            live_result = {"status": "skipped", "reason": "missing_account_or_contract"}
+        )
+        return snapshot
 
-    signal_payload.update(
-        {
-            "status": "executed",
-            "trade_id": engine_trade.get("id") if engine_trade else None,
-            "bot_trades": len(bot_trades),
+    def build_bot_list(self) -> Dict[str, Any]:
+        return {
+            "bots": [
+                {
+                    **cfg,
+                    "state": {**self.bot_state.get(name, {}), "unrealized_pnl": self.portfolio.bot_unrealized(name)},
+                }
+                for name, cfg in self.bots.items()
+            ]
         }
-    )
-    if live_result:
-        signal_payload["live_status"] = live_result.get("status")
-    record_signal(signal_payload)
 
-    return {
-        "status": "executed_live" if execution_mode == "live" else "executed_paper",
-        "engine_trade": engine_trade,
-        "bot_trades": bot_trades,
-        "best_genome_idx": best_idx,
-        "consensus": consensus,
-        "best_decision": best_decision,
-        "execution_mode": execution_mode,
-        "live_order": live_result,
-        "halted": False,
-    }
+    def build_signal_list(self, limit: int) -> Dict[str, Any]:
+        entries = list(self.signal_log)[-limit:]
+        entries.reverse()
+        return {"signals": entries}
 
+    def build_paper_trades(self, limit: int) -> Dict[str, Any]:
+        return {"trades": self.paper_trades[-limit:]}
 
-@app.post("/tick")
-async def receive_tick(payload: Dict[str, Any]):
-    try:
-        sym = payload["symbol"]
-        price = float(payload["price"])
-        ts = payload.get("ts")
-        add_tick(sym, price, payload.get("size", 1), ts)
-        evaluate_open_trades(sym, price)
-        return {"ok": True}
-    except Exception as exc:
-        return {"ok": False, "err": str(exc)}
+    def build_analytics(self) -> Dict[str, Any]:
+        return self.analytics.describe(self.now())
 
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "execution_mode": self.settings.get("execution_mode"),
+            "generation": self.population.generation,
+            "bots": len(self.bots),
+            "open_trades": len(self.open_trades),
+            "equity": self.portfolio.equity,
+            "halted": self.should_halt_trading(),
+        }
+
+
+# engines fed by the shared ingest writer, in registration order
+engines: Dict[str, Engine] = {}
+
+
+def engines_version() -> tuple:
+    """Cache version of the engine list (registry plus each engine's marked state)."""
+    return tuple((target.name, target.version, target.marks_version) for target in engines.values())
+
+
+def create_engine(
+    name: str,
+    settings: Optional[Mapping[str, Any]] = None,
+    seed: Optional[int] = None,
+) -> Engine:
+    """Register a new engine; it sees every tick and broadcast alert from now on."""
+    if name in engines:
+        raise ValueError(f"engine {name!r} already exists")
+    engines[name] = created = Engine(name, settings, seed)
+    touch_state()
+    return created
+
+
+def remove_engine(name: str) -> Engine:
+    if name == DEFAULT_ENGINE:
+        raise ValueError("the default engine cannot be removed")
+    touch_state()
+    return engines.pop(name)
+
+
+default_engine = create_engine(DEFAULT_ENGINE)
+
+# Module-level names keep addressing the default engine, so single-account
+# callers (and ``from mutating_confirmation import bots``) work unchanged.
+engine_settings = default_engine.settings
+bots = default_engine.bots
+bot_state = default_engine.bot_state
+open_trades = default_engine.open_trades
+paper_trades = default_engine.paper_trades
+signal_log = default_engine.signal_log
+generation_stats = default_engine.generation_stats
+portfolio = default_engine.portfolio
+evolution_scheduler = default_engine.scheduler
+update_engine_settings = default_engine.update_settings
+engine_snapshot = default_engine.snapshot
+register_bot = default_engine.register_bot
+init_default_bots = default_engine.init_default_bots
+set_bot_active = default_engine.set_bot_active
+invalidate_bot_routes = default_engine.invalidate_bot_routes
+rebuild_bot_routes = default_engine.rebuild_bot_routes
+bot_route = default_engine.bot_route
+clamp_contracts = default_engine.clamp_contracts
+clamp_contracts_array = default_engine.clamp_contracts_array
+reset_generation_state = default_engine.reset_generation_state
+should_halt_trading = default_engine.should_halt_trading
+record_signal = default_engine.record_signal
+register_open_trade = default_engine.register_open_trade
+record_trade_close = default_engine.record_trade_close
+evaluate_open_trades = default_engine.evaluate_open_trades
+paper_execute = default_engine.paper_execute
+size_route_positions = default_engine.size_route_positions
+execute_for_bots = default_engine.execute_for_bots
+init_population = default_engine.init_population
+publish_population = default_engine.publish_population
+evolve_loop = default_engine.evolve_loop
+build_status = default_engine.build_status
+build_bot_list = default_engine.build_bot_list
+build_signal_list = default_engine.build_signal_list
+build_paper_trades = default_engine.build_paper_trades
+build_analytics = default_engine.build_analytics
+
+
+# ---------- Capture log ----------
+# frame: compressed length, raw length, event count, then a zlib block of records
+_CAPTURE_FRAME = struct.Struct("<III")
+# record: kind, arrival time (ns since epoch), body length, then the body
+_CAPTURE_RECORD = struct.Struct("<BqI")
+# tick body: ts, price, size, then the utf-8 symbol; alert body: JSON
+_CAPTURE_TICK = struct.Struct("<qdd")
+CAPTURE_KIND_TICK = 1
+CAPTURE_KIND_ALERT = 2
+
+
+class CaptureLog:
+    """Append-only, rotating, compressed log of every ingested tick and alert.
+
+    Producers only append a tuple to an in-memory deque (no encoding, no I/O,
+    no lock); a background thread drains it every ``flush_seconds``, encodes
+    the events, compresses them into one frame and appends the frame to the
+    current file. Files rotate at ``rotate_bytes`` and only the newest
+    ``keep_files`` are kept. If the writer falls ``buffer_max`` events behind,
+    new events are dropped and counted rather than growing without bound.
+    Producers own ``dropped``; the writer thread owns ``stats``.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        rotate_bytes: int = CAPTURE_ROTATE_BYTES,
+        keep_files: int = CAPTURE_KEEP_FILES,
+        flush_seconds: float = CAPTURE_FLUSH_SECONDS,
+        buffer_max: int = CAPTURE_BUFFER_MAX,
+    ) -> None:
+        self.directory = directory
+        self.rotate_bytes = rotate_bytes
+        self.keep_files = keep_files
+        self.flush_seconds = flush_seconds
+        self.buffer_max = buffer_max
+        self.buffer: deque = deque()
+        self.active = False
+        self.path: Optional[str] = None
+        self.thread: Optional[threading.Thread] = None
+        self._stop: Optional[threading.Event] = None
+        self._file: Any = None
+        self.dropped = 0
+        self.stats: Dict[str, int] = {"written": 0, "frames": 0, "bytes": 0, "files": 0}
+
+    def record_tick(self, symbol: str, price: float, size: float, ts: int) -> None:
+        if self.active:
+            if len(self.buffer) < self.buffer_max:
+                self.buffer.append((CAPTURE_KIND_TICK, time.time_ns(), symbol, price, size, ts))
+            else:
+                self.dropped += 1
 
-@app.get("/status")
-async def status():
-    snapshot = engine_snapshot()
-    snapshot.update(
-        {
-            "population_size": len(population),
-            "generation": generation,
-            "best_score": max(pop_scores) if pop_scores else None,
-            "paper_trades": len(paper_trades),
-            "bots": {name: {k: v for k, v in cfg.items() if k != "description"} for name, cfg in bots.items()},
+    def record_alert(self, alert: Dict[str, Any], targets: Optional[List[Engine]] = None) -> None:
+        if self.active:
+            if len(self.buffer) < self.buffer_max:
+                self.buffer.append((CAPTURE_KIND_ALERT, time.time_ns(), alert, targets))
+            else:
+                self.dropped += 1
+
+    def start(self, directory: Optional[str] = None) -> bool:
+        """Start the writer thread; returns False when capture is disabled
+        (``directory`` is empty, or unset with no ``CAPTURE_DIR``)."""
+        import threading
+
+        if directory is None:
+            directory = self.directory or CAPTURE_DIR
+        if self.active or not directory:
+            return self.active
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._stop = threading.Event()
+        self.active = True
+        self.thread = threading.Thread(target=self._run, name="capture-writer", daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self) -> None:
+        """Stop accepting events, write out everything buffered and close."""
+        if not self.active:
+            return
+        self.active = False
+        self._stop.set()
+        self.thread.join()
+        self.thread = None
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.wait(self.flush_seconds):
+                self.flush()
+        finally:
+            self.flush()
+            self._close()
+
+    def flush(self) -> int:
+        """Encode and write the buffered events as one frame (writer thread)."""
+        count = len(self.buffer)
+        if not count:
+            return 0
+        parts: List[bytes] = []
+        popleft = self.buffer.popleft
+        for _ in range(count):
+            event = popleft()
+            if event[0] == CAPTURE_KIND_TICK:
+                _, arrival, symbol, price, size, ts = event
+                body = _CAPTURE_TICK.pack(int(ts), float(price), float(size)) + symbol.encode("utf-8")
+            else:
+                _, arrival, alert, targets = event
+                if targets is not None:
+                    alert = {**alert, "engines": [target.name for target in targets]}
+                body = encode_json(alert)
+            parts.append(_CAPTURE_RECORD.pack(event[0], arrival, len(body)))
+            parts.append(body)
+        raw = b"".join(parts)
+        block = zlib.compress(raw, 1)
+        fh = self._writable(_CAPTURE_FRAME.size + len(block))
+        fh.write(_CAPTURE_FRAME.pack(len(block), len(raw), count))
+        fh.write(block)
+        fh.flush()
+        self.stats["written"] += count
+        self.stats["frames"] += 1
+        self.stats["bytes"] += _CAPTURE_FRAME.size + len(block)
+        return count
+
+    def _writable(self, incoming: int) -> Any:
+        if self._file is not None and self._file.tell() + incoming > self.rotate_bytes:
+            self._close()
+        if self._file is None:
+            self.path = os.path.join(self.directory, f"capture-{time.time_ns()}.mcap")
+            self._file = open(self.path, "wb")
+            self._file.write(CAPTURE_MAGIC)
+            self.stats["files"] += 1
+            for old in capture_files(self.directory)[: -self.keep_files]:
+                with suppress(OSError):
+                    os.remove(old)
+        return self._file
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "directory": self.directory,
+            "path": self.path,
+            "buffered": len(self.buffer),
+            "dropped": self.dropped,
+            **self.stats,
         }
-    )
-    return snapshot
 
 
-@app.get("/paper_trades")
-async def list_paper_trades(limit: int = 50):
-    limit = max(1, min(limit, 500))
-    return {"trades": paper_trades[-limit:]}
+capture = CaptureLog()
+
+
+def capture_files(directory: str) -> List[str]:
+    """Capture files in ``directory``, oldest first."""
+    names = [name for name in os.listdir(directory) if name.startswith("capture-") and name.endswith(".mcap")]
+    names.sort(key=lambda name: int(name[len("capture-") : -len(".mcap")]))
+    return [os.path.join(directory, name) for name in names]
+
+
+def read_capture(source: str, kinds: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Stream captured events from a capture file or directory in arrival order.
+
+    Events use the :func:`replay_events` shape plus ``arrival_ns``. A frame
+    cut short by a crash ends its file quietly.
+    """
+    wanted = None if kinds is None else set(kinds)
+    paths = capture_files(source) if os.path.isdir(source) else [source]
+    for path in paths:
+        with open(path, "rb") as fh:
+            if fh.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+                raise ValueError(f"{path} is not a capture file")
+            while True:
+                header = fh.read(_CAPTURE_FRAME.size)
+                if len(header) < _CAPTURE_FRAME.size:
+                    break
+                block_len, _, count = _CAPTURE_FRAME.unpack(header)
+                block = fh.read(block_len)
+                if len(block) < block_len:
+                    break
+                raw = zlib.decompress(block)
+                offset = 0
+                for _ in range(count):
+                    kind, arrival, length = _CAPTURE_RECORD.unpack_from(raw, offset)
+                    offset += _CAPTURE_RECORD.size
+                    body = raw[offset : offset + length]
+                    offset += length
+                    if kind == CAPTURE_KIND_TICK:
+                        if wanted is not None and "tick" not in wanted:
+                            continue
+                        ts, price, size = _CAPTURE_TICK.unpack_from(body)
+                        symbol = body[_CAPTURE_TICK.size :].decode("utf-8")
+                        yield {"kind": "tick", "symbol": symbol, "price": price, "size": size, "ts": ts, "arrival_ns": arrival}
+                    elif wanted is None or "alert" in wanted:
+                        yield {"kind": "alert", **json.loads(body), "arrival_ns": arrival}
+
+
+# ---------- Ingest pipeline ----------
+class IngestPipeline:
+    """Single writer for ticks and alerts.
+
+    Handlers only enqueue; one writer task applies everything, draining all
+    queued alerts before each batch of ticks. Alerts get back-pressure (a
+    bounded number may be in flight) and are never dropped. When the tick
+    queue overflows it is collapsed to one OHLC update per symbol and candle
+    bucket, trading freshness for bounded latency.
+
+    Each queued tick is ``[symbol, ts, open, high, low, close, size]``; each
+    queued alert batch names its target engines (``None`` = all engines).
+    Other state changes (history seeding) queue as calls that run with the
+    alerts, so the writer stays the only task mutating market data.
+    """
+
+    def __init__(
+        self,
+        tick_capacity: int = TICK_QUEUE_MAX,
+        alert_capacity: int = ALERT_QUEUE_MAX,
+        tick_batch: int = TICK_BATCH,
+    ) -> None:
+        self.tick_capacity = tick_capacity
+        self.tick_batch = tick_batch
+        self.ticks: deque = deque()
+        self.alerts: deque = deque()
+        self.calls: deque = deque()
+        self.alert_capacity = alert_capacity
+        self._alert_slots: Optional[asyncio.Semaphore] = None
+        self.task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.stats: Dict[str, int] = {
+            "ticks_received": 0,
+            "ticks_applied": 0,
+            "ticks_collapsed": 0,
+            "ticks_dropped": 0,
+            "ticks_late": 0,
+            "shed_events": 0,
+            "alerts_received": 0,
+            "alerts_processed": 0,
+            "max_tick_depth": 0,
+        }
 
+    @property
+    def alert_slots(self) -> asyncio.Semaphore:
+        if self._alert_slots is None:
+            import asyncio
+
+            self._alert_slots = asyncio.Semaphore(self.alert_capacity)
+        return self._alert_slots
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def submit_tick(self, symbol: str, price: float, size: float, ts: int) -> int:
+        self.stats["ticks_received"] += 1
+        capture.record_tick(symbol, price, size, ts)
+        if not self.running:
+            apply_tick(symbol, ts, price, price, price, price, size)
+            self.stats["ticks_applied"] += 1
+            return 0
+        self.ticks.append([symbol, ts, price, price, price, price, size])
+        if len(self.ticks) > self.tick_capacity:
+            self.shed()
+        depth = len(self.ticks)
+        if depth > self.stats["max_tick_depth"]:
+            self.stats["max_tick_depth"] = depth
+        self._wake.set()
+        return depth
+
+    async def submit_alerts(
+        self,
+        alerts: List[Dict[str, Any]],
+        targets: Optional[List[Engine]] = None,
+    ) -> Dict[str, Any]:
+        self.stats["alerts_received"] += len(alerts)
+        if not self.running:
+            return self._process_alerts(alerts, targets)
+        import asyncio
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.alerts.append((alerts, targets, future))
+        self._wake.set()
+        return await future
+
+    async def submit_call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` on the writer and return its result."""
+        if not self.running:
+            return fn(*args)
+        import asyncio
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.calls.append((fn, args, future))
+        self._wake.set()
+        return await future
+
+    def shed(self) -> None:
+        """Collapse queued ticks to one update per (symbol, candle bucket).
+
+        Late ticks for a bucket older than the symbol's newest one (applied or
+        queued ahead of them) are dropped, so each symbol's updates still come
+        out in bucket order.
+        """
+        merged: Dict[tuple[str, int], list] = {}
+        newest: Dict[str, int] = {}
+        late = 0
+        for item in self.ticks:
+            symbol, ts, _, high, low, close, size = item
+            bucket = ts - ts % CANDLE_SECONDS
+            if symbol not in newest:
+                dq = candles.get(symbol)
+                newest[symbol] = dq[-1]["t"] if dq else bucket
+            if bucket < newest[symbol]:
+                late += 1
+                continue
+            newest[symbol] = bucket
+            key = (symbol, bucket)
+            current = merged.get(key)
+            if current is None:
+                merged[key] = list(item)
+                continue
+            current[1] = ts
+            current[3] = max(current[3], high)
+            current[4] = min(current[4], low)
+            current[5] = close
+            current[6] += size
+        self.stats["shed_events"] += 1
+        self.stats["ticks_collapsed"] += len(self.ticks) - len(merged) - late
+        self.stats["ticks_late"] += late
+        collapsed = deque(merged.values())
+        if len(collapsed) > self.tick_capacity * 3 // 4:
+            # too many distinct buckets to leave headroom: keep the freshest half
+            overflow = len(collapsed) - self.tick_capacity // 2
+            for _ in range(overflow):
+                collapsed.popleft()
+            self.stats["ticks_dropped"] += overflow
+        self.ticks = collapsed
+
+    def _process_alerts(self, alerts: List[Dict[str, Any]], targets: Optional[List[Engine]]) -> Dict[str, Any]:
+        result = process_alert_batch(alerts, targets)
+        self.stats["alerts_processed"] += len(alerts)
+        return result
+
+    def drain_once(self) -> int:
+        """Apply all queued alerts and calls, then up to one batch of ticks."""
+        handled = 0
+        while self.alerts or self.calls:
+            if self.alerts:
+                alerts, targets, future = self.alerts.popleft()
+                fn, args = self._process_alerts, (alerts, targets)
+            else:
+                fn, args, future = self.calls.popleft()
+            handled += 1
+            if future.done():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except Exception as exc:  # noqa: BLE001
+                future.set_exception(exc)
+        batch = min(self.tick_batch, len(self.ticks))
+        for _ in range(batch):
+            symbol, ts, o, h, l, c, v = self.ticks.popleft()
+            apply_tick(symbol, ts, o, h, l, c, v)
+        self.stats["ticks_applied"] += batch
+        return handled + batch
+
+    async def run(self) -> None:
+        import asyncio
+
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            while self.alerts or self.calls or self.ticks:
+                self.drain_once()
+                await asyncio.sleep(0)  # let handlers enqueue between batches
+
+    def start(self) -> asyncio.Task:
+        import asyncio
+
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        if not self.running:
+            self.task = asyncio.create_task(self.run())
+        return self.task
+
+    async def stop(self) -> None:
+        import asyncio
+
+        if self.task:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+        while self.alerts or self.calls or self.ticks:
+            self.drain_once()
 
-@app.get("/bots")
-async def list_bots():
-    return {
-        "bots": [
-            {
-                **cfg,
-                "state": bot_state.get(name, {}),
-            }
-            for name, cfg in bots.items()
-        ]
-    }
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "tick_depth": len(self.ticks),
+            "alert_depth": len(self.alerts),
+            "call_depth": len(self.calls),
+            **self.stats,
+        }
 
 
-@app.get("/signals")
-async def list_signals(limit: int = 50):
-    limit = max(1, min(limit, 500))
-    entries = list(signal_log)[-limit:]
-    entries.reverse()
-    return {"signals": entries}
+ingest = IngestPipeline()
 
 
-@app.get("/settings")
-async def get_settings():
-    return engine_snapshot()
+# ---------- Response cache ----------
+_orjson: Any = None  # optional fast encoder, resolved on first use
 
+# distinguishes ETags across restarts, since versions start over at 0
+_ETAG_EPOCH = f"{os.getpid():x}{time.time_ns():x}"
 
-@app.post("/settings")
-async def patch_settings(patch: EngineSettingsPatch):
-    payload = patch.dict(exclude_unset=True)
-    updated = update_engine_settings(payload)
-    snapshot = engine_snapshot()
-    snapshot["settings"] = updated
-    return snapshot
 
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
 
-@app.post("/bots")
-async def upsert_bot(bot_model: BotConfigModel):
-    record = register_bot(bot_model)
-    return {"status": "ok", "bot": record}
+
+def encode_json(payload: Any) -> bytes:
+    global _orjson
+    if _orjson is None:
+        try:
+            import orjson as _orjson
+        except ImportError:  # pragma: no cover - depends on the environment
+            _orjson = False
+    if _orjson:
+        return _orjson.dumps(payload, default=_json_default, option=_orjson.OPT_SERIALIZE_NUMPY | _orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+
+def make_etag(token: Any) -> str:
+    digest = hashlib.blake2b(repr(token).encode("utf-8"), digest_size=8).hexdigest()
+    return f'"{_ETAG_EPOCH}-{digest}"'
+
+
+class ResponseCache:
+    """Pre-serialized read responses, each valid for the version its caller
+    passes (e.g. :meth:`Engine.read_version`), so a change only invalidates
+    the entries that depend on it."""
+
+    def __init__(self) -> None:
+        self.entries: Dict[Any, tuple[Any, bytes, str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: Any, version: Any, build: Callable[[], Any]) -> tuple[bytes, str]:
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1], entry[2]
+        self.misses += 1
+        body = encode_json(build())
+        etag = make_etag((key, version))
+        self.entries[key] = (version, body, etag)
+        return body, etag
+
+
+response_cache = ResponseCache()
+
+
+# ---------- Shared snapshots (multi-worker) ----------
+# header: magic, seqlock sequence (odd while writing), state version, payload
+# length, "moved" flag (set on a mapping the writer replaced with a larger file)
+_SNAPSHOT_HEADER = struct.Struct("<8sQQQQ")
+_SNAPSHOT_DATA = 64  # payload offset
+_SNAPSHOT_COUNT = struct.Struct("<I")
+_SNAPSHOT_KEY = struct.Struct("<HI")  # key length, body length
+
+
+def encode_snapshot(entries: Mapping[str, bytes]) -> bytes:
+    parts = [_SNAPSHOT_COUNT.pack(len(entries))]
+    for key, body in entries.items():
+        raw_key = key.encode("utf-8")
+        parts += [_SNAPSHOT_KEY.pack(len(raw_key), len(body)), raw_key, body]
+    return b"".join(parts)
+
+
+def decode_snapshot(payload: bytes) -> Dict[str, bytes]:
+    (count,) = _SNAPSHOT_COUNT.unpack_from(payload, 0)
+    offset = _SNAPSHOT_COUNT.size
+    entries: Dict[str, bytes] = {}
+    for _ in range(count):
+        key_len, body_len = _SNAPSHOT_KEY.unpack_from(payload, offset)
+        offset += _SNAPSHOT_KEY.size
+        key = payload[offset : offset + key_len].decode("utf-8")
+        offset += key_len
+        entries[key] = payload[offset : offset + body_len]
+        offset += body_len
+    return entries
+
+
+class SnapshotWriter:
+    """Publishes pre-serialized read models to a memory-mapped file.
+
+    A single writer process owns the file; any number of reader processes map
+    it read-only. Each publish is framed by a seqlock: the sequence goes odd
+    before the payload is touched and even once it is complete, so readers
+    detect (and retry) torn copies without any locking or IPC.
+    """
+
+    def __init__(self, path: str, capacity: int = SNAPSHOT_CAPACITY) -> None:
+        self.path = path
+        self.capacity = 0
+        self.seq = 0
+        self.version: Optional[int] = None
+        self.publishes = 0
+        self._fh: Any = None
+        self._mm: Any = None
+        self._map(capacity)
+
+    def _map(self, capacity: int) -> None:
+        import mmap
+
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        fh = open(tmp, "w+b")
+        fh.truncate(_SNAPSHOT_DATA + capacity)
+        mm = mmap.mmap(fh.fileno(), 0)
+        _SNAPSHOT_HEADER.pack_into(mm, 0, SNAPSHOT_MAGIC, 0, 0, 0, 0)
+        os.replace(tmp, self.path)
+        if self._mm is not None:
+            # readers still mapping the old file see the flag and reopen the path
+            _SNAPSHOT_HEADER.pack_into(self._mm, 0, SNAPSHOT_MAGIC, self.seq, self.version or 0, 0, 1)
+            self._mm.close()
+            self._fh.close()
+        self._fh, self._mm, self.capacity, self.seq = fh, mm, capacity, 0
+
+    def publish(self, entries: Mapping[str, bytes], version: int) -> None:
+        payload = encode_snapshot(entries)
+        if len(payload) > self.capacity:
+            self._map(max(len(payload) * 2, self.capacity * 2))
+        mm = self._mm
+        seq = self.seq + 1
+        struct.pack_into("<Q", mm, 8, seq)  # odd: write in progress
+        mm[_SNAPSHOT_DATA : _SNAPSHOT_DATA + len(payload)] = payload
+        struct.pack_into("<QQ", mm, 16, version, len(payload))
+        struct.pack_into("<Q", mm, 8, seq + 1)
+        self.seq = seq + 1
+        self.version = version
+        self.publishes += 1
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._fh.close()
+            self._mm = self._fh = None
+
+
+class SnapshotReader:
+    """Read side of :class:`SnapshotWriter`: the latest complete snapshot.
+
+    ``read`` costs one header load while the sequence is unchanged; a new
+    sequence is copied out once and decoded into ``key -> body``.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.seq: Optional[int] = None
+        self.version: Optional[int] = None
+        self.entries: Dict[str, bytes] = {}
+        self.retries = 0
+        self._fh: Any = None
+        self._mm: Any = None
+
+    def _map(self) -> None:
+        import mmap
+
+        self.close()
+        self._fh = open(self.path, "rb")
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:8] != SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError(f"{self.path}: not a snapshot file")
+        self.seq = None
+
+    def read(self) -> tuple[Optional[int], Dict[str, bytes]]:
+        """Return ``(version, entries)``; ``version`` is None until the writer
+        has published once. Raises ``FileNotFoundError`` without a writer."""
+        if self._mm is None:
+            self._map()
+        for _ in range(SNAPSHOT_READ_RETRIES):
+            _, seq, version, length, moved = _SNAPSHOT_HEADER.unpack_from(self._mm, 0)
+            if moved:
+                self._map()
+                continue
+            if seq == self.seq:
+                return self.version, self.entries
+            if seq & 1 == 0:
+                payload = self._mm[_SNAPSHOT_DATA : _SNAPSHOT_DATA + length]
+                if struct.unpack_from("<Q", self._mm, 8)[0] == seq:
+                    self.seq = seq
+                    self.version = version if seq else None
+                    self.entries = decode_snapshot(payload) if seq else {}
+                    return self.version, self.entries
+            self.retries += 1
+            time.sleep(0)
+        # the writer kept the lock through every retry: serve the last good copy
+        return self.version, self.entries
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._fh.close()
+            self._mm = self._fh = None
+
+
+# list-valued read models published at SNAPSHOT_LIST_LIMIT; readers cut them to
+# the requested limit the same way the builders do
+_SNAPSHOT_SLICERS = {
+    "signals": lambda payload, limit: {"signals": payload["signals"][:limit]},
+    "paper_trades": lambda payload, limit: {"trades": payload["trades"][-limit:]},
+}
 
 
-@app.post("/bots/{bot_name}/toggle")
-async def toggle_bot(bot_name: str, payload: BotToggleModel):
-    if bot_name not in bots:
-        raise HTTPException(status_code=404, detail="Bot not found")
-    bots[bot_name]["active"] = payload.active
-    return {"status": "ok", "active": payload.active}
+class SnapshotView:
+    """Serves read-endpoint bodies and ETags from a :class:`SnapshotReader`.
+
+    Keys match :class:`ResponseCache` keys: ``"engines"``, ``(engine, kind)``
+    or ``(engine, kind, limit)``. ETags carry the writer's epoch and a digest
+    of the body, so they agree across every worker and survive publishes
+    that left the entry unchanged.
+    """
+
+    def __init__(self, reader: SnapshotReader) -> None:
+        self.reader = reader
+        self.derived: Dict[Any, bytes] = {}
+        self.derived_version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: Any) -> tuple[bytes, str]:
+        version, entries = self.reader.read()
+        if version is None:
+            raise LookupError("no snapshot published yet")
+        if self.derived_version != version:
+            self.derived = {}
+            self.derived_version = version
+        derived = self.derived.get(key)
+        if derived is not None:
+            self.hits += 1
+            return derived
+        self.misses += 1
+        if isinstance(key, tuple):
+            name, kind, *limit = key
+            body = entries[f"{name}/{kind}"]
+            if limit:
+                body = encode_json(_SNAPSHOT_SLICERS[kind](json.loads(body), limit[0]))
+        else:
+            body = entries[key]
+        digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+        derived = self.derived[key] = (body, f'"{entries["_epoch"].decode()}-{digest}"')
+        return derived
+
+    def candles(self, symbol: str) -> Dict[str, np.ndarray]:
+        _, entries = self.reader.read()
+        return decode_candle_binary(entries[f"candles/{symbol}"], f"snapshot candles/{symbol}")
+
+
+# snapshot entries waiting to be encoded: key -> (encoder, payload)
+PendingEntries = Dict[str, tuple[Callable[[Any], bytes], Any]]
+
+
+class SnapshotBuilder:
+    """Keeps the encoded snapshot entries between publishes and rebuilds only
+    those whose inputs moved.
+
+    Every entry carries the signature it was built from: engine entries
+    their :meth:`Engine.read_version`, chart patterns the closed candles processed,
+    candles the last bar. Entries that drift on every tick (ingest
+    counters, volume profiles) are rebuilt at most once per
+    ``SNAPSHOT_REFRESH_SECONDS``. Candle columns are mirrored
+    incrementally: only the bars that changed since the last publish are
+    read from the store.
+
+    :meth:`collect` runs on the event loop and gathers the payloads of stale
+    entries; :meth:`publish` encodes them and writes the snapshot, and is
+    safe to run in a worker thread meanwhile (each payload is encoded in one
+    ``orjson`` call, which holds the GIL).
+    """
+
+    def __init__(self) -> None:
+        self.entries: Dict[str, bytes] = {"_epoch": _ETAG_EPOCH.encode()}
+        self.signatures: Dict[str, Any] = {}
+        self.built_at: Dict[str, float] = {}
+        self.stats: Dict[str, int] = {"collects": 0, "rebuilt": 0}
+
+    def _stale(self, key: str, signature: Any, now: Optional[float] = None) -> bool:
+        """Whether ``key`` needs a rebuild (``now`` throttles it to the refresh interval)."""
+        if self.signatures.get(key, self) == signature:
+            return False
+        if now is not None and key in self.entries and now - self.built_at.get(key, 0.0) < SNAPSHOT_REFRESH_SECONDS:
+            return False
+        self.signatures[key] = signature
+        if now is not None:
+            self.built_at[key] = now
+        return True
+
+    def collect(self) -> PendingEntries:
+        """``{key: (encoder, payload)}`` for every entry that changed; entries
+        of removed engines and symbols are dropped."""
+        now = time.monotonic()
+        pending: PendingEntries = {}
+        live = {"_epoch"}
+        for target in list(engines.values()):
+            prefix = target.name
+            builders = {
+                "status": target.build_status,
+                "bots": target.build_bot_list,
+                "settings": target.snapshot,
+                "signals": lambda target=target: target.build_signal_list(SNAPSHOT_LIST_LIMIT),
+                "paper_trades": lambda target=target: target.build_paper_trades(SNAPSHOT_LIST_LIMIT),
+            }
+            for kind, build in builders.items():
+                key = f"{prefix}/{kind}"
+                live.add(key)
+                if self._stale(key, target.read_version(kind)):
+                    pending[key] = (encode_json, build())
+            key = f"{prefix}/analytics"
+            live.add(key)
+            if self._stale(key, target.read_version("analytics")):
+                pending[key] = (encode_json, target.build_analytics())
+        live.update(("engines", "ingest"))
+        if self._stale("engines", engines_version()):
+            pending["engines"] = (encode_json, {"engines": [target.describe() for target in engines.values()]})
+        if self._stale("ingest", ingest.stats["ticks_received"], now):
+            pending["ingest"] = (encode_json, ingest_report())
+        for symbol in list(candles):
+            key = f"candles/{symbol}"
+            live.add(key)
+            signature, cols = snapshot_candle_columns(symbol)
+            if self._stale(key, signature):
+                pending[key] = (encode_candle_binary, cols)
+            tracker = pattern_tracker(symbol)
+            key = f"patterns/{symbol}"
+            live.add(key)
+            if self._stale(key, (id(tracker), tracker.count)):
+                pending[key] = (encode_json, tracker.describe())
+            profile = volume_profiles.get(symbol)
+            if profile is not None:
+                key = f"volume_profile/{symbol}"
+                live.add(key)
+                if self._stale(key, (id(profile), profile.session.version, profile.rolling.version), now):
+                    pending[key] = (encode_json, profile.describe())
+        for key in set(self.entries) - live:
+            del self.entries[key]
+            self.signatures.pop(key, None)
+            self.built_at.pop(key, None)
+        self.stats["collects"] += 1
+        self.stats["rebuilt"] += len(pending)
+        return pending
+
+    def forget(self, symbol: str) -> None:
+        """Force ``symbol``'s entries to be rebuilt (its history was replaced)."""
+        for kind in ("candles", "patterns", "volume_profile"):
+            self.signatures.pop(f"{kind}/{symbol}", None)
+            self.built_at.pop(f"{kind}/{symbol}", None)
+
+    def encode(self, pending: PendingEntries) -> Dict[str, bytes]:
+        self.entries.update({key: encoder(payload) for key, (encoder, payload) in pending.items()})
+        return self.entries
+
+    def publish(self, writer: SnapshotWriter, pending: PendingEntries, version: int) -> None:
+        writer.publish(self.encode(pending), version)
+
+
+# per-symbol incremental mirror of the candle ring: (last bar signature, columns)
+_snapshot_candles: Dict[str, tuple[tuple, Dict[str, np.ndarray]]] = {}
+
+
+def snapshot_candle_columns(symbol: str) -> tuple[tuple, Dict[str, np.ndarray]]:
+    """``symbol``'s hot ring as ``t o h l c v`` columns for the snapshot, with
+    the last-bar signature they were built for.
+
+    Only the bars from the previous last one on are read from the store; the
+    rest is carried over from the previous columns. :func:`seed_candles`
+    drops the mirror.
+    """
+    dq = candles[symbol]
+    last = dq[-1] if dq else {}
+    signature = (len(dq), last.get("t"), last.get("h"), last.get("l"), last.get("c"), last.get("v"))
+    cached = _snapshot_candles.get(symbol)
+    if cached is not None and cached[0] == signature:
+        return cached
+    cols = None
+    if cached is not None and len(cached[1]["t"]):
+        old = cached[1]
+        kept = len(old["t"]) - 1  # rows before the previous last bar
+        fresh = 0
+        for idx in range(len(dq) - 1, -1, -1):
+            if dq[idx]["t"] <= old["t"][-1]:
+                break
+            fresh += 1
+        tail = list(itertools.islice(dq, max(0, len(dq) - fresh - 1), None))
+        # the previous last bar (which may have moved) must open the re-read tail
+        if fresh < len(dq) and tail[0]["t"] == old["t"][-1]:
+            keep = min(len(dq) - len(tail), kept)
+            cols = {
+                key: np.concatenate(
+                    [old[key][kept - keep : kept], np.fromiter((row[key] for row in tail), dtype=dtype, count=len(tail))]
+                )
+                for key, dtype in CANDLE_ARCHIVE_DTYPES.items()
+            }
+    if cols is None:
+        cols = store_candle_columns(symbol)
+    cached = _snapshot_candles[symbol] = (signature, cols)
+    return cached
+
+
+snapshot_builder = SnapshotBuilder()
 
 
-# ---------- Evolution loop ----------
-async def evolve_loop():
-    global population, pop_scores, generation
+def build_snapshot_entries() -> Dict[str, bytes]:
+    """Every read model a reader worker serves, pre-serialized (rebuilding
+    only what changed since the last call)."""
+    return dict(snapshot_builder.encode(snapshot_builder.collect()))
+
+
+def ingest_report() -> Dict[str, Any]:
+    cache = response_cache
+    return {
+        **ingest.describe(),
+        "cache": {"hits": cache.hits, "misses": cache.misses},
+        "capture": capture.describe(),
+        "candle_archive": candle_archive.describe(),
+    }
+
+
+async def snapshot_publisher(writer: SnapshotWriter, interval: Optional[float] = None) -> None:
+    """Writer role: republish the snapshot whenever the state version moved or
+    new ticks reached the candles."""
+    import asyncio
+
+    interval = SNAPSHOT_INTERVAL if interval is None else interval
+    ticks_seen = -1
     while True:
-        await asyncio.sleep(30)
-        if not population:
-            continue
-        order = sorted(range(len(pop_scores)), key=lambda idx: -pop_scores[idx])
-        elites = [population[idx] for idx in order[:ELITES]]
-        new_population = elites.copy()
-        while len(new_population) < POP_SIZE:
-            if random.random() < 0.3 and elites:
-                parent = random.choice(elites)
-                new_population.append(mutate_genome(parent))
-            elif len(elites) >= 2:
-                a, b = random.sample(elites, 2)
-                child = crossover(a, b)
-                if random.random() < MUT_RATE:
-                    child = mutate_genome(child)
-                new_population.append(child)
+        ticks = ingest.stats["ticks_applied"]
+        if writer.version != state_version or ticks != ticks_seen:
+            version, ticks_seen = state_version, ticks
+            pending = snapshot_builder.collect()
+            # encoding and the copy into the mapping stay off the ingest writer's loop
+            await asyncio.to_thread(snapshot_builder.publish, writer, pending, version)
+        await asyncio.sleep(interval)
+
+
+# ---------- Alert handling ----------
+class AlertCoalescer:
+    """Groups same symbol/side alerts arriving within a short window.
+
+    The first alert of a batch schedules a flush ``window`` seconds later;
+    the whole batch is then evaluated once by :func:`process_alert_batch` and
+    every waiting caller receives its own copy of the result. A batch that
+    fills up (``COALESCE_MAX_BATCH``) flushes early and cancels its timer, so
+    the next batch for the key gets its own full window. Alerts aimed at
+    different (registered) engines are batched separately.
+    """
+
+    def __init__(self) -> None:
+        self.pending: Dict[tuple, List[tuple[Dict[str, Any], asyncio.Future]]] = {}
+        self.timers: Dict[tuple, asyncio.TimerHandle] = {}
+        self.batches = 0
+        self.coalesced = 0
+
+    async def submit(
+        self,
+        alert: Dict[str, Any],
+        window: float,
+        targets: Optional[List[Engine]] = None,
+    ) -> Dict[str, Any]:
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        names = None if targets is None else tuple(target.name for target in targets)
+        key = (alert["symbol"], alert["side"], names)
+        future: asyncio.Future = loop.create_future()
+        batch = self.pending.get(key)
+        if batch is None:
+            batch = self.pending[key] = []
+            self.timers[key] = loop.call_later(window, self.flush, key)
+        batch.append((alert, future))
+        if len(batch) >= COALESCE_MAX_BATCH:
+            self.flush(key)
+        return await future
+
+    def flush(self, key: tuple) -> None:
+        timer = self.timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()  # no-op when the timer itself is flushing
+        batch = self.pending.pop(key, None)
+        if not batch:
+            return
+        import asyncio
+
+        self.batches += 1
+        self.coalesced += len(batch) - 1
+        names = key[2]
+        targets = None if names is None else [engines[name] for name in names if name in engines]
+        task = asyncio.ensure_future(ingest.submit_alerts([alert for alert, _ in batch], targets))
+        task.add_done_callback(lambda done: self._deliver(batch, done))
+
+    @staticmethod
+    def _deliver(batch: List[tuple[Dict[str, Any], asyncio.Future]], done: asyncio.Future) -> None:
+        exc = None if done.cancelled() else done.exception()
+        for position, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if done.cancelled():
+                future.cancel()
+            elif exc is not None:
+                future.set_exception(exc)
             else:
-                new_population.append(random_genome())
-        population = new_population
-        pop_scores = [score * 0.5 for score in pop_scores]
-        generation += 1
-        print(f"[evolve] gen {generation} elites kept, new population ready.")
+                future.set_result({**done.result(), "batch_size": len(batch), "batch_position": position})
+
+
+alert_coalescer = AlertCoalescer()
+
+
+async def submit_alert(alert: Dict[str, Any], targets: Optional[List[Engine]] = None) -> Dict[str, Any]:
+    """Queue one validated alert (optionally coalesced) and await its result.
+
+    ``targets`` limits the alert to some engines; by default every engine
+    votes on it. The coalescing window comes from the first target (or the
+    default engine).
+    """
+    alert["ts"] = alert["ts"] or now_s()
+    capture.record_alert(alert, targets)
+    lead = targets[0] if targets else default_engine
+    window_ms = float(lead.settings.get("coalesce_ms") or 0.0)
+    async with ingest.alert_slots:
+        if window_ms > 0:
+            return await alert_coalescer.submit(alert, window_ms / 1000.0, targets)
+        return await ingest.submit_alerts([alert], targets)
+
+
+def process_alert_batch(
+    alerts: List[Dict[str, Any]],
+    targets: Optional[List[Engine]] = None,
+) -> Dict[str, Any]:
+    """Score and act on one or more same symbol/side alerts as a single event.
+
+    Every alert is logged (so all of them count toward genome agreement), but
+    features are computed once, driven by the most recent alert, and shared
+    by every target engine's vote. Returns the first target's result; with
+    several targets, all results are also listed under ``"engines"``.
+    """
+    for item in alerts:
+        alerts_log.appendleft(item)
+    touch_state()
+    alert = max(alerts, key=lambda item: item["ts"])
+
+    feat = features_from_context(alert["symbol"], alert)
+    recent_alerts = list(alerts_log)[:200]
+
+    targets = list(engines.values()) if targets is None else targets
+    results = {target.name: target.handle_alert(alerts, alert, feat, recent_alerts) for target in targets}
+    for target in targets:
+        target.touch()  # votes moved bot state and the evolution schedule
+    if not results:
+        return {"status": "no_engine"}
+    result = results[targets[0].name]
+    if len(results) > 1:
+        result = {**result, "engines": results}
+    return result
+
+
+def submit_tick_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        sym = payload["symbol"]
+        price = float(payload["price"])
+        ts = int(payload.get("ts") or now_s())
+        depth = ingest.submit_tick(sym, price, float(payload.get("size", 1)), ts)
+        return {"ok": True, "queued": depth}
+    except Exception as exc:
+        return {"ok": False, "err": str(exc)}
+
+
+# ---------- Offline replay ----------
+def replay_events(
+    events: Iterable[Mapping[str, Any]],
+    evolve: bool = True,
+    target: Optional[Engine] = None,
+) -> Dict[str, Any]:
+    """Feed recorded ticks and alerts through one engine synchronously.
+
+    Events are ``{"kind": "tick", "symbol", "price", "size", "ts"}`` or
+    ``{"kind": "alert", "strategy", "symbol", "side", "price", "ts", "meta"}``.
+    Ticks go into the shared candle store but are only marked against
+    ``target`` (the default engine unless given), which need not be
+    registered. The engine's clock and the evolution scheduler follow the
+    recorded event times instead of wall time, so trade timestamps, hold
+    times and evolution points are those of the session and a replay with a
+    fixed seed is reproducible. Returns summary metrics for the session.
+    """
+    target = target or default_engine
+    if not target.population.genomes:
+        target.init_population()
+    if not target.bots:
+        target.init_default_bots()
+    scheduler = target.scheduler
+    recorded = [0]
+    wall_clock, target.clock = target.clock, lambda: recorded[0]
+    try:
+        started = False
+        for event in events:
+            ts = int(event.get("ts") or 0)
+            recorded[0] = ts
+            if not started:
+                scheduler.mark_evolved("replay", now=ts)
+                started = True
+            if event.get("kind") == "tick":
+                price = float(event["price"])
+                merge_candle_update(event["symbol"], ts, price, price, price, price, float(event.get("size", 1)))
+                target.mark(event["symbol"], price, price, price)
+                continue
+            if event.get("kind") != "alert":
+                continue
+            process_alert_batch(
+                [
+                    {
+                        "strategy": event.get("strategy", "replay"),
+                        "symbol": event["symbol"],
+                        "side": event["side"],
+                        "price": float(event["price"]),
+                        "ts": ts,
+                        "meta": dict(event.get("meta") or {}),
+                    }
+                ],
+                [target],
+            )
+            reason = scheduler.due(now=ts) if evolve else None
+            if reason:
+                target.publish_population(build_next_population(target.population, target.rng))
+                scheduler.mark_evolved(reason, now=ts)
+    finally:
+        target.clock = wall_clock
+    portfolio = target.portfolio
+    return {
+        "pnl": portfolio.equity,
+        "realized": portfolio.realized,
+        "unrealized": portfolio.unrealized,
+        "max_drawdown": portfolio.max_drawdown,
+        "trades": len(target.paper_trades),
+        "wins": target.generation_stats["wins"],
+        "losses": target.generation_stats["losses"],
+        "generations": target.population.generation,
+    }
+
+
+# ---------- Lazy HTTP layer ----------
+# FastAPI and pydantic live in ``mutating_confirmation_api`` so the engine core
+# imports without them; ``uvicorn mutating_confirmation:app`` still works.
+_API_EXPORTS = {"app", "lifespan", "AlertModel", "BotConfigModel", "BotToggleModel", "EngineSettingsPatch"}
+
 
+def __getattr__(name: str) -> Any:
+    # rebound on every publish, so resolved against the default engine on access
+    if name == "population_state":
+        return default_engine.population
+    if name == "bot_routes":
+        return default_engine.bot_routes
+    if name in _API_EXPORTS:
+        import mutating_confirmation_api
 
+        return getattr(mutating_confirmation_api, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,425 @@
+"""
+HTTP layer for the mutating confirmation engine
+-----------------------------------------------
+
+FastAPI app, pydantic request models and routes for
+:mod:`mutating_confirmation`. The engine core imports without FastAPI or
+pydantic; ``mutating_confirmation.app`` resolves to this module's ``app`` on
+first access, so the usual entry point keeps working:
+
+    uvicorn mutating_confirmation:app --reload
+
+``/alert`` and ``/tick`` feed the shared market data and every engine. The
+per-account routes are served for the default engine at the root and for any
+engine under ``/engines/{engine_name}``.
+
+With ``MUTATING_ROLE=writer`` the process also publishes every read model to a
+shared-memory snapshot; ``MUTATING_ROLE=reader`` processes (for example
+``uvicorn mutating_confirmation:app --workers 8``) serve the read endpoints
+from that snapshot and redirect writes to ``MUTATING_WRITER_URL``. See
+``scripts/serve_cluster.py``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from typing import Any, Callable, Dict, Literal, Optional
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, Field
+
+import mutating_confirmation as engine
+
+
+# ---------- Request models ----------
+class BotConfigModel(BaseModel):
+    name: str = Field(..., pattern=r"^[a-zA-Z0-9_\-]+$")
+    symbol: str = engine.SYMBOL_DEFAULT
+    capital: float = Field(engine.PAPER_CAPITAL, gt=0)
+    risk_fraction: float = Field(0.01, gt=0, le=1)
+    max_size: float = Field(10.0, gt=0)
+    leverage: float = Field(1.0, gt=0)
+    min_size: float = Field(0.01, gt=0)
+    mode: Literal["auto", "scalp_only", "swing_only"] = "auto"
+    side_bias: Literal["both", "long", "short"] = "both"
+    active: bool = True
+    description: Optional[str] = None
+
+
+class BotToggleModel(BaseModel):
+    active: bool
+
+
+class EngineSettingsPatch(BaseModel):
+    execution_mode: Optional[Literal["alerts", "paper", "live"]] = None
+    risk_cap: Optional[float] = Field(default=None, ge=0)
+    max_drawdown: Optional[float] = Field(default=None, ge=0)
+    coalesce_ms: Optional[float] = Field(default=None, ge=0, le=1000)
+    min_contracts: Optional[int] = Field(default=None, ge=0)
+    max_contracts: Optional[int] = Field(default=None, ge=0)
+    show_signals: Optional[bool] = None
+    live_account_id: Optional[str] = None
+    live_contract_id: Optional[str] = None
+    live_endpoint: Optional[str] = None
+    time_in_force: Optional[str] = None
+
+
+class SeedRequestModel(BaseModel):
+    path: str
+    symbol: Optional[str] = None
+    format: Optional[Literal["csv", "parquet", "bin"]] = None
+    replace: bool = False
+
+
+class EngineCreateModel(BaseModel):
+    name: str = Field(..., pattern=r"^[a-zA-Z0-9_\-]+$")
+    settings: EngineSettingsPatch = Field(default_factory=EngineSettingsPatch)
+    seed: Optional[int] = None
+    default_bots: bool = True
+
+
+class AlertModel(BaseModel):
+    strategy: str
+    symbol: str
+    side: Literal["buy", "sell"]
+    price: float
+    ts: Optional[int] = None
+    meta: Dict[str, Any] = Field(default_factory=dict)
+
+
+# ---------- App ----------
+def start_engine(target: engine.Engine, default_bots: bool = True) -> None:
+    if not target.population.genomes:
+        target.init_population()
+    if default_bots and not target.bots:
+        target.init_default_bots()
+    target.start_evolution()
+
+
+snapshot_view: Optional[engine.SnapshotView] = None  # reader role only
+
+
+def reading_snapshot() -> bool:
+    return engine.PROCESS_ROLE == "reader"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global snapshot_view
+    if reading_snapshot():
+        engine.candle_archive.start(writable=False)
+        try:
+            yield
+        finally:
+            engine.candle_archive.stop()
+            if snapshot_view is not None:
+                snapshot_view.reader.close()
+                snapshot_view = None
+        return
+
+    engine.candle_archive.start()
+    engine.seed_candles_on_startup()
+    for target in list(engine.engines.values()):
+        start_engine(target)
+    engine.capture.start(engine.CAPTURE_DIR)  # always-on tap; MUTATING_CAPTURE_DIR="" turns it off
+    engine.ingest.start()
+    publisher: Optional[asyncio.Task] = None
+    writer: Optional[engine.SnapshotWriter] = None
+    if engine.PROCESS_ROLE == "writer":
+        writer = engine.SnapshotWriter(engine.SNAPSHOT_PATH)
+        publisher = asyncio.create_task(engine.snapshot_publisher(writer))
+    try:
+        yield
+    finally:
+        if publisher:
+            publisher.cancel()
+            with suppress(asyncio.CancelledError):
+                await publisher
+            writer.close()
+        await asyncio.gather(*(target.stop_evolution() for target in list(engine.engines.values())))
+        await engine.ingest.stop()
+        await asyncio.to_thread(engine.capture.stop)
+        engine.candle_archive.stop()
+
+
+app = FastAPI(title="Mutating Confirmation Trader (prototype)", lifespan=lifespan)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:5173", "http://127.0.0.1:5173"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+@app.middleware("http")
+async def read_only_workers(request: Request, call_next):
+    """Reader workers hold no engine state: send writes to the writer."""
+    if reading_snapshot() and request.method not in {"GET", "HEAD", "OPTIONS"}:
+        if engine.WRITER_URL:
+            target = engine.WRITER_URL.rstrip("/") + request.url.path
+            if request.url.query:
+                target += f"?{request.url.query}"
+            return RedirectResponse(target, status_code=307)
+        return JSONResponse({"detail": "Read-only worker"}, status_code=503)
+    return await call_next(request)
+
+
+def current_snapshot_view() -> engine.SnapshotView:
+    global snapshot_view
+    if snapshot_view is None:
+        snapshot_view = engine.SnapshotView(engine.SnapshotReader(engine.SNAPSHOT_PATH))
+    return snapshot_view
+
+
+def snapshot_body(key: Any) -> tuple[bytes, str]:
+    view = current_snapshot_view()
+    try:
+        return view.lookup(key)
+    except (FileNotFoundError, LookupError):
+        if view.reader.version is not None:
+            raise HTTPException(status_code=404, detail="Not found in snapshot")
+        raise HTTPException(status_code=503, detail="No snapshot published yet")
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """``If-None-Match`` is ``*`` or a comma-separated list of (possibly weak) tags."""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def cached_response(
+    request: Request,
+    key: Any,
+    build: Callable[[], Any],
+    version: Callable[[], Any],
+) -> Response:
+    """Serve a pre-serialized body for ``version()``, honouring
+    ``If-None-Match``. Reader workers serve the writer's snapshot instead."""
+    if reading_snapshot():
+        body, etag = snapshot_body(key)
+    else:
+        body, etag = engine.response_cache.lookup(key, version(), build)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def default_target() -> engine.Engine:
+    return engine.default_engine
+
+
+class SnapshotTarget:
+    """An engine as a reader worker addresses it: just the name its snapshot
+    entries are published under (read routes never build in that role)."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+
+def path_target(engine_name: str) -> engine.Engine:
+    if reading_snapshot():
+        snapshot_body((engine_name, "status"))  # 404 for engines the writer does not publish
+        return SnapshotTarget(engine_name)
+    target = engine.engines.get(engine_name)
+    if target is None:
+        raise HTTPException(status_code=404, detail="Engine not found")
+    return target
+
+
+# ---------- Endpoints ----------
+def engine_router(resolve: Callable[..., engine.Engine], targeted_alerts: bool) -> APIRouter:
+    """Per-account routes, bound to the engine returned by ``resolve``."""
+    router = APIRouter()
+
+    if targeted_alerts:
+
+        @router.post("/alert")
+        async def receive_engine_alert(alert_model: AlertModel, target: engine.Engine = Depends(resolve)):
+            return await engine.submit_alert(alert_model.model_dump(), [target])
+
+    def engine_response(request: Request, target: engine.Engine, kind: str, build: Callable[[], Any], *limit: int):
+        return cached_response(request, (target.name, kind, *limit), build, lambda: target.read_version(kind))
+
+    @router.get("/status")
+    async def status(request: Request, target: engine.Engine = Depends(resolve)):
+        return engine_response(request, target, "status", lambda: target.build_status())
+
+    @router.get("/paper_trades")
+    async def list_paper_trades(request: Request, limit: int = 50, target: engine.Engine = Depends(resolve)):
+        limit = max(1, min(limit, 500))
+        return engine_response(request, target, "paper_trades", lambda: target.build_paper_trades(limit), limit)
+
+    @router.get("/bots")
+    async def list_bots(request: Request, target: engine.Engine = Depends(resolve)):
+        return engine_response(request, target, "bots", lambda: target.build_bot_list())
+
+    @router.get("/signals")
+    async def list_signals(request: Request, limit: int = 50, target: engine.Engine = Depends(resolve)):
+        limit = max(1, min(limit, 500))
+        return engine_response(request, target, "signals", lambda: target.build_signal_list(limit), limit)
+
+    @router.get("/analytics")
+    async def trade_analytics(request: Request, target: engine.Engine = Depends(resolve)):
+        return engine_response(request, target, "analytics", lambda: target.build_analytics())
+
+    @router.get("/settings")
+    async def get_settings(request: Request, target: engine.Engine = Depends(resolve)):
+        return engine_response(request, target, "settings", lambda: target.snapshot())
+
+    @router.post("/settings")
+    async def patch_settings(patch: EngineSettingsPatch, target: engine.Engine = Depends(resolve)):
+        payload = patch.model_dump(exclude_unset=True)
+        updated = target.update_settings(payload)
+        snapshot = target.snapshot()
+        snapshot["settings"] = updated
+        return snapshot
+
+    @router.post("/bots")
+    async def upsert_bot(bot_model: BotConfigModel, target: engine.Engine = Depends(resolve)):
+        record = target.register_bot(bot_model)
+        return {"status": "ok", "bot": record}
+
+    @router.post("/bots/{bot_name}/toggle")
+    async def toggle_bot(bot_name: str, payload: BotToggleModel, target: engine.Engine = Depends(resolve)):
+        if bot_name not in target.bots:
+            raise HTTPException(status_code=404, detail="Bot not found")
+        target.set_bot_active(bot_name, payload.active)
+        return {"status": "ok", "active": payload.active}
+
+    return router
+
+
+@app.post("/alert")
+async def receive_alert(alert_model: AlertModel, request: Request):
+    return await engine.submit_alert(alert_model.model_dump())
+
+
+@app.post("/tick")
+async def receive_tick(payload: Dict[str, Any]):
+    return engine.submit_tick_payload(payload)
+
+
+@app.get("/ingest")
+async def ingest_status():
+    if reading_snapshot():
+        return Response(content=snapshot_body("ingest")[0], media_type="application/json")
+    # live queue counters change on every tick, so they are never cached
+    return engine.ingest_report()
+
+
+@app.get("/candles")
+async def get_candles(
+    symbol: str,
+    timeframe: str = "1m",
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    max_points: int = Query(1000, ge=2),
+    downsample: Literal["lttb", "minmax"] = "lttb",
+    format: Literal["json", "binary"] = "json",
+):
+    """Columnar candles from both tiers of the store; ``format=binary``
+    returns the raw candle binary layout (see ``encode_candle_binary``)."""
+    try:
+        seconds = engine.parse_timeframe(timeframe)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    hot = None
+    if reading_snapshot():
+        with suppress(FileNotFoundError, LookupError):
+            hot = current_snapshot_view().candles(symbol)
+    elif symbol in engine.candles:
+        hot = engine.store_candle_columns(symbol)
+    if hot is None and engine.candle_archive.get(symbol) is None:
+        raise HTTPException(status_code=404, detail="Unknown symbol")
+    first = None if start is None else start - start % seconds
+    cols = engine.candle_history(symbol, first, end, hot=hot)
+    limit = min(max_points, engine.CANDLE_QUERY_MAX_POINTS)
+    result, total = engine.query_candles(cols, seconds, start, end, limit, downsample)
+    downsampled = downsample if total > limit else None
+    if format == "binary":
+        headers = {"X-Candle-Total": str(total), "X-Candle-Downsampled": downsampled or "none"}
+        return Response(engine.encode_candle_binary(result), media_type="application/octet-stream", headers=headers)
+    payload = {"symbol": symbol, "timeframe": seconds, "total": total, "downsampled": downsampled, **result}
+    return Response(content=engine.encode_json(payload), media_type="application/json")
+
+
+@app.get("/patterns/{symbol}")
+async def chart_patterns(symbol: str):
+    if reading_snapshot():
+        return Response(content=snapshot_body(f"patterns/{symbol}")[0], media_type="application/json")
+    if symbol not in engine.candles:
+        raise HTTPException(status_code=404, detail="Unknown symbol")
+    # pattern state advances with closed candles, not the state version, so it is not cached
+    return engine.pattern_tracker(symbol).describe()
+
+
+@app.get("/volume_profile/{symbol}")
+async def volume_profile(symbol: str, levels: bool = True):
+    if reading_snapshot():
+        return Response(content=snapshot_body(f"volume_profile/{symbol}")[0], media_type="application/json")
+    profile = engine.volume_profiles.get(symbol)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="No volume traded for symbol")
+    return profile.describe(levels)
+
+
+@app.get("/engines")
+async def list_engines(request: Request):
+    return cached_response(
+        request,
+        "engines",
+        lambda: {"engines": [target.describe() for target in engine.engines.values()]},
+        engine.engines_version,
+    )
+
+
+@app.post("/engines")
+async def create_engine(payload: EngineCreateModel):
+    try:
+        target = engine.create_engine(payload.name, payload.settings.model_dump(exclude_unset=True), payload.seed)
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    start_engine(target, payload.default_bots)
+    return {"status": "ok", "engine": target.describe()}
+
+
+@app.delete("/engines/{engine_name}")
+async def delete_engine(engine_name: str):
+    target = path_target(engine_name)
+    if target is engine.default_engine:
+        raise HTTPException(status_code=400, detail="The default engine cannot be removed")
+    engine.remove_engine(engine_name)
+    await target.stop_evolution()
+    return {"status": "ok", "engine": target.describe()}
+
+
+@app.post("/admin/seed")
+async def seed_history(payload: SeedRequestModel):
+    """Bulk-load candle history from a file in the engine's seed directory
+    (``MUTATING_SEED_DIR``); ``path`` is relative to it."""
+    try:
+        path = engine.seed_file_path(payload.path)
+    except PermissionError as exc:
+        raise HTTPException(status_code=403, detail=str(exc))
+    try:
+        # parse off the event loop; only applying the columns runs on the ingest writer
+        parsed = await asyncio.to_thread(engine.read_seed_file, path, payload.symbol, payload.format)
+        results = await engine.ingest.submit_call(engine.seed_symbols, parsed, payload.replace)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    except (OSError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"status": "ok", "seeded": results}
+
+
+app.include_router(engine_router(default_target, targeted_alerts=False))
+app.include_router(engine_router(path_target, targeted_alerts=True), prefix="/engines/{engine_name}")
@@ -0,0 +1,107 @@
+"""Cold-start benchmark for the mutating confirmation engine.
+
+Spawns fresh interpreters that import NumPy, then ``mutating_confirmation``,
+and run the startup path (population + default bots). It fails (exit code 1)
+when the best-of-N engine import (on top of the NumPy baseline, which the
+engine cannot avoid) or startup time exceeds its budget, or when a heavy
+dependency that should load lazily was imported. As with ``timeit``, the
+minimum filters out scheduler noise but still moves with real regressions.
+The engine module is byte-compiled first so a stale ``.pyc`` (e.g. under
+``PYTHONDONTWRITEBYTECODE``) is not counted as import time.
+
+Wall-clock budgets are machine dependent, so this runs as a manual or CI
+step rather than from the unit suite:
+
+    python scripts/bench_startup.py --runs 7 --import-budget-ms 30
+"""
+
+import argparse
+import json
+import py_compile
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+IMPORT_BUDGET_MS = 30.0  # engine import on top of NumPy
+STARTUP_BUDGET_MS = 25.0
+LAZY_MODULES = ("pandas", "fastapi", "pydantic", "asyncio", "urllib.request", "logging")
+
+PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import numpy
+t0 = time.perf_counter()
+import mutating_confirmation as engine
+t1 = time.perf_counter()
+engine.init_population()
+engine.init_default_bots()
+t2 = time.perf_counter()
+print(json.dumps({
+    "numpy_ms": (t0 - t) * 1000,
+    "import_ms": (t1 - t0) * 1000,
+    "startup_ms": (t2 - t1) * 1000,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def run_probe() -> Dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def bench(runs: int) -> Dict:
+    py_compile.compile(str(ROOT / "mutating_confirmation.py"), doraise=True)
+    samples: List[Dict] = [run_probe() for _ in range(max(1, runs))]
+    return {
+        "numpy_ms": min(s["numpy_ms"] for s in samples),
+        "import_ms": min(s["import_ms"] for s in samples),
+        "startup_ms": min(s["startup_ms"] for s in samples),
+        "loaded": sorted({name for s in samples for name in s["loaded"]}),
+    }
+
+
+def check(
+    stats: Dict,
+    import_budget_ms: float = IMPORT_BUDGET_MS,
+    startup_budget_ms: float = STARTUP_BUDGET_MS,
+) -> List[str]:
+    failures = []
+    if stats["loaded"]:
+        failures.append(f"lazy dependencies imported eagerly: {', '.join(stats['loaded'])}")
+    if stats["import_ms"] > import_budget_ms:
+        failures.append("import budget exceeded")
+    if stats["startup_ms"] > startup_budget_ms:
+        failures.append("startup budget exceeded")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--startup-budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    stats = bench(args.runs)
+    print(
+        f"numpy {stats['numpy_ms']:.1f} ms, "
+        f"import {stats['import_ms']:.1f} ms (budget {args.import_budget_ms:.0f}), "
+        f"startup {stats['startup_ms']:.1f} ms (budget {args.startup_budget_ms:.0f})"
+    )
+    failures = check(stats, args.import_budget_ms, args.startup_budget_ms)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,8 @@
 import json
+import sys
 import time
 import urllib.request
-from typing import Dict
+from typing import Dict, Optional
 
 BASE_URL = "http://localhost:8000"
 SYMBOL = "SYMBOL1"
@@ -34,6 +35,18 @@ def seed_ticks(count: int = 240) -> None:
         time.sleep(0.01)
 
 
+def seed_history(path: str, symbol: Optional[str] = None) -> None:
+    """Bulk-load a CSV/Parquet/binary candle file through the admin endpoint.
+
+    ``path`` is relative to the engine's ``MUTATING_SEED_DIR`` (the endpoint
+    answers 403 when that is unset or the path leaves it).
+    """
+    payload = {"path": path}
+    if symbol:
+        payload["symbol"] = symbol
+    post("/admin/seed", payload)
+
+
 def seed_alerts() -> None:
     now = int(time.time())
     alerts = [
@@ -52,5 +65,8 @@ def seed_alerts() -> None:
 
 
 if __name__ == "__main__":
-    seed_ticks()
+    if len(sys.argv) > 1:
+        seed_history(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    else:
+        seed_ticks()
     seed_alerts()
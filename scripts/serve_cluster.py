@@ -0,0 +1,71 @@
+"""Run one ingest/writer process plus N read-serving workers.
+
+    python scripts/serve_cluster.py --workers 8
+
+The writer (``MUTATING_ROLE=writer``) owns all engine state, takes ``/tick``
+and ``/alert`` traffic and publishes every read model to a memory-mapped
+snapshot. The readers (``MUTATING_ROLE=reader``, one uvicorn with
+``--workers N``) serve dashboards straight from that snapshot; writes sent to
+them are redirected (307) to the writer. Point webhooks and tick feeds at the
+writer port and dashboards at the reader port.
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Serve the engine as one writer plus read-only workers.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--writer-port", type=int, default=8001)
+    parser.add_argument("--reader-port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="read-serving worker processes")
+    parser.add_argument("--snapshot", default=None, help="snapshot file (default: MUTATING_SNAPSHOT_PATH or /dev/shm)")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.snapshot:
+        env["MUTATING_SNAPSHOT_PATH"] = args.snapshot
+    uvicorn = [sys.executable, "-m", "uvicorn", "mutating_confirmation:app", "--host", args.host]
+    writer = subprocess.Popen(
+        uvicorn + ["--port", str(args.writer_port)],
+        cwd=ROOT,
+        env={**env, "MUTATING_ROLE": "writer"},
+    )
+    readers = subprocess.Popen(
+        uvicorn + ["--port", str(args.reader_port), "--workers", str(args.workers)],
+        cwd=ROOT,
+        env={
+            **env,
+            "MUTATING_ROLE": "reader",
+            "MUTATING_WRITER_URL": f"http://{args.host}:{args.writer_port}",
+        },
+    )
+    print(f"writer on :{args.writer_port}, {args.workers} readers on :{args.reader_port}")
+    procs = [writer, readers]
+    try:
+        while all(proc.poll() is None for proc in procs):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in procs:
+            if proc.poll() is None:
+                proc.send_signal(signal.SIGINT)
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+    return max((proc.returncode or 0) for proc in procs)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""Hyperparameter sweep over a recorded tick/alert session.
+
+Every configuration is replayed in its own worker process (one task per
+process, so engine globals never leak between runs) with the engine constants
+and settings injected and the evolution RNG seeded. Results are appended to a
+JSONL file as they finish; rerunning with the same file skips configurations
+that are already there, so an interrupted sweep resumes where it stopped.
+
+    python scripts/sweep_mutation.py session.jsonl --space space.json --workers 8
+
+The recording is a capture directory or ``.mcap`` file written by the
+engine's capture log, or JSONL with one event per line, for example
+``{"kind": "tick", "symbol": "GC", "price": 2000.5, "size": 1, "ts": 1700000000}``
+or ``{"kind": "alert", "strategy": "s1", "symbol": "GC", "side": "buy",
+"price": 2001, "ts": 1700000005}``.
+
+The search space maps names to candidate values. Upper-case names are
+engine constants (``POP_SIZE``, ``MUT_RATE``, ``CHECK_WEIGHTS``...), lower-case
+names are engine settings (``risk_cap``...). Lists are enumerated in grid mode
+and sampled in random mode; ``{"low": a, "high": b}`` ranges are random-only:
+
+    {"mode": "random", "samples": 40, "seeds": [1, 2],
+     "params": {"POP_SIZE": [14, 28, 56], "MUT_RATE": {"low": 0.1, "high": 0.5},
+                "CHECK_WEIGHTS": [[1, 0.8, 0.6, 0.4], [1, 1, 1, 1]]}}
+"""
+
+import argparse
+import contextlib
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def load_space(spec: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "mode": spec.get("mode", "grid"),
+        "samples": int(spec.get("samples", 20)),
+        "seeds": list(spec.get("seeds", [0])),
+        "params": dict(spec.get("params", {})),
+    }
+
+
+def expand_configs(space: Dict[str, Any], rng_seed: int = 0) -> Iterator[Dict[str, Any]]:
+    params = space["params"]
+    names = sorted(params)
+    if space["mode"] == "grid":
+        for name in names:
+            if not isinstance(params[name], list):
+                raise ValueError(f"grid mode needs a list of values for {name}")
+        combos = itertools.product(*(params[name] for name in names))
+        configs = [dict(zip(names, combo)) for combo in combos]
+    else:
+        rng = random.Random(rng_seed)
+        configs = []
+        for _ in range(space["samples"]):
+            config = {}
+            for name in names:
+                choice = params[name]
+                if isinstance(choice, dict):
+                    low, high = choice["low"], choice["high"]
+                    if isinstance(low, int) and isinstance(high, int):
+                        config[name] = rng.randint(low, high)
+                    else:
+                        config[name] = rng.uniform(low, high)
+                else:
+                    config[name] = rng.choice(choice)
+            configs.append(config)
+    for config in configs:
+        for seed in space["seeds"]:
+            yield {"params": config, "seed": seed}
+
+
+def config_key(config: Dict[str, Any]) -> str:
+    blob = json.dumps(config, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def load_events(path: str) -> List[Dict[str, Any]]:
+    if os.path.isdir(path) or path.endswith(".mcap"):
+        import mutating_confirmation as engine
+
+        return list(engine.read_capture(path))
+    with open(path, "r", encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def run_config(recording: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Worker entry point: replay ``recording`` under one configuration."""
+    sys.path.insert(0, str(ROOT))
+    import mutating_confirmation as engine
+
+    settings = {"execution_mode": "paper"}
+    for name, value in config["params"].items():
+        if name.isupper():
+            if not hasattr(engine, name):
+                raise ValueError(f"unknown engine constant {name}")
+            setattr(engine, name, tuple(value) if isinstance(value, list) else value)
+        elif name in engine.ENGINE_SETTING_KEYS:
+            settings[name] = value
+        else:
+            raise ValueError(f"unknown engine setting {name}")
+    engine.update_engine_settings(settings)
+    engine.seed_evolution(config["seed"])
+
+    started = time.perf_counter()
+    metrics = engine.replay_events(load_events(recording))
+    return {
+        "key": config_key(config),
+        **config,
+        **{name: round(value, 6) if isinstance(value, float) else value for name, value in metrics.items()},
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
+
+
+def completed_keys(out_path: Path) -> Set[str]:
+    if not out_path.exists():
+        return set()
+    keys = set()
+    with out_path.open("r", encoding="utf-8") as fh:
+        for line in fh:
+            with contextlib.suppress(json.JSONDecodeError, KeyError):
+                keys.add(json.loads(line)["key"])
+    return keys
+
+
+def rank(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Best PnL first, then shallower drawdown, then more trades."""
+    return sorted(results, key=lambda r: (-r["pnl"], r["max_drawdown"], -r["trades"]))
+
+
+def run_sweep(
+    recording: str,
+    space: Dict[str, Any],
+    out_path: Path,
+    workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    done = completed_keys(out_path)
+    pending = [config for config in expand_configs(space) if config_key(config) not in done]
+    print(f"{len(pending)} configurations to run ({len(done)} already in {out_path})")
+    if pending:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, max_tasks_per_child=1) as pool:
+            futures = {pool.submit(run_config, recording, config): config for config in pending}
+            with out_path.open("a", encoding="utf-8") as out:
+                for idx, future in enumerate(as_completed(futures), start=1):
+                    result = future.result()
+                    out.write(json.dumps(result, separators=(",", ":")) + "\n")
+                    out.flush()
+                    print(f"[{idx}/{len(pending)}] {result['key']} pnl={result['pnl']:.2f} trades={result['trades']}")
+    with out_path.open("r", encoding="utf-8") as fh:
+        return rank([json.loads(line) for line in fh if line.strip()])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Sweep engine hyperparameters over a recorded session.")
+    parser.add_argument("recording", help="capture directory/file or JSONL of recorded tick/alert events")
+    parser.add_argument("--space", required=True, help="JSON search-space file")
+    parser.add_argument("--out", default="sweep_results.jsonl", help="results file (appended, enables resume)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.space, "r", encoding="utf-8") as fh:
+        space = load_space(json.load(fh))
+    ranked = run_sweep(args.recording, space, Path(args.out), args.workers)
+    for result in ranked[: args.top]:
+        print(
+            f"pnl={result['pnl']:>10.2f} dd={result['max_drawdown']:>9.2f} trades={result['trades']:>4} "
+            f"seed={result['seed']} {json.dumps(result['params'], sort_keys=True)}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,117 @@
+import asyncio
+import json
+import re
+import subprocess
+import sys
+from collections import deque
+from pathlib import Path
+
+import numpy as np
 import pytest
+from fastapi.testclient import TestClient
 
+import mutating_confirmation as engine
 from mutating_confirmation import (
+    EVOLVE_CONVERGENCE_ALERTS,
+    EVOLVE_MAX_INTERVAL,
+    EVOLVE_MIN_INTERVAL,
+    PATTERN_PROFILES,
+    POP_SIZE,
+    SCORE_CARRY,
+    AlertCoalescer,
+    BotConfigModel,
+    CandleArchive,
+    CandleSeries,
+    CaptureLog,
+    Engine,
+    EvolutionScheduler,
+    IngestPipeline,
+    PatternTracker,
+    PopulationSnapshot,
+    Portfolio,
+    SnapshotReader,
+    SnapshotView,
+    SnapshotWriter,
+    TradeAnalytics,
+    VolumeProfile,
+    add_tick,
+    app,
+    apply_tick,
+    bot_allows_trade,
+    bot_route,
+    bots,
+    build_next_population,
+    build_snapshot_entries,
+    candle_history,
+    candles,
     clamp_contracts,
+    clean_candle_columns,
+    create_engine,
+    decode_candle_binary,
     engine_settings,
     generation_stats,
+    genomes_from_matrix,
+    init_population,
+    invalidate_bot_routes,
+    lttb_indices,
+    minmax_indices,
+    mutate_population,
+    next_generation,
+    open_trades,
+    paper_trades,
+    pattern_features,
+    pattern_trackers,
+    portfolio,
+    query_candles,
+    random_population,
+    read_capture,
     record_signal,
+    register_bot,
+    remove_engine,
+    replay_events,
+    resolve_brackets,
+    resolve_position_size,
+    seed_candles,
+    seed_candles_from_file,
+    select_top_k,
+    set_bot_active,
     should_halt_trading,
     signal_log,
+    size_route_positions,
+    touch_state,
     update_engine_settings,
+    value_area_brackets,
+    volume_profiles,
+    write_candle_binary,
 )
 
 
 @pytest.fixture(autouse=True)
-def reset_engine_state():
+def reset_engine_state(monkeypatch):
+    monkeypatch.setattr(engine, "CAPTURE_DIR", "")  # the server's capture tap stays off under test
     settings_backup = dict(engine_settings)
     stats_backup = dict(generation_stats)
+    bots_backup = dict(bots)
+    symbols_backup = set(candles)
     signal_log.clear()
+    portfolio.reset()
     yield
+    bots.clear()
+    bots.update(bots_backup)
+    invalidate_bot_routes()
+    portfolio.reset()
+    touch_state()
     engine_settings.clear()
     engine_settings.update(settings_backup)
     generation_stats.clear()
     generation_stats.update(stats_backup)
     signal_log.clear()
+    for symbol in (set(candles) | set(pattern_trackers) | set(volume_profiles)) - symbols_backup:
+        candles.pop(symbol, None)
+        pattern_trackers.pop(symbol, None)
+        volume_profiles.pop(symbol, None)
+        engine._snapshot_candles.pop(symbol, None)
+        engine.snapshot_builder.forget(symbol)
 
 
 def test_clamp_contracts_respects_bounds():
@@ -52,3 +142,847 @@ def test_record_signal_respects_toggle():
     engine_settings["show_signals"] = True
     record_signal({"symbol": "ES"})
     assert len(signal_log) == 1
+
+
+def test_select_top_k_orders_best_first():
+    scores = np.array([0.1, 0.9, -0.3, 0.5, 0.7])
+    assert select_top_k(scores, 3).tolist() == [1, 4, 3]
+    assert select_top_k(scores, 10).tolist() == [1, 4, 3, 0, 2]
+
+
+def test_next_generation_is_reproducible_with_seed():
+    matrix = random_population(64, np.random.default_rng(7))
+    scores = np.linspace(-1, 1, 64)
+    first, lineage = next_generation(matrix, scores, np.random.default_rng(11), pop_size=64, elites=4)
+    second, _ = next_generation(matrix, scores, np.random.default_rng(11), pop_size=64, elites=4)
+    assert np.array_equal(first, second)
+    assert lineage.shape == (64, 2)
+    assert lineage[:4, 0].tolist() == [63, 62, 61, 60]
+
+
+def test_mutate_population_respects_gene_bounds():
+    matrix = random_population(2000, np.random.default_rng(3))
+    for _ in range(5):
+        matrix = mutate_population(matrix, np.random.default_rng(5))
+    genomes = genomes_from_matrix(matrix)
+    assert all(1 <= g["confirm_count"] for g in genomes)
+    assert all(0.1 <= g["require_agreement_fraction"] <= 1.0 for g in genomes)
+    assert all(0 <= g["time_bias_start"] <= 23 for g in genomes)
+    assert all(isinstance(g["use_atr_sl"], bool) for g in genomes)
+
+
+def test_genome_votes_match_genome_vote_row_by_row():
+    matrix = mutate_population(random_population(500, np.random.default_rng(4)), np.random.default_rng(6))
+    rows = engine.GenomeRows(matrix)
+    recent = [
+        {"symbol": "VOTE", "side": side, "ts": 1_700_000_000 - lag}
+        for side, lag in (("buy", 10), ("BUY", 90), ("sell", 20), ("buy", 400))
+    ] + [{"symbol": "OTHER", "side": "buy", "ts": 1_700_000_000}]
+    for pattern_bias in (0.0, 0.6, -0.6):
+        feat = {
+            "symbol": "VOTE",
+            "alert_side": 1,
+            "alert_ts": 1_700_000_000,
+            "vol_mult": 1.2,
+            "mom_z": -0.8,
+            "atr": 0.5,
+            "pattern_bias": pattern_bias,
+        }
+        actions, confidence = engine.genome_votes(matrix, feat, recent)
+        fitness = engine.forward_fitness(actions, confidence, feat)
+        for idx in range(len(matrix)):
+            decision = engine.genome_vote(rows[idx], feat, recent)
+            assert (("ignore", "scalp", "buy")[actions[idx]], confidence[idx]) == decision
+            assert fitness[idx] == engine.evaluate_on_short_forward("VOTE", decision, feat)
+    assert rows[-1] == genomes_from_matrix(matrix)[-1] and len(rows) == 500
+
+
+def test_build_next_population_carries_scores_with_lineage():
+    matrix = random_population(8, np.random.default_rng(1))
+    scores = np.arange(8, dtype=float)
+    snapshot = PopulationSnapshot(genomes_from_matrix(matrix), matrix, scores, 3)
+    nxt = build_next_population(snapshot, np.random.default_rng(2))
+    assert nxt.generation == 4
+    assert len(nxt.genomes) == len(nxt.scores) == POP_SIZE
+    # elites come first, keep their own fitness (scaled) and their genes
+    assert nxt.scores[0] == 7 * SCORE_CARRY
+    assert np.array_equal(nxt.matrix[0], matrix[7])
+    assert snapshot.scores.tolist() == list(range(8))
+
+
+def test_evolution_scheduler_triggers():
+    scheduler = EvolutionScheduler()
+    start = scheduler.last_evolved
+    assert scheduler.due(start + 1_000) is None  # no alerts, nothing to learn from
+    scheduler.note_alert(1.0)
+    assert scheduler.due(start + EVOLVE_MAX_INTERVAL + 1) == "time_budget"
+    assert scheduler.due(start + EVOLVE_MIN_INTERVAL / 2) is None
+    for _ in range(EVOLVE_CONVERGENCE_ALERTS):
+        scheduler.note_alert(1.0)
+    assert scheduler.due(start + EVOLVE_MIN_INTERVAL + 1) == "converged"
+    scheduler.mark_evolved("converged")
+    assert scheduler.alerts_since == 0
+
+
+def test_evolve_loop_keeps_alerts_scored_during_the_build(monkeypatch):
+    import threading
+
+    monkeypatch.setattr(engine, "EVOLVE_MIN_ALERTS", 2)
+    monkeypatch.setattr(engine, "EVOLVE_MIN_INTERVAL", 0.0)
+    started, release = threading.Event(), threading.Event()
+    real_build = engine.build_next_population
+
+    def slow_build(snapshot, rng):
+        started.set()
+        release.wait(5)
+        return real_build(snapshot, rng)
+
+    monkeypatch.setattr(engine, "build_next_population", slow_build)
+    target = Engine("builder", seed=5)
+    target.init_population()
+    parents = target.population
+
+    async def run():
+        target.scheduler.note_alert(0.0)
+        target.scheduler.note_alert(0.0)
+        target.start_evolution()
+        await asyncio.to_thread(started.wait, 5)
+        parents.scores[:] = np.arange(POP_SIZE, dtype=float)  # an alert scored while the build runs
+        target.scheduler.note_alert(1.0)
+        release.set()
+        while target.population is parents:
+            await asyncio.sleep(0.01)
+        await target.stop_evolution()
+
+    asyncio.run(run())
+    nxt = target.population
+    assert nxt.generation == 1
+    assert np.allclose(nxt.scores, engine.inherited_scores(parents.scores, nxt.lineage))
+    assert target.scheduler.alerts_since == 1
+
+
+def test_engines_evolve_with_their_own_generators(monkeypatch):
+    monkeypatch.setattr(engine, "evolution_rng", None)
+    engine.seed_evolution(3)
+    first, second = Engine("first"), Engine("second")
+    assert first.rng is not second.rng and first.rng is not engine.evolution_generator()
+    draws = first.rng.random(3)
+    engine.seed_evolution(3)
+    assert np.array_equal(Engine("again").rng.random(3), draws)
+
+
+def test_bot_route_indexes_by_symbol_style_and_side():
+    bots.clear()
+    register_bot(BotConfigModel(name="scalper", symbol="NQ", mode="scalp_only", side_bias="long"))
+    register_bot(BotConfigModel(name="anything", symbol="NQ"))
+    register_bot(BotConfigModel(name="other", symbol="GC"))
+    assert bot_route("NQ", True, "buy").names == ["scalper", "anything"]
+    assert bot_route("NQ", True, "sell").names == ["anything"]
+    assert bot_route("NQ", False, "buy").names == ["anything"]
+    set_bot_active("anything", False)
+    assert bot_route("NQ", False, "buy") is None
+
+
+def test_size_route_positions_matches_scalar_sizing():
+    bots.clear()
+    update_engine_settings({"min_contracts": 1, "max_contracts": 50})
+    configs = [
+        BotConfigModel(name=f"bot{i}", symbol="ES", capital=10_000 * (i + 1), risk_fraction=0.01, max_size=5 + i, min_size=2)
+        for i in range(6)
+    ]
+    for cfg in configs:
+        register_bot(cfg)
+    sizes = size_route_positions(bot_route("ES", False, "buy"), 100.0, 60.0)
+    expected = [clamp_contracts(resolve_position_size(bots[cfg.name], 100.0, 60.0)) for cfg in configs]
+    assert sizes.tolist() == pytest.approx(expected)
+
+
+def test_portfolio_marks_positions_incrementally():
+    book = Portfolio()
+    long = {"symbol": "GC", "side": "buy", "entry": 100.0, "size": 2, "meta": {"tickValue": 5, "bot": "b1"}}
+    short = {"symbol": "GC", "side": "sell", "entry": 104.0, "size": 1, "meta": {"tickValue": 5}}
+    book.open(long)
+    book.mark("GC", 103.0)
+    assert book.unrealized == pytest.approx(30.0)
+    assert book.symbols["GC"].vwap_entry == pytest.approx(100.0)
+    book.open(short)
+    assert book.symbols["GC"].net_size == 1
+    assert book.unrealized == pytest.approx(35.0)
+    assert book.bot_unrealized("b1") == pytest.approx(30.0)
+    book.mark("GC", 95.0)
+    assert book.high_water == pytest.approx(35.0)
+    assert book.drawdown == pytest.approx(35.0 + 5.0)
+    book.close(long, pnl=-50.0)
+    assert book.realized == -50.0
+    assert book.unrealized == pytest.approx(45.0)
+    assert book.bot_unrealized("b1") == 0.0
+
+
+def test_should_halt_trading_on_marked_drawdown():
+    update_engine_settings({"risk_cap": 0, "max_drawdown": 100})
+    portfolio.open({"symbol": "ES", "side": "buy", "entry": 50.0, "size": 1, "meta": {"tickValue": 50}})
+    portfolio.mark("ES", 51.0)
+    assert should_halt_trading() is False
+    portfolio.mark("ES", 48.9)
+    assert should_halt_trading() is True
+
+
+def test_alert_coalescer_evaluates_burst_once():
+    init_population()
+    coalescer = AlertCoalescer()
+    alerts = [
+        {"strategy": f"s{i}", "symbol": "COAL", "side": "buy", "price": 10.0 + i, "ts": 1_700_000_000 + i, "meta": {}}
+        for i in range(3)
+    ]
+
+    async def burst():
+        return await asyncio.gather(*(coalescer.submit(alert, 0.005) for alert in alerts))
+
+    responses = asyncio.run(burst())
+    assert coalescer.batches == 1
+    assert coalescer.coalesced == 2
+    assert [resp["batch_position"] for resp in responses] == [0, 1, 2]
+    assert {resp["status"] for resp in responses} == {responses[0]["status"]}
+    assert all(resp["batch_size"] == 3 for resp in responses)
+
+
+def test_alert_coalescer_full_batch_does_not_shorten_next_window(monkeypatch):
+    flushed = []
+
+    async def fake_submit(alerts, targets=None):
+        flushed.append((asyncio.get_running_loop().time(), len(alerts)))
+        return {"status": "ok"}
+
+    monkeypatch.setattr(engine.ingest, "submit_alerts", fake_submit)
+    coalescer = AlertCoalescer()
+    window = 0.2
+    alert = {"symbol": "COAL", "side": "buy", "ts": 1_700_000_000}
+
+    async def bursts():
+        loop = asyncio.get_running_loop()
+        first = [asyncio.ensure_future(coalescer.submit(dict(alert), window)) for _ in range(engine.COALESCE_MAX_BATCH)]
+        await asyncio.gather(*first)  # full batch flushed at once
+        await asyncio.sleep(window / 2)
+        started = loop.time()
+        await coalescer.submit(dict(alert), window)
+        return started
+
+    started = asyncio.run(bursts())
+    assert [size for _, size in flushed] == [engine.COALESCE_MAX_BATCH, 1]
+    assert flushed[1][0] - started >= window * 0.95
+
+
+def test_ingest_shed_collapses_ticks_per_symbol_bucket():
+    pipe = IngestPipeline(tick_capacity=4)
+    pipe.ticks.extend(
+        [
+            ["X", 60, 1.0, 1.0, 1.0, 1.0, 1],
+            ["Y", 60, 7.0, 7.0, 7.0, 7.0, 1],
+            ["X", 61, 3.0, 3.0, 3.0, 3.0, 2],
+            ["X", 62, 0.5, 0.5, 0.5, 0.5, 1],
+            ["X", 125, 2.0, 2.0, 2.0, 2.0, 1],
+        ]
+    )
+    pipe.shed()
+    assert list(pipe.ticks)[0] == ["X", 62, 1.0, 3.0, 0.5, 0.5, 4]
+    assert len(pipe.ticks) == 3
+    assert pipe.stats["ticks_collapsed"] == 2
+    assert pipe.stats["ticks_dropped"] == 0
+
+
+def test_ingest_shed_drops_late_ticks_to_keep_bucket_order():
+    apply_tick("LATEY", 120, 5.0, 5.0, 5.0, 5.0, 1)
+    pipe = IngestPipeline(tick_capacity=4)
+    pipe.ticks.extend(
+        [
+            ["LATEX", 125, 2.0, 2.0, 2.0, 2.0, 1],
+            ["LATEX", 61, 9.0, 9.0, 9.0, 9.0, 1],  # older bucket, queued behind a newer one
+            ["LATEY", 70, 6.0, 6.0, 6.0, 6.0, 1],  # older than the applied candle
+            ["LATEX", 130, 3.0, 3.0, 3.0, 3.0, 1],
+            ["LATEX", 185, 4.0, 4.0, 4.0, 4.0, 1],
+        ]
+    )
+    pipe.shed()
+    assert [item[:2] for item in pipe.ticks] == [["LATEX", 130], ["LATEX", 185]]
+    assert pipe.stats["ticks_late"] == 2
+    assert pipe.stats["ticks_collapsed"] == 1
+    pipe.drain_once()
+    assert [row["t"] for row in candles["LATEX"]] == [120, 180]
+    assert candles["LATEX"][0]["h"] == 3.0
+
+
+def test_ingest_writer_applies_ticks_and_alerts():
+    init_population()
+    pipe = IngestPipeline(tick_batch=8)
+
+    async def run():
+        pipe.start()
+        for idx in range(20):
+            pipe.submit_tick("INGEST", 100.0 + idx, 1, 1_700_000_000 + idx)
+        result = await pipe.submit_alerts(
+            [{"strategy": "t", "symbol": "INGEST", "side": "buy", "price": 120.0, "ts": 1_700_000_030, "meta": {}}]
+        )
+        called = await pipe.submit_call(lambda symbol: (symbol, pipe.running), "INGEST")
+        await pipe.stop()
+        return result, called
+
+    result, called = asyncio.run(run())
+    assert "status" in result
+    assert called == ("INGEST", True)  # ran on the writer task
+    assert pipe.stats["ticks_applied"] == 20
+    assert pipe.stats["alerts_processed"] == 1
+    assert candles["INGEST"][-1]["c"] == 119.0
+
+
+def test_read_endpoints_serve_cached_body_with_etag():
+    client = TestClient(app)
+    first = client.get("/settings")
+    etag = first.headers["etag"]
+    assert client.get("/settings").headers["etag"] == etag
+    assert client.get("/settings", headers={"If-None-Match": etag}).status_code == 304
+    update_engine_settings({"risk_cap": 123})
+    changed = client.get("/settings", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["settings"]["risk_cap"] == 123
+    assert changed.headers["etag"] != etag
+
+
+def test_marks_only_invalidate_the_marked_engines_pnl_views():
+    second = create_engine("marked", {"execution_mode": "paper"}, seed=3)
+    try:
+        client = TestClient(app)
+        add_tick("MARKED", 100.0, 1, 1_700_000_000)
+        second.paper_execute("MARKED", "buy", 100.0, 90.0, 110.0, size=1)
+        paths = ("/engines/marked/status", "/engines/marked/signals", "/status", "/settings")
+        etags = {path: client.get(path).headers["etag"] for path in paths}
+        apply_tick("MARKED", 1_700_000_010, 101.0, 101.0, 101.0, 101.0, 1)
+        status = client.get(paths[0], headers={"If-None-Match": etags[paths[0]]})
+        assert status.status_code == 200 and status.headers["etag"] != etags[paths[0]]
+        for path in paths[1:]:
+            assert client.get(path, headers={"If-None-Match": etags[path]}).status_code == 304
+    finally:
+        remove_engine("marked")
+
+
+def test_if_none_match_accepts_wildcard_and_tag_lists():
+    client = TestClient(app)
+    etag = client.get("/settings").headers["etag"]
+    for header in ("*", f'"other", {etag}', f'W/{etag}, "other"'):
+        assert client.get("/settings", headers={"If-None-Match": header}).status_code == 304
+    assert client.get("/settings", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_engine_core_imports_without_heavy_dependencies():
+    probe = (
+        "import sys, mutating_confirmation as m; m.init_population(); m.init_default_bots(); "
+        "print(','.join(n for n in ('pandas', 'fastapi', 'pydantic', 'asyncio', 'urllib.request', 'logging') "
+        "if n in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+
+def test_clean_candle_columns_validates_and_dedupes():
+    cols = {
+        "t": np.array([180, 60, 65, 120, 240]),
+        "o": np.array([3.0, 1.0, 1.5, 2.0, 4.0]),
+        "h": np.array([3.5, 1.5, 2.0, 2.5, 3.0]),  # last row: high below open
+        "l": np.array([2.5, 0.5, 1.0, 1.5, 3.5]),
+        "c": np.array([3.0, 1.0, 1.8, 2.0, 4.0]),
+        "v": np.array([1.0, 1.0, 2.0, 1.0, 1.0]),
+    }
+    cleaned, rejected, duplicates = clean_candle_columns(cols)
+    assert rejected == 1
+    assert duplicates == 1
+    assert cleaned["t"].tolist() == [60, 120, 180]
+    assert cleaned["c"].tolist() == [1.8, 2.0, 3.0]  # later row wins the 60s bucket
+
+
+def test_seed_candles_from_binary_keeps_live_candles(tmp_path):
+    add_tick("SEEDBIN", 50.0, 2, 1_700_000_040)
+    t = 1_699_999_800 + np.arange(5) * 60
+    path = tmp_path / "SEEDBIN.bin"
+    write_candle_binary(str(path), {"t": t, "o": np.ones(5), "h": np.full(5, 2.0), "l": np.zeros(5), "c": np.ones(5), "v": np.ones(5)})
+    [result] = seed_candles_from_file(str(path))
+    assert result["symbol"] == "SEEDBIN"
+    series = list(candles["SEEDBIN"])
+    assert [row["t"] for row in series] == t.tolist()
+    assert series[-1]["c"] == 50.0  # live candle for the last bucket wins
+
+
+def test_admin_seed_only_reads_the_seed_directory(tmp_path, monkeypatch):
+    seeds = tmp_path / "seeds"
+    seeds.mkdir()
+    t = 1_700_000_040 + np.arange(3) * 60
+    cols = {"t": t, "o": np.ones(3), "h": np.full(3, 2.0), "l": np.zeros(3), "c": np.ones(3), "v": np.ones(3)}
+    write_candle_binary(str(seeds / "SEEDAPI.bin"), cols)
+    write_candle_binary(str(tmp_path / "OUTSIDE.bin"), cols)
+    (seeds / "link.bin").symlink_to(tmp_path / "OUTSIDE.bin")
+    client = TestClient(app)
+    assert client.post("/admin/seed", json={"path": "SEEDAPI.bin"}).status_code == 403  # off by default
+    monkeypatch.setattr(engine, "SEED_CANDLE_DIR", str(seeds))
+
+    response = client.post("/admin/seed", json={"path": "SEEDAPI.bin"})
+    assert response.status_code == 200 and response.json()["seeded"][0]["symbol"] == "SEEDAPI"
+    for path in ("../OUTSIDE.bin", str(tmp_path / "OUTSIDE.bin"), "link.bin", "sub/../../OUTSIDE.bin", "."):
+        assert client.post("/admin/seed", json={"path": path}).status_code == 403
+    assert client.post("/admin/seed", json={"path": "missing.bin"}).status_code == 404
+
+
+def test_replay_events_evolves_on_recorded_clock(monkeypatch, capsys):
+    monkeypatch.setattr(engine, "EVOLVE_MIN_ALERTS", 5)
+    replay = Engine("replay", {"execution_mode": "paper"}, seed=7)
+    events = []
+    for i in range(12):
+        ts = 1_700_000_000 + i * 30
+        events.append({"kind": "tick", "symbol": "RPLY", "price": 100.0 + i, "size": 1, "ts": ts})
+        events.append({"kind": "alert", "strategy": "s1", "symbol": "RPLY", "side": "buy", "price": 100.0 + i, "ts": ts + 1})
+    result = replay_events(events, target=replay)
+    assert result["generations"] == 2  # 12 alerts, one generation per 5
+    assert result["trades"] == len(replay.paper_trades)
+    assert all(trade not in paper_trades for trade in replay.paper_trades)
+    # trades carry the session's clock, and fills no longer print
+    assert replay.paper_trades and all(1_700_000_000 <= trade["ts"] <= events[-1]["ts"] for trade in replay.paper_trades)
+    assert replay.clock is engine.time.time
+    assert "PAPER" not in capsys.readouterr().out
+
+
+def test_engines_share_candles_but_not_account_state():
+    second = create_engine("second", {"execution_mode": "paper", "max_contracts": 2}, seed=3)
+    try:
+        second.init_population()
+        add_tick("SHARED", 100.0, 1, 1_700_000_000)
+        assert candles["SHARED"][-1]["c"] == 100.0
+        trade = second.paper_execute("SHARED", "buy", 100.0, 99.0, 101.0, size=5)
+        assert trade["size"] == 2.0  # second engine's own contract cap
+        assert trade not in paper_trades and not open_trades
+        apply_tick("SHARED", 1_700_000_010, 101.5, 101.5, 101.5, 101.5, 1)
+        assert trade["status"] == "closed" and second.generation_stats["realized"] == 2.0
+        alert = {"strategy": "s", "symbol": "SHARED", "side": "buy", "price": 101.5, "ts": 1_700_000_020}
+        result = engine.process_alert_batch([alert])
+        assert set(result["engines"]) == {"default", "second"}
+        assert len(second.population.scores) and second.scheduler.alerts_since == 1
+    finally:
+        remove_engine("second")
+
+
+def test_capture_log_round_trips_events_across_rotation(tmp_path):
+    log = CaptureLog(rotate_bytes=256, flush_seconds=60)  # frames are cut by hand below
+    assert log.start(str(tmp_path))
+    for i in range(300):
+        log.record_tick("CAP", 100.0 + i, 1.0, 1_700_000_000 + i)
+        if i % 100 == 99:
+            log.flush()
+    second = Engine("second")
+    log.record_alert({"strategy": "s", "symbol": "CAP", "side": "sell", "price": 1.0, "ts": 7, "meta": {}}, [second])
+    log.stop()
+    log.record_tick("CAP", 1.0, 1.0, 1)  # ignored once stopped
+    assert log.stats["files"] == 4 and log.stats["written"] == 301
+
+    events = list(read_capture(str(tmp_path)))
+    assert [e["price"] for e in events[:-1]] == [100.0 + i for i in range(300)]
+    assert events[-1]["kind"] == "alert" and events[-1]["engines"] == ["second"]
+    assert [e["arrival_ns"] for e in events] == sorted(e["arrival_ns"] for e in events)
+    assert len(list(read_capture(str(tmp_path), kinds=["alert"]))) == 1
+
+    # a frame cut short by a crash ends the file without raising
+    with open(log.path, "ab") as fh:
+        fh.write(b"\x10\x00\x00\x00\x20")
+    assert len(list(read_capture(str(tmp_path)))) == 301
+
+
+def test_server_lifespan_runs_the_capture_tap(tmp_path, monkeypatch):
+    assert not CaptureLog().start()  # off under test (the fixture clears CAPTURE_DIR)
+    monkeypatch.setattr(engine, "CAPTURE_DIR", str(tmp_path))
+    with TestClient(app) as client:
+        assert engine.capture.active
+        assert client.post("/tick", json={"symbol": "TAP", "price": 10.0, "size": 2, "ts": 1_700_000_000}).status_code == 200
+    assert not engine.capture.active
+    assert [(e["symbol"], e["price"]) for e in read_capture(str(tmp_path))] == [("TAP", 10.0)]
+
+    log = CaptureLog(buffer_max=2)
+    log.active = True  # producer side only: no writer thread drains the buffer
+    for i in range(3):
+        log.record_tick("TAP", 1.0, 1.0, i)
+    assert log.describe()["dropped"] == 1
+
+
+def test_resolve_brackets_fills_and_intrabar_rules():
+    cols = {
+        "t": np.array([0.0, 60, 120, 180]),
+        "open": np.array([100.0, 100, 100, 90]),
+        "high": np.array([101.0, 106, 101, 91]),
+        "low": np.array([99.0, 94, 99, 89]),
+        "close": np.array([100.0, 101, 100, 90]),
+    }
+    entry, side = [100.0, 100.0, 100.0, 100.0], ["buy", "sell", "buy", "buy"]
+    sl, tp = [95.0, 105.0, 98.0, 50.0], [105.0, 95.0, 200.0, 300.0]
+    opened = [30, 30, 90, 30]  # first eligible bars: 60, 60, 120, 60
+
+    stop_first = resolve_brackets(entry, side, sl, tp, opened, cols, rule="stop_first")
+    assert stop_first["bar"].tolist() == [1, 1, 3, -1]
+    assert stop_first["reason"].tolist() == ["stop", "stop", "stop", "open"]
+    assert stop_first["exit"][:3].tolist() == [95.0, 105.0, 90.0]  # bar 3 gaps below the stop
+    assert stop_first["pnl"][:2].tolist() == [-5.0, -5.0]
+
+    target_first = resolve_brackets(entry, side, sl, tp, opened, cols, rule="target_first")
+    assert target_first["reason"][:2].tolist() == ["target", "target"]
+    # an up bar visits its low first: the long stops out, the short takes profit
+    path = resolve_brackets(entry, side, sl, tp, opened, cols, rule="ohlc_path")
+    assert path["reason"][:2].tolist() == ["stop", "target"]
+    assert resolve_brackets(entry, side, sl, tp, opened, cols, max_bars=1)["bar"][2] == -1
+
+    # candle-resolved closes carry the fill bar's time, not the wall clock
+    account = Engine("resolver")
+    trade = {
+        "symbol": "RESOLVE", "side": "buy", "entry": 100.0, "sl": 95.0, "tp": 105.0,
+        "size": 1.0, "ts": 1_700_000_070, "status": "open", "meta": {"bot": "b1"},
+    }
+    account.register_open_trade(trade)
+    bars = 1_700_000_040 + np.arange(4) * 60
+    history = {"t": bars, "o": cols["open"], "h": cols["high"], "l": cols["low"], "c": cols["close"], "v": np.ones(4)}
+    seed_candles("RESOLVE", history, replace=True)
+    assert account.resolve_open_trades("RESOLVE") == 1
+    assert trade["exit_ts"] == bars[1] and trade["exit"] == 95.0
+    assert account.bot_state["b1"]["last_trade_ts"] == bars[1]
+    assert account.analytics.describe(now=bars[1])["engine"]["all"]["last_trade_ts"] == bars[1]
+
+
+def test_reader_workers_serve_published_snapshot(tmp_path, monkeypatch):
+    import mutating_confirmation_api as api
+
+    add_tick("SNAP", 100.0, 1.0, 1_700_000_000)
+    record_signal({"symbol": "SNAP"})
+    record_signal({"symbol": "SNAP"})
+    update_engine_settings({"risk_cap": 321})
+    path = tmp_path / "snapshot.bin"
+    writer = SnapshotWriter(str(path), capacity=4096)  # small, so publishing remaps
+    writer.publish(build_snapshot_entries(), 7)
+    view = SnapshotView(SnapshotReader(str(path)))
+    body, etag = view.lookup(("default", "settings"))
+    assert etag.startswith(f'"{engine._ETAG_EPOCH}-')
+    assert view.candles("SNAP")["c"][-1] == 100.0
+    assert len(json.loads(view.lookup(("default", "signals", 1))[0])["signals"]) == 1
+
+    monkeypatch.setattr(engine, "PROCESS_ROLE", "reader")
+    monkeypatch.setattr(engine, "SNAPSHOT_PATH", str(path))
+    monkeypatch.setattr(engine, "WRITER_URL", "")
+    monkeypatch.setattr(api, "snapshot_view", None)
+    client = TestClient(app)
+    update_engine_settings({"risk_cap": 5})  # local state is ignored by readers
+    response = client.get("/engines/default/settings")
+    assert response.json()["settings"]["risk_cap"] == 321
+    assert response.headers["etag"] == etag
+    assert client.get("/engines/missing/status").status_code == 404
+    assert client.post("/settings", json={"risk_cap": 1}).status_code == 503
+    signals_etag = client.get("/signals?limit=1").headers["etag"]
+    writer.publish(build_snapshot_entries(), 8)
+    changed = client.get("/settings")
+    assert changed.json()["settings"]["risk_cap"] == 5 and changed.headers["etag"] != etag
+    # entries the publish left alone keep their ETag
+    assert client.get("/signals?limit=1", headers={"If-None-Match": signals_etag}).status_code == 304
+    api.snapshot_view.reader.close()
+    writer.close()
+
+
+def test_snapshot_builder_rebuilds_only_changed_entries():
+    builder = engine.SnapshotBuilder()
+    candles["INCR"] = deque(maxlen=4)  # small ring, so new bars evict old ones
+    for i in range(6):
+        add_tick("INCR", 100.0 + i, 1.0, 1_700_000_000 + 60 * i)
+    builder.encode(builder.collect())
+    add_tick("INCR", 99.0, 2.0, 1_700_000_000 + 60 * 5)  # same bar
+    add_tick("INCR", 98.0, 1.0, 1_700_000_000 + 60 * 6)  # new bar
+    pending = builder.collect()
+    assert "candles/INCR" in pending and not any(key.endswith("/status") for key in pending)
+    assert set(pending) <= {"candles/INCR", "patterns/INCR", "ingest"}
+    mirrored = pending["candles/INCR"][1]
+    expected = engine.store_candle_columns("INCR")
+    assert all(mirrored[key].tolist() == expected[key].tolist() for key in "tohlcv")
+
+    update_engine_settings({"risk_cap": 77})
+    assert "default/settings" in builder.collect()
+    assert builder.collect() == {}
+    candles.pop("INCR")
+    assert "candles/INCR" not in builder.encode(builder.collect())
+
+
+def test_trade_analytics_streams_per_slice_and_window():
+    analytics = TradeAnalytics({"1m": 60})
+    closes = [(10.0, "a", True), (-5.0, "a", False), (20.0, "b", True), (-15.0, "a", True)]
+    for idx, (pnl, bot, scalp) in enumerate(closes):
+        ts = 1_000 + idx * 30
+        meta = {"bot": bot, "is_scalp": scalp, "genome": idx % 2, "genome_id": f"g{idx % 2}"}
+        analytics.record({"symbol": "ES", "ts": ts - 5, "exit_ts": ts, "meta": meta}, pnl)
+    report = analytics.describe(now=1_090)
+    total = report["engine"]["all"]
+    pnls = np.array([pnl for pnl, _, _ in closes])
+    assert total["trades"] == 4 and total["wins"] == 2
+    assert total["profit_factor"] == pytest.approx(30 / 20)
+    assert total["sharpe"] == pytest.approx(pnls.mean() / pnls.std(ddof=1))
+    assert total["max_drawdown"] == pytest.approx(15.0)
+    assert total["avg_hold_s"] == 5.0
+    assert report["bots"]["a"]["all"]["pnl"] == pytest.approx(-10.0)
+    assert report["styles"]["scalp"]["all"]["trades"] == 3
+    assert report["genomes"]["g0"]["index"] == 0
+    # closes at 1000 and 1030 fell out of the 60 s window ending at 1090
+    window = report["engine"]["1m"]
+    assert window["trades"] == 2 and window["pnl"] == pytest.approx(5.0)
+    assert analytics.describe(now=2_000)["engine"]["1m"] == {"trades": 0}
+
+
+def test_record_trade_close_feeds_engine_analytics():
+    target = Engine("analytics")
+    target.update_settings({"execution_mode": "paper"})
+    trade = target.paper_execute("ES", "buy", 100.0, 99.0, 102.0, 1, meta={"bot": "x", "is_scalp": False})
+    target.record_trade_close(trade, 102.0, "target")
+    report = target.build_analytics()
+    assert report["bots"]["x"]["all"]["pnl"] == pytest.approx(2.0)
+    assert report["styles"]["swing"]["1h"]["trades"] == 1
+
+
+def test_cached_analytics_age_out_of_rolling_windows():
+    target = create_engine("aging", {"execution_mode": "paper"}, seed=3)
+    try:
+        now = [1_700_000_000.0]
+        target.clock = lambda: now[0]
+        client = TestClient(app)
+        trade = target.paper_execute("AGING", "buy", 100.0, 99.0, 102.0, 1)
+        target.record_trade_close(trade, 102.0, "target")
+        first = client.get("/engines/aging/analytics")
+        assert first.json()["engine"]["1h"]["trades"] == 1
+        builder = engine.SnapshotBuilder()
+        assert "aging/analytics" in builder.collect()
+        assert "aging/analytics" not in builder.collect()
+        now[0] += 2 * 3600
+        aged = client.get("/engines/aging/analytics", headers={"If-None-Match": first.headers["etag"]})
+        assert aged.status_code == 200
+        assert aged.json()["engine"]["1h"] == {"trades": 0}
+        assert aged.json()["engine"]["1d"]["trades"] == 1
+        assert builder.collect()["aging/analytics"][1]["engine"]["1h"] == {"trades": 0}
+    finally:
+        remove_engine("aging")
+
+
+def test_pattern_profiles_match_shared_profile_js():
+    source = (Path(__file__).resolve().parents[1] / "shared" / "patterns" / "profile.js").read_text()
+    for name in ("DEFAULT", "NQ", "GC"):
+        body = re.search(rf"const {name}_PROFILE = \{{(.*?)\}};", source, re.S).group(1)
+        for key, value in re.findall(r"(\w+): ([\d.]+)", body):
+            snake = re.sub(r"([A-Z])", r"_\1", key).lower()
+            assert PATTERN_PROFILES[name][snake] == float(value), (name, key)
+
+
+def test_pattern_tracker_confirms_double_top_from_closed_candles():
+    closes = np.r_[
+        np.full(10, 100.0),
+        np.linspace(100, 101, 11),
+        np.linspace(100.9, 99.5, 5),
+        np.linspace(99.7, 101.02, 5),
+        np.linspace(100.8, 100.0, 5),
+        [98.5, 98.4],
+    ]
+    volumes = np.full(len(closes), 100.0)
+    volumes[-2] = 400.0  # breakout candle; the last one is still forming
+    t = np.arange(len(closes)) * 60
+    seed_candles("PATTERNS", {"t": t, "o": closes, "h": closes + 0.05, "l": closes - 0.05, "c": closes, "v": volumes})
+
+    signals = engine.pattern_tracker("PATTERNS").describe()["signals"]
+    # same signal as evaluateChartPatterns in shared/patterns on these candles
+    assert [(s["id"], s["keyLevels"], s["confidence"]) for s in signals] == [
+        ("Double Top-2160", {"resistance": pytest.approx(101.06), "trigger": pytest.approx(99.45)}, 0.9)
+    ]
+    assert pattern_features("PATTERNS") == {"pattern_bias": pytest.approx(-0.9), "pattern": "Double Top"}
+    assert bot_allows_trade({"algo": "pattern_confluence"}, "sell", "PATTERNS")
+    assert not bot_allows_trade({"algo": "pattern_confluence"}, "buy", "PATTERNS")
+
+    incremental = PatternTracker("PATTERNS")
+    for i in range(len(closes) - 1):
+        incremental.add_candle(t[i], closes[i] + 0.05, closes[i] - 0.05, closes[i], volumes[i])
+    assert incremental.describe()["signals"] == signals
+
+
+def test_pattern_tracker_warms_up_from_recent_bars_after_a_seed():
+    closes = np.r_[
+        np.full(3000, 100.0),
+        np.linspace(100, 101, 11),
+        np.linspace(100.9, 99.5, 5),
+        np.linspace(99.7, 101.02, 5),
+        np.linspace(100.8, 100.0, 5),
+        [98.5, 98.4],
+    ]
+    volumes = np.full(len(closes), 100.0)
+    volumes[-2] = 400.0
+    t = np.arange(len(closes)) * 60
+    seed_candles("WARMUP", {"t": t, "o": closes, "h": closes + 0.05, "l": closes - 0.05, "c": closes, "v": volumes})
+    assert "WARMUP" not in pattern_trackers  # seeding stays vectorized; the tracker is rebuilt on use
+
+    tracker = engine.pattern_tracker("WARMUP")
+    assert tracker.count == tracker.warmup
+    full = PatternTracker("WARMUP")
+    for i in range(len(closes) - 1):
+        full.add_candle(t[i], closes[i] + 0.05, closes[i] - 0.05, closes[i], volumes[i])
+    assert tracker.describe()["signals"] == full.describe()["signals"]
+    assert tracker.features() == full.features() == {"pattern_bias": pytest.approx(-0.9), "pattern": "Double Top"}
+
+
+def test_volume_profile_tracks_session_and_rolling_value_area():
+    session_start = 1_700_000_000 - (1_700_000_000 - engine.VOLUME_PROFILE_SESSION_HOUR * 3600) % 86400
+    profile = VolumeProfile("VAP", 1.0)
+    # bins 100..104 get 10, 20, 40, 20, 5 (plus 5 at 90, far out of value)
+    for price, volume in ((100, 10), (101, 20), (102, 40), (103, 20), (104, 5), (90, 5)):
+        profile.add(session_start + 60, price, volume)
+    session = profile.session.summary()
+    assert (session["poc"], session["val"], session["vah"]) == (102.0, 101.0, 103.0)  # 80 of 100
+    assert profile.features(105.0)["vp_position"] == 1
+
+    # an hour later the rolling window only holds the new trades
+    profile.add(session_start + 60 + engine.VOLUME_PROFILE_WINDOW + 60, 95.0, 7.0)
+    rolling = profile.rolling.summary()
+    assert (rolling["poc"], rolling["volume"]) == (95.0, pytest.approx(7.0))
+    assert profile.session.summary()["poc"] == 102.0
+
+    profile.add(session_start + 86400, 110.0, 1.0)  # next session
+    assert profile.previous_session["poc"] == 102.0
+    assert profile.session.summary()["volume"] == 1.0
+
+
+def test_price_histogram_stays_around_traded_prices():
+    step = engine.volume_profile_step(21_000.0)
+    profile = VolumeProfile("NQ", step)
+    rng = np.random.default_rng(7)
+    prices = 21_000.0 + np.cumsum(rng.normal(0, step, 20_000))
+    start = 1_700_000_000
+    for i, price in enumerate(prices):
+        profile.add(start + i * 3, float(price), 1.0)
+    for hist in (profile.session, profile.rolling):
+        assert hist.base * step > 20_000  # never allocated down from price 0
+        touched = np.ptp(np.round(prices / step))
+        assert len(hist.volume) <= 3 * touched + 200
+
+    # the value area is the narrowest band around the POC holding 70%
+    bins = hist.occupied()
+    lo, hi = hist.value_area(0.7)
+    poc = hist.point_of_control()
+    assert bins[poc - hist.first] == bins.max() and lo <= poc <= hi
+    held = np.frombuffer(hist.volume)[lo : hi + 1].sum()
+    assert held >= 0.7 * hist.total - 1e-6
+    cum = np.concatenate(([0.0], np.cumsum(bins)))
+    widths = [
+        end - low
+        for low in range(poc - hist.first + 1)
+        for end in range(poc - hist.first + 1, len(bins) + 1)
+        if cum[end] - cum[low] >= 0.7 * cum[-1] * (1 - 1e-12)
+    ]
+    assert hi - lo + 1 == min(widths)
+
+
+def test_value_area_brackets_snap_only_within_range():
+    feat = {"vp_val": 98.0, "vp_vah": 103.0, "vp_step": 0.5}
+    # genome stop 2 below, target 4 above: VAL-0.5 (2.5 away) and VAH (3 away) are close enough
+    assert value_area_brackets("buy", 100.0, 98.0, 104.0, feat) == (97.5, 103.0)
+    # a target 20 away is more than twice the VAH distance, so the genome's stays
+    assert value_area_brackets("buy", 100.0, 98.0, 120.0, feat) == (97.5, 120.0)
+    assert value_area_brackets("sell", 100.0, 102.0, 96.0, feat) == (103.5, 98.0)
+    assert value_area_brackets("buy", 100.0, 98.0, 104.0, {"vp_val": None}) == (98.0, 104.0)
+
+
+def test_query_candles_resamples_and_downsamples():
+    t = 1_700_000_040 + np.arange(600) * 60
+    close = np.sin(np.arange(600) / 20.0) * 10 + 100
+    close[333] = 150.0  # spike inside one bucket
+    cols = {"t": t, "o": close - 0.5, "h": close + 1, "l": close - 1, "c": close, "v": np.ones(600)}
+
+    five, total = query_candles(cols, 300, start=int(t[10]), end=int(t[-1]))
+    assert five["t"][0] == t[10] - t[10] % 300  # start aligned down to a whole 5m bucket
+    first = (t >= five["t"][0]) & (t < five["t"][1])
+    assert five["o"][0] == cols["o"][first][0] and five["c"][0] == cols["c"][first][-1]
+    assert five["h"][0] == cols["h"][first].max() and five["v"][0] == first.sum()
+    assert total == len(five["t"]) and five["v"].sum() == np.sum(t >= five["t"][0])
+
+    idx = lttb_indices(t.astype(float), close, 50)
+    assert len(idx) == 50 and idx[0] == 0 and idx[-1] == 599 and 333 in idx
+    assert np.all(np.diff(idx) > 0)
+    idx = minmax_indices(cols["l"], cols["h"], 40)
+    assert len(idx) <= 40 and np.all(np.diff(idx) > 0)
+    assert cols["h"][idx].max() == cols["h"].max() and cols["l"][idx].min() == cols["l"].min()
+
+    reduced, total = query_candles(cols, 60, max_points=40, method="minmax")
+    assert total == 600 and len(reduced["t"]) <= 40 and reduced["h"].max() == 151.0
+
+
+def test_candles_endpoint_returns_columns_and_binary():
+    t = 1_700_000_040 + np.arange(300) * 60
+    close = 100 + np.arange(300) * 0.1
+    seed_candles("QUERY", {"t": t, "o": close, "h": close + 1, "l": close - 1, "c": close, "v": np.ones(300)}, replace=True)
+    client = TestClient(app)
+    body = client.get("/candles", params={"symbol": "QUERY", "timeframe": "5m", "max_points": 20}).json()
+    assert body["timeframe"] == 300 and body["total"] == 61 and body["downsampled"] == "lttb"
+    assert len(body["t"]) == len(body["c"]) == 20 and body["c"][-1] == pytest.approx(close[-1])
+
+    raw = client.get("/candles", params={"symbol": "QUERY", "start": int(t[100]), "end": int(t[109]), "format": "binary"})
+    assert raw.headers["content-type"] == "application/octet-stream" and raw.headers["x-candle-total"] == "10"
+    cols = decode_candle_binary(raw.content)
+    assert cols["t"].tolist() == t[100:110].tolist() and cols["c"].tolist() == close[100:110].tolist()
+
+    assert client.get("/candles", params={"symbol": "QUERY", "timeframe": "90s"}).status_code == 400
+    assert client.get("/candles", params={"symbol": "NOPE"}).status_code == 404
+
+
+def test_candle_series_appends_and_trims_torn_rows(tmp_path):
+    series = CandleSeries(str(tmp_path / "ES"))
+    t = 1_700_000_040 + np.arange(10) * 60
+    cols = {"t": t, "o": t * 1.0, "h": t + 1.0, "l": t - 1.0, "c": t * 1.0, "v": np.ones(10)}
+    assert series.append(cols) == 10
+    assert series.append({key: arr[5:] for key, arr in cols.items()}) == 0  # nothing newer
+    reader = CandleSeries(str(tmp_path / "ES"), writable=False)
+    assert reader.columns(2, 4)["t"].tolist() == t[2:4].tolist()
+    assert reader.locate(int(t[3]), int(t[6])) == (3, 7)
+    series.close()
+
+    with open(tmp_path / "ES" / "o.f8", "ab") as fh:  # writer died after a price column
+        fh.write(np.float64(1.0).tobytes())
+    reopened = CandleSeries(str(tmp_path / "ES"))
+    assert reopened.count == 10 and reopened.last_t == t[-1]
+    assert (tmp_path / "ES" / "o.f8").stat().st_size == 80
+    reopened.close()
+
+
+def test_candle_history_spans_hot_ring_and_archive(tmp_path, monkeypatch):
+    archive = CandleArchive(str(tmp_path))
+    archive.start()
+    monkeypatch.setattr(engine, "candle_archive", archive)
+    checks = []
+    real_isdir = engine.os.path.isdir
+    monkeypatch.setattr(engine.os.path, "isdir", lambda path: checks.append(path) or real_isdir(path))
+    assert archive.get("YOUNG") is None and archive.get("YOUNG") is None
+    assert len(checks) == 1  # the miss is cached
+    monkeypatch.setattr(engine.os.path, "isdir", real_isdir)
+    monkeypatch.setattr(engine, "CANDLE_HOT_BARS", 50)
+    t = 1_700_000_040 + np.arange(200) * 60
+    close = 100 + np.arange(200) * 0.5
+    result = seed_candles("TIERED", {"t": t, "o": close, "h": close + 1, "l": close - 1, "c": close, "v": np.ones(200)})
+    assert (result["total"], result["archived"]) == (50, 150)
+
+    for i in range(3):  # live candles push the oldest hot ones into the archive
+        add_tick("TIERED", 200.0 + i, 1, int(t[-1]) + 60 * (i + 1))
+    assert len(candles["TIERED"]) == 50 and archive.get("TIERED").count == 153
+
+    full = candle_history("TIERED")
+    assert full["t"].tolist() == t.tolist() + [int(t[-1]) + 60 * (i + 1) for i in range(3)]
+    cold = candle_history("TIERED", start=int(t[10]), end=int(t[19]))
+    assert isinstance(cold["c"], np.memmap) and cold["c"].tolist() == close[10:20].tolist()
+    assert candle_history("TIERED", n=60)["t"][0] == t[143]
+    assert len(engine.candle_arrays("TIERED", n=120)["close"]) == 120
+
+    # history older than the archive tail is merged in; archived rows win
+    older = 1_700_000_040 - np.arange(1, 11)[::-1] * 60
+    seed_candles("TIERED", {"t": np.r_[older, t[:5]], "o": np.ones(15), "h": np.full(15, 2.0), "l": np.zeros(15), "c": np.ones(15), "v": np.ones(15)})
+    merged = candle_history("TIERED")
+    assert merged["t"][:10].tolist() == older.tolist() and merged["c"][10:15].tolist() == close[:5].tolist()
+    assert len(merged["t"]) == 213 and len(candles["TIERED"]) == 50
+
+    client = TestClient(app)
+    body = client.get("/candles", params={"symbol": "TIERED", "timeframe": "1h", "max_points": 1000}).json()
+    assert body["total"] == 4 and sum(body["v"]) == 213
+    archive.stop()